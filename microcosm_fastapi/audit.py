@@ -20,6 +20,7 @@ from microcosm.api import defaults, typed
 from microcosm.metadata import Metadata
 from microcosm.config.types import boolean
 from microcosm_logging.timing import elapsed_time
+from microcosm_fastapi.database.instrumentation import track_queries
 from microcosm_fastapi.utils import AsyncIteratorWrapper
 from microcosm_fastapi.logging_data_map import LoggingInfo
 from microcosm_fastapi.errors import ParsedException
@@ -38,6 +39,8 @@ class AuditOptions(NamedTuple):
     include_path: bool
     include_query_string: bool
     log_as_debug: bool
+    # Warn when a request issues more SQL statements than this; zero disables the warning
+    max_sql_statements: int = 0
 
 
 SKIP_LOGGING = "_microcosm_flask_skip_audit_logging"
@@ -78,6 +81,7 @@ class RequestInfo:
 
         self.request_context = request_context
         self.timing = dict()
+        self.query_stats = None
 
         self.parsed_exception = None
         self.stack_trace = None
@@ -95,6 +99,9 @@ class RequestInfo:
             **self.timing
         )
 
+        if self.query_stats is not None:
+            dct.update(self.query_stats.to_dict())
+
         if self.options.include_query_string and self.args:
             dct.update({
                 key: values
@@ -125,8 +132,7 @@ class RequestInfo:
 
     async def capture_response(self, response) -> dict:
         self.success = True
-
-        body, self.status_code, self.response_headers = await parse_response(response)
+        self.status_code, self.response_headers = response.status_code, response.headers
 
         if not self.app_metadata.debug:
             # only capture responsebody on debug
@@ -136,6 +142,12 @@ class RequestInfo:
             # only capture response body if requested
             return
 
+        if "content-length" not in response.headers:
+            # don't buffer streamed responses; only those have no length up front
+            return
+
+        body, _, _ = await parse_response(response)
+
         if not body:
             # only capture request body if there is one
             return
@@ -261,8 +273,19 @@ def create_audit_request(graph, options):
         logging_info: LoggingInfo = graph.logging_data_map.get_entry(request.url.path, request.method)
         request_info.set_operation_and_func_name(logging_info)
 
-        with elapsed_time(request_info.timing):
+        with elapsed_time(request_info.timing), track_queries() as query_stats:
             response = await call_next(request)
+        request_info.query_stats = query_stats
+
+        if options.max_sql_statements and query_stats.statement_count > options.max_sql_statements:
+            # Usually an N+1 query pattern
+            logger.warning(
+                "Request issued %s SQL statements (more than %s): %s %s",
+                query_stats.statement_count,
+                options.max_sql_statements,
+                request.method,
+                request.url.path,
+            )
 
         request_error = getattr(request.state, 'error', None)
         if request_error is None:
@@ -294,6 +317,7 @@ def create_audit_request(graph, options):
     include_path=typed(type=boolean, default_value=False),
     include_query_string=typed(type=boolean, default_value=False),
     log_as_debug=typed(type=boolean, default_value=False),
+    max_sql_statements=typed(type=int, default_value=0),
 )
 def configure_audit_middleware(graph):
     """
@@ -306,6 +330,7 @@ def configure_audit_middleware(graph):
         include_path=graph.config.audit_middleware.include_path,
         include_query_string=graph.config.audit_middleware.include_query_string,
         log_as_debug=graph.config.audit_middleware.log_as_debug,
+        max_sql_statements=graph.config.audit_middleware.max_sql_statements,
     )
 
     graph.app.middleware("http")(create_audit_request(graph, options))
@@ -1,12 +1,22 @@
-from typing import Callable, Dict
+from typing import Callable, Dict, Optional, Sequence
 
 from fastapi.exceptions import FastAPIError
 
+from microcosm_fastapi.database.guards import QueryGuard
+from microcosm_fastapi.database.loading import LoadingContext
 from microcosm_fastapi.namespaces import Namespace
 from microcosm_fastapi.operations import Operation
+from microcosm_fastapi.route_context import RouteContext, with_route_context
 
 
-def configure_crud(graph, namespace: Namespace, mappings: Dict[Operation, Callable]):
+def configure_crud(
+    graph,
+    namespace: Namespace,
+    mappings: Dict[Operation, Callable],
+    loader_options: Optional[Dict[Operation, Sequence]] = None,
+    deadlines: Optional[Dict[Operation, float]] = None,
+    query_guard: Optional[QueryGuard] = None,
+):
     """
     Mounts the supported namespace operations into the FastAPI graph, following our
     conventions for setting up URL patterns.
@@ -14,9 +24,27 @@ def configure_crud(graph, namespace: Namespace, mappings: Dict[Operation, Callab
     :param mappings: Dict[
         Operation: function
     ]
+    :param loader_options: Dict[
+        Operation: relationship loader options (e.g. `selectinload`) for the store of
+                   the namespace subject, overriding the store's own
+    ]
+    :param deadlines: Dict[
+        Operation: default budget (in seconds) of the route, within which it is
+                   cancelled (see `microcosm_fastapi.deadlines`)
+    ]
+    :param query_guard: the largest page size and planner cost estimate of the
+                        namespace's searches and counts, if any
 
     """
+    loader_options = loader_options or dict()
+    deadlines = deadlines or dict()
+
+    # The export path would otherwise match the instance path (of e.g. retrieve)
+    mappings = dict(sorted(mappings.items(), key=lambda item: item[0] != Operation.Export))
+
     for operation, fn in mappings.items():
+        loading_context = LoadingContext(namespace.subject, operation, loader_options.get(operation))
+        timeout = deadlines.get(operation)
         operation = operation.value
 
         # Configuration params for this swagger endpoint
@@ -41,7 +69,13 @@ def configure_crud(graph, namespace: Namespace, mappings: Dict[Operation, Callab
         }
 
         try:
-            graph.logging_data_map.add_entry(namespace, operation, fn.__name__)
+            route_context = RouteContext(
+                loading_context=loading_context,
+                pool_name=namespace.pool_name,
+                query_guard=query_guard,
+                logging_info=graph.logging_data_map.add_entry(namespace, operation, fn.__name__),
+            )
+            fn = with_route_context(fn, route_context, timeout=timeout)
 
             method_mapping[operation.method](url_path, **configuration)(fn)
         except FastAPIError as e:
@@ -1,4 +1,6 @@
+from functools import lru_cache
 from http import HTTPStatus
+from inspect import Parameter, signature
 from typing import (
     Any,
     Callable,
@@ -8,16 +10,49 @@ from typing import (
 from uuid import UUID
 
 from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
+from microcosm_fastapi.conventions.parsers import SparseFields
+from microcosm_fastapi.conventions.schemas import SearchSchema
+from microcosm_fastapi.conventions.streaming import ENCODERS, EXPORT_MEDIA_TYPES, NDJSON_MEDIA_TYPE, started
+from microcosm_fastapi.database.copying import CopyFormat
 from microcosm_fastapi.naming import name_for
 from microcosm_fastapi.operations import Operation
+from microcosm_fastapi.route_context import RouteContext
+
+
+# Sparse fieldsets are few per resource; build each list schema once
+sparse_search_schema = lru_cache(maxsize=None)(SearchSchema)
+
+
+def accepts(func: Callable, name: str) -> bool:
+    """
+    Whether a function accepts a keyword argument.
+
+    """
+    parameters = signature(func).parameters.values()
+    return any(
+        parameter.name == name or parameter.kind == Parameter.VAR_KEYWORD
+        for parameter in parameters
+    )
+
+
+def sparse_response(schema: BaseModel, content) -> JSONResponse:
+    """
+    Serialize content with a schema trimmed to a sparse fieldset, in place of the
+    route's (full) response model.
+
+    """
+    model = schema.parse_obj(content) if isinstance(content, dict) else schema.from_orm(content)
+    return JSONResponse(jsonable_encoder(model, by_alias=True))
 
 
 class CRUDStoreAdapter:
     """
     Adapt the CRUD conventions callbacks to the `Store` interface.
-    Does NOT impose transactions; use the `microcosm_postgres.context.transactional` decorator.
+    Does NOT impose transactions; use the `microcosm_fastapi.database.context.transactional_async` decorator.
 
     """
     def __init__(self, graph, store):
@@ -36,14 +71,20 @@ class CRUDStoreAdapter:
         model = self.store.model_class(id=identifier, **body.dict())
         return await self.store.replace(identifier, model)
 
-    async def _retrieve(self, identifier: UUID):
-        return await self.store.retrieve(identifier)
+    async def _retrieve(self, identifier: UUID, fields: Optional[SparseFields] = None):
+        if fields is None:
+            return await self.store.retrieve(identifier)
+
+        instance = await self.store.retrieve(identifier, fields=fields.names)
+        return sparse_response(fields.schema, instance)
 
     async def _search(
         self,
         offset: int,
         limit: int,
         link_provider: Callable = None,
+        include_count: bool = True,
+        fields: Optional[SparseFields] = None,
         **kwargs
     ):
         """
@@ -55,22 +96,154 @@ class CRUDStoreAdapter:
         def search(self, offset: int, limit: int) -> SearchSchema(PizzaSchema):
             pass
 
+        Pass `include_count=False` to skip counting; the `next` link is then
+        detected by fetching one extra row, and passed to the link provider as
+        `has_next` (which custom link providers that only take the count skip).
+
+        Pass `fields` (see `microcosm_fastapi.conventions.parsers:FieldsParser`) to
+        load and return only some of the item fields.
+
         """
-        items = await self.store.search(offset=offset, limit=limit, **kwargs)
-        count = await self.store.count(**kwargs)
+        names = fields.names if fields else None
+
+        has_next = False
+        if include_count:
+            items, count = await self.store.search_with_count(offset=offset, limit=limit, fields=names, **kwargs)
+        else:
+            items = await self.store.search(offset=offset, limit=limit + 1, fields=names, **kwargs)
+            count, has_next = None, len(items) > limit
+            items = items[:limit]
 
         payload = dict(
             items=items,
             count=count,
+            count_strategy=self.store.count_strategy.value if include_count else None,
             offset=offset,
             limit=limit,
         )
 
         if link_provider:
-            payload["_links"] = link_provider(count)
+            if accepts(link_provider, "has_next"):
+                payload["_links"] = link_provider(count, has_next=has_next)
+            else:
+                payload["_links"] = link_provider(count)
+
+        if fields:
+            return sparse_response(sparse_search_schema(fields.schema), payload)
+        return payload
+
+    async def _search_by_cursor(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        link_provider: Callable = None,
+        include_count: bool = True,
+        fields: Optional[SparseFields] = None,
+        **kwargs
+    ):
+        """
+        The keyset-paginated search endpoint expects to be serialized by
+        `microcosm_fastapi.conventions.schemas:SearchSchema(..., cursor=True)`
+
+        You can do this via a route definition that looks like:
+
+        def search(self, limit: int = 20, after: Optional[str] = None, before: Optional[str] = None)
+                -> SearchSchema(PizzaSchema, cursor=True):
+            pass
+
+        """
+        # Fetch one extra row to detect whether there is a page beyond this one
+        items = await self.store.search(
+            limit=limit + 1,
+            after=after,
+            before=before,
+            fields=fields.names if fields else None,
+            **kwargs
+        )
+        count = await self.store.count(**kwargs) if include_count else None
+
+        has_more = len(items) > limit
+        if before is None:
+            items = items[:limit]
+            has_next, has_prev = has_more, after is not None
+        else:
+            items = items[-limit:] if limit else []
+            has_next, has_prev = True, has_more
+
+        payload = dict(
+            items=items,
+            count=count,
+            count_strategy=self.store.count_strategy.value if include_count else None,
+            after=after,
+            before=before,
+            limit=limit,
+        )
+
+        if link_provider:
+            payload["_links"] = link_provider(
+                next_cursor=self.store.cursor_for(items[-1]) if has_next and items else None,
+                prev_cursor=self.store.cursor_for(items[0]) if has_prev and items else None,
+            )
 
+        if fields:
+            return sparse_response(sparse_search_schema(fields.schema, cursor=True), payload)
         return payload
 
+    async def _search_stream(
+        self,
+        item_schema: BaseModel,
+        media_type: str = NDJSON_MEDIA_TYPE,
+        fields: Optional[SparseFields] = None,
+        **kwargs
+    ):
+        """
+        Stream the search results, encoded as they are fetched from the database.
+
+        Serves `application/x-ndjson` by default, or an incrementally encoded
+        json array for `application/json`. You can do this via a route definition
+        that looks like:
+
+        def search(self, toppings: Optional[str] = None) -> List[PizzaSchema]:
+            return await super()._search_stream(PizzaSchema, toppings=toppings)
+
+        Rows after the first are read once the route returns, so the stream does not
+        join the route's unit of work; it does run within the route's context (e.g. its
+        loader options, named pool and query guard).
+
+        """
+        if fields:
+            item_schema = fields.schema
+            kwargs["fields"] = fields.names
+
+        encode = ENCODERS[media_type]
+        items = await started(self.store.stream(**kwargs))
+        return StreamingResponse(
+            RouteContext.current().iterate(encode(items, item_schema)),
+            media_type=media_type,
+        )
+
+    async def _export(self, format: CopyFormat = CopyFormat.CSV, **kwargs):
+        """
+        Stream the search results as encoded by the database, in CSV or NDJSON.
+
+        Rows skip model loading and serialization altogether, so the columns are the
+        table's rather than a schema's. You can do this via a route definition that
+        looks like:
+
+        def export(self, format: CopyFormat = CopyFormat.CSV, toppings: Optional[str] = None):
+            return await super()._export(format=format, toppings=toppings)
+
+        As with `_search_stream`, rows are read once the route returns, within its context.
+
+        """
+        format = CopyFormat(format)
+        chunks = await started(self.store.copy_out(format=format, **kwargs))
+        return StreamingResponse(
+            RouteContext.current().iterate(chunks),
+            media_type=EXPORT_MEDIA_TYPES[format],
+        )
+
     async def _count(
         self,
         offset: Optional[int] = None,
@@ -1,10 +1,20 @@
+from asyncio import gather, iscoroutinefunction
+from itertools import chain
+from typing import Dict
+
+from starlette.concurrency import run_in_threadpool
+
+from microcosm_fastapi.conventions.build_info.models import BuildInfo
 from microcosm_fastapi.conventions.health.resources import HealthResultSchema, HealthSchema
+from microcosm_fastapi.database.health import check_health_async
+from microcosm_fastapi.errors import ParsedException
 
 
 class HealthResult:
-    def __init__(self, error=None, result=None):
+    def __init__(self, error=None, result=None, details=None):
         self.error = error
         self.result = result or "ok"
+        self.details = details
 
     def __nonzero__(self):
         return self.error is None
@@ -19,15 +29,31 @@ class HealthResult:
         return HealthResultSchema(
             ok=bool(self),
             message=str(self),
+            details=self.details,
         )
 
     @classmethod
-    def evaluate(cls, func, graph) -> "HealthResult":
+    async def evaluate(cls, func, graph) -> "HealthResult":
+        """
+        Evaluate a check; coroutine functions are awaited, others run in a thread.
+
+        Checks returning a dict report it as the result's details.
+
+        """
         try:
-            result = func(graph)
-            return cls(result=result)
+            if iscoroutinefunction(func):
+                result = await func(graph)
+            else:
+                result = await run_in_threadpool(func, graph)
         except Exception as error:
-            return cls(error=extract_error_message(error))
+            return cls(
+                error=ParsedException(error).error_message,
+                details=getattr(error, "details", None),
+            )
+
+        if isinstance(result, dict):
+            return cls(details=result)
+        return cls(result=result)
 
 
 class Health:
@@ -37,7 +63,7 @@ class Health:
     current object graph as input.
     The overall health is OK if all checks are OK.
     """
-    def __init__(self, graph, include_build_info=True):
+    def __init__(self, graph, include_build_info=True, include_postgres=False):
         self.graph = graph
         self.name = graph.metadata.name
         self.optional_checks = dict()
@@ -49,19 +75,28 @@ class Health:
                 sha1=BuildInfo.check_sha1,
             ))
 
-    def to_object(self, full=None) -> HealthSchema:
+        if include_postgres:
+            self.checks.update(dict(
+                postgres=check_health_async,
+            ))
+
+    async def to_object(self, full=None) -> HealthSchema:
         """
         Encode the name, the status of all checks, and the current overall status.
         """
         if full:
-            checks = chain(self.checks.items(), self.optional_checks.items())
+            checks = list(chain(self.checks.items(), self.optional_checks.items()))
         else:
-            checks = self.checks.items()
+            checks = list(self.checks.items())
 
         # evaluate checks
+        results = await gather(*(
+            HealthResult.evaluate(func, self.graph)
+            for _, func in checks
+        ))
         check_results: Dict[str, HealthResult] = {
-            key: HealthResult.evaluate(func, self.graph)
-            for key, func in checks
+            key: result
+            for (key, _), result in zip(checks, results)
         }
 
         health = HealthSchema(
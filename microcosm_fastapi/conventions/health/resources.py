@@ -1,14 +1,15 @@
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 from microcosm_fastapi.conventions.schemas import BaseSchema
 
 
 class HealthResultSchema(BaseSchema):
     message: str
-    ok: str
+    ok: bool
+    details: Optional[Dict[str, Any]]
 
 
 class HealthSchema(BaseSchema):
     name: str
-    ok: str
+    ok: bool
     checks: Optional[Dict[str, HealthResultSchema]]
@@ -1,3 +1,4 @@
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from microcosm.api import defaults, typed
 
@@ -7,20 +8,29 @@ from microcosm_fastapi.conventions.health.resources import HealthSchema
 
 @defaults(
     include_build_info=typed(bool, default=True),
+    # seconds; timeout of the `postgres` check
+    postgres_timeout=typed(float, default_value=1.0),
 )
 def configure_health(graph):
     """
     Mount the health endpoint to the graph
 
+    Graphs that use `postgres_async` (before this convention) include a `postgres`
+    check, reporting the connection pool's statistics.
+
     """
-    health_container = Health(graph, graph.config.health_convention.include_build_info)
+    health_container = Health(
+        graph,
+        graph.config.health_convention.include_build_info,
+        include_postgres=graph.get("postgres_async") is not None,
+    )
 
     @graph.app.get("/api/health")
-    def configure_health_endpoint(full: bool = False) -> HealthSchema:
-        response_data = health_container.to_object(full=full)
+    async def configure_health_endpoint(full: bool = False) -> HealthSchema:
+        response_data = await health_container.to_object(full=full)
 
         if not response_data.ok:
-            raise JSONResponse(503, content=response_data)
+            return JSONResponse(status_code=503, content=jsonable_encoder(response_data, by_alias=True))
 
         return response_data
 
@@ -74,13 +74,13 @@ def configure_landing(graph):   # noqa: C901
         return links
 
     @graph.app.get("/")
-    def render_landing_page():
+    async def render_landing_page():
         """
         Render landing page
         """
         config = graph.config_convention.to_dict()
         env = get_env_file_commands(config, graph.metadata.name)
-        health = graph.health_convention.to_object().dict()
+        health = (await graph.health_convention.to_object()).dict()
         properties = get_properties_and_version()
         swagger_versions = get_swagger_versions()
 
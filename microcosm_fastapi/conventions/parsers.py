@@ -1,12 +1,23 @@
+from inspect import Parameter, Signature
 from typing import (
     Any,
+    Dict,
+    FrozenSet,
     List,
+    NamedTuple,
     Optional,
+    Sequence,
+    Type,
     no_type_check,
 )
 
-from fastapi import Request
+from fastapi import Query, Request
+from pydantic import BaseModel, ValidationError, parse_obj_as
 from pydantic.validators import str_validator
+from microcosm_fastapi.conventions.schemas import FieldsSchema
+from microcosm_fastapi.database.filters import FilterOperator, as_auto_filter
+from microcosm_fastapi.database.guards import clamp_limit
+from microcosm_fastapi.errors import ClientError
 from microcosm_fastapi.operations import Operation
 from microcosm_fastapi.naming import join_url_with_parameters
 
@@ -28,35 +39,196 @@ class SeparatedList(str):
         return value.split(cls.separator)
 
 
+class InvalidFieldsError(ClientError):
+    """
+    A sparse fieldset named fields that the resource does not have.
+
+    """
+
+
+class InvalidFiltersError(ClientError):
+    """
+    A filter value could not be parsed as the type of its field.
+
+    """
+
+
+class SparseFields(NamedTuple):
+    # The (python) field names to include
+    names: FrozenSet[str]
+    # The item schema trimmed to these fields
+    schema: Type[BaseModel]
+
+
+def FieldsParser(item_class: Type[BaseModel]):
+    """
+    Parse a `fields` query parameter into a sparse fieldset of an item schema.
+
+    Fields may be named by their (camel case) alias or by their field name.
+
+    """
+    names_by_alias = dict()
+    for name, model_field in item_class.__fields__.items():
+        names_by_alias[name] = name
+        names_by_alias[model_field.alias] = name
+
+    def parse_fields(
+        fields: Optional[SeparatedList] = Query(
+            None,
+            description="Comma separated fields to include; defaults to every field",
+        ),
+    ) -> Optional[SparseFields]:
+        fields = [field.strip() for field in fields or () if field.strip()]
+        if not fields:
+            return None
+
+        unknown = [field for field in fields if field not in names_by_alias]
+        if unknown:
+            raise InvalidFieldsError("Unknown fields: {}".format(", ".join(unknown)))
+
+        names = frozenset(names_by_alias[field] for field in fields)
+        return SparseFields(names=names, schema=FieldsSchema(item_class, names))
+
+    return parse_fields
+
+
+FILTER_DESCRIPTIONS = {
+    FilterOperator.EQ: "Equal to",
+    FilterOperator.IN: "Comma separated values, any of which",
+    FilterOperator.GTE: "Greater than or equal to",
+    FilterOperator.LTE: "Less than or equal to",
+    FilterOperator.LT: "Less than",
+    FilterOperator.GT: "Greater than",
+    FilterOperator.PREFIX: "Starting with",
+    FilterOperator.ISNULL: "Whether null",
+}
+
+
+def FiltersParser(auto_filter_fields: Sequence):
+    """
+    Parse the query parameters of a store's `auto_filter_fields` (see
+    `microcosm_fastapi.database.filters:AutoFilter`) into search arguments.
+
+    Each field operator is declared as a query parameter, and so documented.
+
+    """
+    auto_filters = [as_auto_filter(field) for field in auto_filter_fields]
+    types = dict()
+    parameters = []
+    for auto_filter in auto_filters:
+        for key, operator in auto_filter.keys().items():
+            types[key] = (operator, auto_filter.python_type)
+            if operator == FilterOperator.IN:
+                annotation = SeparatedList
+            elif operator == FilterOperator.ISNULL:
+                annotation = bool
+            elif operator == FilterOperator.PREFIX:
+                annotation = str
+            else:
+                annotation = auto_filter.python_type
+            parameters.append(Parameter(
+                key,
+                Parameter.KEYWORD_ONLY,
+                default=Query(None, description=f"{FILTER_DESCRIPTIONS[operator]} {auto_filter.name}"),
+                annotation=Optional[annotation],
+            ))
+
+    def parse_filters(**kwargs) -> Dict[str, Any]:
+        filters = dict()
+        for key, value in kwargs.items():
+            if value is None:
+                continue
+            operator, python_type = types[key]
+            if operator == FilterOperator.IN:
+                try:
+                    value = parse_obj_as(List[python_type], [item.strip() for item in value])
+                except ValidationError:
+                    raise InvalidFiltersError(f"Invalid {key}: {','.join(value)}")
+            filters[key] = value
+        return filters
+
+    # FastAPI declares the parameters of a dependency from its signature
+    parse_filters.__signature__ = Signature(parameters)
+    return parse_filters
+
+
 def LinkProvider(request: Request, offset: int = 0, limit: int = 20):
     """
     Parse the URL so we are able to create a paginated links record that's relative
     to the current location.
 
     """
-    def CreateLinks(total_count):
+    def CreateLinks(total_count: Optional[int], has_next: bool = False):
+        """
+        :param has_next: whether there is a next page, when the total count was skipped
+
+        """
+        # NB: the route may clamp the requested page size
+        page_limit = clamp_limit(limit)
+        links_payload = dict(
+            self=dict(
+                href=join_url_with_parameters(
+                    str(request.url),
+                    dict(offset=offset, limit=page_limit)
+                )
+            )
+        )
+
+        if offset - page_limit >= 0:
+            links_payload["prev"] = dict(
+                href=join_url_with_parameters(
+                    str(request.url),
+                    dict(offset=offset-page_limit, limit=page_limit)
+                )
+            )
+
+        if total_count is not None:
+            has_next = offset + page_limit < total_count
+
+        if has_next:
+            links_payload["next"] = dict(
+                href=join_url_with_parameters(
+                    str(request.url),
+                    dict(offset=offset+page_limit, limit=page_limit)
+                )
+            )
+
+        return links_payload
+
+    return CreateLinks
+
+
+def CursorLinkProvider(request: Request, limit: int = 20):
+    """
+    Parse the URL so we are able to create a paginated links record that seeks
+    with `after`/`before` cursors rather than offsets.
+
+    """
+    def CreateLinks(next_cursor: Optional[str] = None, prev_cursor: Optional[str] = None):
+        # NB: the route may clamp the requested page size
+        page_limit = clamp_limit(limit)
         links_payload = dict(
             self=dict(
                 href=join_url_with_parameters(
                     str(request.url),
-                    dict(offset=offset, limit=limit)
+                    dict(limit=page_limit)
                 )
             )
         )
 
-        if offset - limit >= 0:
+        if prev_cursor is not None:
             links_payload["prev"] = dict(
                 href=join_url_with_parameters(
                     str(request.url),
-                    dict(offset=offset-limit, limit=limit)
+                    dict(after=None, before=prev_cursor, limit=page_limit)
                 )
             )
 
-        if offset + limit <= total_count:
+        if next_cursor is not None:
             links_payload["next"] = dict(
                 href=join_url_with_parameters(
                     str(request.url),
-                    dict(offset=offset+limit, limit=limit)
+                    dict(after=next_cursor, before=None, limit=page_limit)
                 )
             )
 
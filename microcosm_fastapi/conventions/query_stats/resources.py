@@ -0,0 +1,19 @@
+from typing import List
+
+from microcosm_fastapi.conventions.schemas import BaseSchema
+
+
+class QueryFingerprintSchema(BaseSchema):
+    fingerprint: str
+    statement: str
+    calls: int
+    total_time: float
+    mean_time: float
+    p95_time: float
+    p99_time: float
+    rows: int
+
+
+class QueryStatsSchema(BaseSchema):
+    queries: List[QueryFingerprintSchema]
+    untracked_calls: int
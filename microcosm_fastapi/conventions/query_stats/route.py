@@ -0,0 +1,26 @@
+from http import HTTPStatus
+
+from fastapi.responses import Response
+
+from microcosm_fastapi.conventions.query_stats.resources import QueryStatsSchema
+
+
+def configure_query_stats(graph):
+    """
+    Configure the query statistics (debug) endpoint.
+
+    `DELETE` resets the statistics, e.g. before a load test.
+
+    """
+    query_fingerprints = graph.query_fingerprints
+
+    @graph.app.get("/api/debug/queries")
+    def configure_query_stats_endpoint() -> QueryStatsSchema:
+        return QueryStatsSchema(**query_fingerprints.to_dict())
+
+    @graph.app.delete("/api/debug/queries", status_code=HTTPStatus.NO_CONTENT.value)
+    def configure_query_stats_reset_endpoint():
+        query_fingerprints.reset()
+        return Response(status_code=HTTPStatus.NO_CONTENT.value)
+
+    return query_fingerprints
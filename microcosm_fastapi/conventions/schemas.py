@@ -1,7 +1,8 @@
-from typing import Any, Dict, List, Optional, Type
+from typing import Any, Dict, FrozenSet, List, Optional, Type
 from enum import Enum
+from functools import lru_cache
 
-from pydantic import BaseModel as BaseModel, AnyHttpUrl, Field
+from pydantic import BaseModel as BaseModel, AnyHttpUrl, Field, create_model
 
 from microcosm_fastapi.naming import to_camel
 
@@ -61,11 +62,12 @@ class BaseSchema(EnhancedBaseModel):
             Pydantic hook to post process the json schema output.
 
             """
-            for field_name, model_field in model.__fields__.items():
+            for model_field in model.__fields__.values():
                 if model_field.type_ == float:
                     # We need to add the format `float` value to fit with existing microcosm conventions
                     # The format `float` is used when converting from a V3 openapi spec -> V2
-                    schema['properties'][f'{field_name}']['format'] = 'float'
+                    # NB: properties are named by their (camel case) alias
+                    schema['properties'][model_field.alias]['format'] = 'float'
 
 
 class HrefSchema(EnhancedBaseModel):
@@ -82,16 +84,51 @@ class LinksSchema(EnhancedBaseModel):
         return BaseModel.dict(self, *args, exclude_none=True, **kwargs)
 
 
-def SearchSchema(item_class):
+@lru_cache(maxsize=None)
+def FieldsSchema(item_class, fields: FrozenSet[str]):
+    """
+    Build a trimmed copy of an item schema, with only some of its fields.
+
+    """
+    return create_model(
+        item_class.__name__ + "Fields",
+        __config__=item_class.__config__,
+        **{
+            name: (model_field.annotation, model_field.field_info)
+            for name, model_field in item_class.__fields__.items()
+            if name in fields
+        },
+    )
+
+
+def SearchSchema(item_class, cursor=False):
+    """
+    Build the paginated list schema for an item schema.
+
+    Offset pagination echoes the `offset`; cursor (keyset) pagination echoes
+    the `after`/`before` cursors instead.
+
+    """
     class _SearchSchema(EnhancedBaseModel):
         links: Optional[LinksSchema] = Field(alias="_links")
-        count: int
+        # Omitted when the client skips counting
+        count: Optional[int]
+        # How the count was computed: "exact", "estimate" (approximate) or "cached"
+        count_strategy: Optional[str]
         items: List[item_class]
-        offset: int
-        limit: int
 
         __config__ = item_class.__config__
 
-    _SearchSchema.__name__ = item_class.__name__ + "List"
+    if cursor:
+        class _PageSchema(_SearchSchema):
+            after: Optional[str]
+            before: Optional[str]
+            limit: int
+    else:
+        class _PageSchema(_SearchSchema):
+            offset: int
+            limit: int
+
+    _PageSchema.__name__ = item_class.__name__ + ("CursorList" if cursor else "List")
 
-    return _SearchSchema
+    return _PageSchema
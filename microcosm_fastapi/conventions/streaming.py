@@ -0,0 +1,103 @@
+"""
+Incremental encoding of (search) results.
+
+Streaming responses serialize models as they are fetched instead of materializing
+a whole page, so memory stays flat no matter how many rows come back.
+
+"""
+from typing import AsyncIterator, Type
+
+from pydantic import BaseModel
+
+from microcosm_fastapi.database.copying import CopyFormat
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+JSON_MEDIA_TYPE = "application/json"
+CSV_MEDIA_TYPE = "text/csv"
+
+# Encoded items per chunk written to the response
+DEFAULT_STREAM_CHUNK_SIZE = 100
+
+
+async def started(items: AsyncIterator) -> AsyncIterator:
+    """
+    Fetch the first item of an async iterator, returning an iterator over all its items.
+
+    A response's status is sent before its body: starting a stream in its route raises
+    its early errors (e.g. of query guards) with the route.
+
+    """
+    try:
+        first = await items.__anext__()
+    except StopAsyncIteration:
+        return items
+    return chain(first, items)
+
+
+async def chain(first, items: AsyncIterator) -> AsyncIterator:
+    try:
+        yield first
+        async for item in items:
+            yield item
+    finally:
+        await items.aclose()
+
+
+async def encode_batches(
+    items: AsyncIterator,
+    item_schema: Type[BaseModel],
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+) -> AsyncIterator[list]:
+    batch = []
+    async for item in items:
+        batch.append(item_schema.from_orm(item).json(by_alias=True))
+        if len(batch) >= chunk_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+async def encode_ndjson(
+    items: AsyncIterator,
+    item_schema: Type[BaseModel],
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+) -> AsyncIterator[str]:
+    """
+    Encode items as newline delimited json, one item per line.
+
+    """
+    async for batch in encode_batches(items, item_schema, chunk_size):
+        yield "\n".join(batch) + "\n"
+
+
+async def encode_json_array(
+    items: AsyncIterator,
+    item_schema: Type[BaseModel],
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+) -> AsyncIterator[str]:
+    """
+    Encode items as a json array, written incrementally.
+
+    """
+    separator = "["
+    async for batch in encode_batches(items, item_schema, chunk_size):
+        yield separator + ",".join(batch)
+        separator = ","
+
+    yield "[]" if separator == "[" else "]"
+
+
+ENCODERS = {
+    NDJSON_MEDIA_TYPE: encode_ndjson,
+    JSON_MEDIA_TYPE: encode_json_array,
+}
+
+
+# Exports are encoded by the database (see `StoreAsync.copy_out`)
+EXPORT_MEDIA_TYPES = {
+    CopyFormat.CSV: CSV_MEDIA_TYPE,
+    CopyFormat.NDJSON: NDJSON_MEDIA_TYPE,
+}
@@ -0,0 +1,80 @@
+"""
+Batch loading for async stores.
+
+Concurrent lookups by key are collected over a short window (by default, until
+the current event loop iteration completes) and resolved with a single query, in
+the manner of a DataLoader.
+
+"""
+from asyncio import ensure_future, get_running_loop, shield
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+
+DEFAULT_MAX_BATCH_SIZE = 1000
+
+
+class BatchLoader:
+    """
+    Collect keys and resolve them together with `load_many`.
+
+    `load_many` receives a list of distinct keys and returns the values it found
+    by key; waiters on keys that are not found get the exception from `missing`.
+
+    """
+    def __init__(
+        self,
+        load_many: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+        missing: Callable[[Hashable], Exception] = KeyError,
+        window: float = 0.0,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    ):
+        self.load_many = load_many
+        self.missing = missing
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.pending = dict()
+        self.handle = None
+
+    async def load(self, key: Hashable) -> Any:
+        future = self.pending.get(key)
+        if future is None:
+            loop = get_running_loop()
+            future = self.pending[key] = loop.create_future()
+
+            if len(self.pending) >= self.max_batch_size:
+                self.dispatch()
+            elif self.handle is None:
+                self.handle = (
+                    loop.call_later(self.window, self.dispatch)
+                    if self.window
+                    else loop.call_soon(self.dispatch)
+                )
+
+        # Waiters on the same key share a future; one being cancelled must not cancel the rest
+        return await shield(future)
+
+    def dispatch(self) -> None:
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+
+        batch, self.pending = self.pending, dict()
+        if batch:
+            ensure_future(self.resolve(batch))
+
+    async def resolve(self, batch: Dict[Hashable, Any]) -> None:
+        try:
+            values = await self.load_many(list(batch))
+        except Exception as error:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for key, future in batch.items():
+            if future.done():
+                continue
+            if key in values:
+                future.set_result(values[key])
+            else:
+                future.set_exception(self.missing(key))
@@ -0,0 +1,121 @@
+"""
+Retrieve caching for async stores.
+
+Hot rows are memoized in-process as plain column values, keyed by the (compiled)
+retrieve criteria. Entries expire after a time-to-live, the least recently used
+entries are evicted first, and concurrent misses for the same key share a single
+query.
+
+"""
+from asyncio import ensure_future, shield
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+DEFAULT_RETRIEVE_CACHE_SIZE = 1024
+
+
+class RetrieveCache:
+    """
+    A bounded LRU cache of row snapshots with a per-entry time-to-live.
+
+    Loaders return an `(identifier, snapshot)` pair; the identifier is what writes
+    invalidate, so every key that resolved to a row is dropped when the row changes.
+
+    """
+    def __init__(self, ttl: float, max_size: int = DEFAULT_RETRIEVE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.keys_by_identifier = dict()
+        self.loading = dict()
+        # Bumped on every invalidation, so that loads racing a write are not cached
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            size=len(self.entries),
+        )
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Tuple[Any, dict]]],
+    ) -> dict:
+        """
+        Return the cached snapshot for a key, loading it at most once at a time.
+
+        The load runs in its own task so that cancelling one caller does not fail
+        the others waiting on it.
+
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, _, snapshot = entry
+            if expires_at > monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return snapshot
+            self.pop(key)
+
+        self.misses += 1
+        task = self.loading.get(key)
+        if task is None:
+            task = self.loading[key] = ensure_future(loader())
+            task.add_done_callback(
+                lambda task, generation=self.generation: self.loaded(key, task, generation),
+            )
+
+        _, snapshot = await shield(task)
+        return snapshot
+
+    def loaded(self, key, task, generation) -> None:
+        self.loading.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        if generation != self.generation:
+            # The row may have changed while it was being loaded
+            return
+
+        identifier, snapshot = task.result()
+        self.set(key, identifier, snapshot)
+
+    def set(self, key: Hashable, identifier, snapshot: dict) -> None:
+        self.pop(key)
+        while len(self.entries) >= self.max_size:
+            self.pop(next(iter(self.entries)))
+            self.evictions += 1
+
+        self.entries[key] = (monotonic() + self.ttl, identifier, snapshot)
+        self.keys_by_identifier.setdefault(identifier, set()).add(key)
+
+    def pop(self, key: Hashable) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+
+        _, identifier, _ = entry
+        keys = self.keys_by_identifier.get(identifier)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.keys_by_identifier[identifier]
+
+    def invalidate(self, *identifiers) -> None:
+        self.generation += 1
+        for identifier in identifiers:
+            for key in list(self.keys_by_identifier.get(identifier, ())):
+                self.pop(key)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self.entries.clear()
+        self.keys_by_identifier.clear()
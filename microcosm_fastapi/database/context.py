@@ -0,0 +1,143 @@
+"""
+Session context management for async stores.
+
+A unit of work binds one `AsyncSession` per session maker to the current task
+(via a contextvar) so that every `StoreAsync` call made within a request or chain
+reuses the same connection and commits exactly once.
+
+Like its `AsyncSession`, a unit of work may not be used concurrently: tasks started
+within it (e.g. by `asyncio.gather`) inherit it, so their store calls must be awaited
+one at a time.
+
+"""
+from asyncio import current_task
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class SessionContextAsync:
+    """
+    Save the sessions opened by the current unit of work in a well-known location.
+
+    Sessions are opened lazily, on first use by a store, so a unit of work that
+    never touches the database never checks out a connection.
+
+    """
+    current_context: ContextVar = ContextVar("session_context_async", default=None)
+
+    def __init__(self):
+        self.sessions = dict()
+        # Whether a store has written within this unit of work
+        self.written = False
+        self.after_commit_callbacks = []
+        # The task using each session, and how many (nested) times
+        self.users = dict()
+
+    @classmethod
+    def current(cls) -> Optional["SessionContextAsync"]:
+        return cls.current_context.get()
+
+    def session_for(self, session_maker) -> AsyncSession:
+        """
+        Return the session for this session maker, opening it if needed.
+
+        """
+        session = self.sessions.get(session_maker)
+        if session is None:
+            session = self.sessions[session_maker] = session_maker()
+        return session
+
+    @contextmanager
+    def using(self, session):
+        """
+        Mark a session as in use by the current task, e.g. while a store awaits its statements.
+
+        :raises `RuntimeError` if another task is using the session
+
+        """
+        task = current_task()
+        user, depth = self.users.get(session, (task, 0))
+        if user is not task:
+            raise RuntimeError(
+                "A unit of work's session may not be used concurrently; await its store calls one at a time",
+            )
+
+        self.users[session] = (task, depth + 1)
+        try:
+            yield session
+        finally:
+            if depth:
+                self.users[session] = (task, depth)
+            else:
+                del self.users[session]
+
+    def after_commit(self, callback):
+        """
+        Register a callback to run once this unit of work has committed.
+
+        """
+        if callback not in self.after_commit_callbacks:
+            self.after_commit_callbacks.append(callback)
+
+    async def commit(self):
+        for session in self.sessions.values():
+            await session.commit()
+        for callback in self.after_commit_callbacks:
+            callback()
+
+    async def rollback(self):
+        for session in self.sessions.values():
+            await session.rollback()
+
+    async def close(self):
+        for session in self.sessions.values():
+            await session.close()
+        self.sessions.clear()
+
+
+@asynccontextmanager
+async def transaction_async(commit=True):
+    """
+    Wrap a context with a unit of work that commits (or rolls back) once on exit.
+
+    Nested transactions join the outermost unit of work, which owns the commit.
+
+    """
+    context = SessionContextAsync.current()
+    if context is not None:
+        yield context
+        return
+
+    context = SessionContextAsync()
+    token = SessionContextAsync.current_context.set(context)
+    try:
+        yield context
+        if commit:
+            await context.commit()
+        else:
+            await context.rollback()
+    except Exception:
+        await context.rollback()
+        raise
+    finally:
+        await context.close()
+        SessionContextAsync.current_context.reset(token)
+
+
+def transactional_async(func):
+    """
+    Decorate a coroutine function with a unit of work.
+
+    The wrapped signature is preserved so the decorator can be applied to routes
+    passed to `configure_crud` as well as to chain links and daemon handlers.
+
+    """
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        async with transaction_async():
+            return await func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,153 @@
+"""
+COPY support for async stores.
+
+Bulk imports and exports go through asyncpg's COPY protocol on the session's own
+connection (and so within its transaction), rather than through statements.
+
+"""
+from asyncio import Event, Queue, ensure_future, gather
+from enum import Enum
+from typing import AsyncIterator, List, Tuple
+
+from sqlalchemy import text
+
+
+# Output chunks buffered between a COPY and its consumer
+COPY_QUEUE_SIZE = 16
+
+
+class CopyFormat(Enum):
+    # With a header row
+    CSV = "csv"
+    # One json object per row, keyed by column name
+    NDJSON = "ndjson"
+
+
+async def driver_connection(session):
+    """
+    Return the asyncpg connection underlying an (async) session.
+
+    """
+    connection = await session.connection()
+    # NB: the asyncpg adapter only begins its transaction with the first statement;
+    # begin it now, so that COPY runs within the session's transaction
+    await connection.execute(text("SELECT 1"))
+    raw_connection = await connection.get_raw_connection()
+    return raw_connection.driver_connection
+
+
+async def iterate(records):
+    """
+    Iterate over an iterable or an async iterable.
+
+    """
+    if hasattr(records, "__aiter__"):
+        async for record in records:
+            yield record
+    else:
+        for record in records:
+            yield record
+
+
+def bind_processors(columns, dialect):
+    """
+    Return the functions that convert Python values to the driver's, per column (or
+    bind parameter).
+
+    COPY bypasses statement execution, so that e.g. type decorators must be applied here.
+
+    """
+    return [
+        column.type.dialect_impl(dialect).bind_processor(dialect)
+        for column in columns
+    ]
+
+
+def process_row(values, processors):
+    return tuple(
+        value if processor is None else processor(value)
+        for value, processor in zip(values, processors)
+    )
+
+
+def copied_rows(status: str) -> int:
+    """
+    Parse the number of rows from a command status, e.g. `COPY 42` or `INSERT 0 42`.
+
+    """
+    return int(status.split()[-1])
+
+
+def compile_query(query, dialect) -> Tuple[str, List]:
+    """
+    Compile a query to a statement with (asyncpg's) positional parameters.
+
+    """
+    compiled = query.compile(dialect=dialect, compile_kwargs=dict(render_postcompile=True))
+    names = compiled.positiontup or []
+    parameters = process_row(
+        (compiled.params[name] for name in names),
+        bind_processors((compiled.binds[name] for name in names), dialect),
+    )
+    # NB: also unescapes the statement's literal `%`
+    statement = compiled.string % tuple(f"${index}" for index in range(1, len(names) + 1))
+    return statement, list(parameters)
+
+
+def copy_statement(statement: str, format: CopyFormat) -> Tuple[str, dict]:
+    """
+    Return the query to COPY, and the COPY options, for an output format.
+
+    """
+    if format == CopyFormat.NDJSON:
+        # Postgres encodes the json; CSV quote and delimiter characters that json
+        # escapes leave it unquoted
+        return (
+            f"SELECT row_to_json(export) FROM ({statement}) AS export",
+            dict(format="csv", quote="\x01", delimiter="\x02"),
+        )
+    return statement, dict(format="csv", header=True)
+
+
+async def copy_from_query(session, statement: str, parameters, format: CopyFormat) -> AsyncIterator[bytes]:
+    """
+    Yield the output of a `COPY (query) TO STDOUT` on a session's connection, as the
+    database sends it.
+
+    The COPY is paused while the consumer lags behind, so memory stays flat.
+
+    """
+    connection = await driver_connection(session)
+    statement, options = copy_statement(statement, format)
+    chunks = Queue(maxsize=COPY_QUEUE_SIZE)
+    stopped = Event()
+
+    async def write(data):
+        # NB: the driver may reuse its buffer
+        await chunks.put(bytes(data))
+
+    async def copy():
+        try:
+            await connection.copy_from_query(statement, *parameters, output=write, **options)
+        finally:
+            # Once the consumer stops, nothing drains the (possibly full) queue
+            if not stopped.is_set():
+                await chunks.put(None)
+
+    task = ensure_future(copy())
+    try:
+        while True:
+            chunk = await chunks.get()
+            if chunk is None:
+                break
+            yield chunk
+        # Raise errors of the COPY, if any
+        await task
+    finally:
+        if not task.done():
+            # The consumer stopped early (e.g. the client went away); an interrupted
+            # COPY leaves the connection mid-protocol, so it is discarded
+            stopped.set()
+            task.cancel()
+            await gather(task, return_exceptions=True)
+            await (await session.connection()).invalidate()
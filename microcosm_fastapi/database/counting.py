@@ -0,0 +1,56 @@
+"""
+Count strategies for async stores.
+
+An exact `COUNT(*)` must visit every matching row, which dominates search latency
+on very large tables. Stores may instead report planner estimates, or memoize
+exact counts for a short time.
+
+"""
+from enum import Enum
+from time import monotonic
+from typing import Hashable, Optional
+
+
+DEFAULT_COUNT_CACHE_TTL = 60.0
+DEFAULT_COUNT_CACHE_SIZE = 1024
+
+
+class CountStrategy(Enum):
+    # `COUNT(*)` over the filtered query
+    EXACT = "exact"
+    # `pg_class.reltuples` when unfiltered, the `EXPLAIN` row estimate otherwise
+    ESTIMATE = "estimate"
+    # Exact counts memoized per filter set, until they expire or the store writes
+    CACHED = "cached"
+
+
+class CountCache:
+    """
+    Memoize counts per (normalized) query with a time-to-live.
+
+    """
+    def __init__(self, ttl=DEFAULT_COUNT_CACHE_TTL, max_size=DEFAULT_COUNT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = dict()
+
+    def get(self, key: Hashable) -> Optional[int]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, count = entry
+        if expires_at <= monotonic():
+            self.entries.pop(key, None)
+            return None
+        return count
+
+    def set(self, key: Hashable, count: int) -> None:
+        self.entries.pop(key, None)
+        if len(self.entries) >= self.max_size:
+            # Evict the oldest entry; dicts preserve insertion order
+            self.entries.pop(next(iter(self.entries)))
+        self.entries[key] = (monotonic() + self.ttl, count)
+
+    def clear(self) -> None:
+        self.entries.clear()
@@ -79,7 +79,7 @@ class EncryptableStoreAsync(StoreAsync):
         return self.model_class(**values)
 
     async def search_encrypted_ids(self, context_id):
-        async with self.session_maker() as session:
+        async with self.with_session() as session:
             query = select(
                 self.model_class.id
             ).where(
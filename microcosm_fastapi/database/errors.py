@@ -0,0 +1,15 @@
+"""
+Persistence errors raised by async stores.
+
+Like `microcosm_postgres.errors`, errors define a `status_code` for translation
+to HTTP but are not coupled with any HTTP library.
+
+"""
+from microcosm_fastapi.errors import ClientError
+
+
+class InvalidCursorError(ClientError):
+    """
+    A pagination cursor could not be decoded or does not match the store's keyset.
+
+    """
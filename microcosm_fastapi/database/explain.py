@@ -0,0 +1,44 @@
+"""
+Support for asking the Postgres planner about a query.
+
+"""
+from json import loads
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+class Explain(Executable, ClauseElement):
+    """
+    An `EXPLAIN (<options>) <statement>` construct.
+
+    Bind parameters of the wrapped statement are passed through, so the plan
+    is computed for the same values the statement would run with.
+
+    """
+    inherit_cache = False
+
+    def __init__(self, statement, *options):
+        self.statement = statement
+        self.options = options or ("FORMAT JSON",)
+
+
+@compiles(Explain, "postgresql")
+def visit_explain(element, compiler, **kwargs):
+    return "EXPLAIN ({}) {}".format(
+        ", ".join(element.options),
+        compiler.process(element.statement, **kwargs),
+    )
+
+
+async def explain(session, statement, *options):
+    """
+    Return the JSON plan of a statement.
+
+    """
+    result = await session.execute(Explain(statement, *options))
+    plan = result.scalar()
+    # Depending on the driver, json values may not be decoded
+    if isinstance(plan, str):
+        plan = loads(plan)
+    return plan[0]
@@ -0,0 +1,122 @@
+"""
+Auto filters for async stores.
+
+Stores filter searches and counts on their `auto_filter_fields` by equality. Fields
+declared as an `AutoFilter` also accept the operators they list, each through a
+`<field>__<operator>` argument:
+
+    AutoFilter(Pizza.created_at, FilterOperator.GTE, FilterOperator.LT)
+
+filters on `created_at`, `created_at__gte` and `created_at__lt`. Each operator
+translates to a single (indexable) predicate on the column.
+
+"""
+from enum import Enum
+from typing import Any, Dict, Tuple
+
+
+OPERATOR_SEPARATOR = "__"
+LIKE_ESCAPE = "/"
+
+
+class FilterOperator(Enum):
+    # field == value
+    EQ = "eq"
+    # field IN (values)
+    IN = "in"
+    GTE = "gte"
+    LTE = "lte"
+    LT = "lt"
+    GT = "gt"
+    # field LIKE 'value%'; indexable with a `text_pattern_ops` (or "C" collation) index
+    PREFIX = "prefix"
+    # field IS NULL (or, when false, IS NOT NULL)
+    ISNULL = "isnull"
+
+
+class AutoFilter:
+    def __init__(self, column, *operators):
+        self.column = column
+        # Equality is always supported
+        self.operators: Tuple[FilterOperator, ...] = (FilterOperator.EQ,) + tuple(
+            FilterOperator(operator)
+            for operator in operators
+            if FilterOperator(operator) != FilterOperator.EQ
+        )
+
+    @property
+    def name(self) -> str:
+        return self.column.name
+
+    @property
+    def python_type(self) -> type:
+        column_type = self.column.type
+        # Type decorators (e.g. `UTCDateTime`) may only know the type they decorate
+        for candidate in (column_type, getattr(column_type, "impl", None)):
+            try:
+                return candidate.python_type
+            except (AttributeError, NotImplementedError):
+                continue
+        return str
+
+    def keys(self) -> Dict[str, FilterOperator]:
+        """
+        The (search) argument names of this filter's operators.
+
+        """
+        return {
+            filter_key(self.name, operator): operator
+            for operator in self.operators
+        }
+
+    def clause(self, operator: FilterOperator, value: Any):
+        if operator == FilterOperator.IN:
+            return self.column.in_(value)
+        if operator == FilterOperator.GTE:
+            return self.column >= value
+        if operator == FilterOperator.LTE:
+            return self.column <= value
+        if operator == FilterOperator.LT:
+            return self.column < value
+        if operator == FilterOperator.GT:
+            return self.column > value
+        if operator == FilterOperator.PREFIX:
+            # NB: the pattern is built here, as the planner only uses an index for a
+            # pattern it knows (rather than an expression such as `value || '%'`)
+            return self.column.like(f"{escape_like(value)}%", escape=LIKE_ESCAPE)
+        if operator == FilterOperator.ISNULL:
+            return self.column.is_(None) if value else self.column.isnot(None)
+        return self.column == value
+
+
+def escape_like(value: str) -> str:
+    for character in (LIKE_ESCAPE, "%", "_"):
+        value = value.replace(character, LIKE_ESCAPE + character)
+    return value
+
+
+def as_auto_filter(field) -> AutoFilter:
+    """
+    Declare a plain column as an equality filter.
+
+    """
+    return field if isinstance(field, AutoFilter) else AutoFilter(field)
+
+
+def filter_key(name: str, operator: FilterOperator) -> str:
+    if operator == FilterOperator.EQ:
+        return name
+    return f"{name}{OPERATOR_SEPARATOR}{operator.value}"
+
+
+def parse_filter_key(key: str) -> Tuple[str, FilterOperator]:
+    """
+    Split an argument name into a field name and an operator.
+
+    Raises `ValueError` for unknown operators.
+
+    """
+    name, separator, operator = key.rpartition(OPERATOR_SEPARATOR)
+    if not separator:
+        return key, FilterOperator.EQ
+    return name, FilterOperator(operator)
@@ -0,0 +1,172 @@
+"""
+In-process query statistics, per query fingerprint.
+
+Statements issued through the async engine are normalized (see `normalize_sql`)
+and aggregated in memory, much as `pg_stat_statements` aggregates them server-side:
+calls, total and mean time, latency percentiles and rows. Unlike
+`pg_stat_statements`, the view is per process and needs no database privileges.
+
+"""
+from dataclasses import dataclass, field
+from hashlib import md5
+from math import ceil
+from random import randrange
+from time import perf_counter
+from typing import Dict, List
+
+from microcosm.api import defaults, typed
+from sqlalchemy import event
+
+from microcosm_fastapi.database.normalization import normalize_sql
+
+
+FINGERPRINT_START_TIMES = "fingerprint_start_times"
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of (sorted) samples.
+
+    """
+    if not samples:
+        return 0.0
+    rank = max(ceil(fraction * len(samples)), 1)
+    return samples[rank - 1]
+
+
+@dataclass
+class FingerprintStats:
+    fingerprint: str
+    statement: str
+    sample_size: int
+    calls: int = 0
+    # Milliseconds
+    total_time: float = 0.0
+    rows: int = 0
+    # A uniform sample of call times, for percentiles
+    samples: List[float] = field(default_factory=list)
+
+    def record(self, elapsed_time: float, rows: int):
+        self.calls += 1
+        self.total_time += elapsed_time
+        self.rows += rows
+
+        # Reservoir sampling
+        if len(self.samples) < self.sample_size:
+            self.samples.append(elapsed_time)
+        else:
+            index = randrange(self.calls)
+            if index < self.sample_size:
+                self.samples[index] = elapsed_time
+
+    def to_dict(self) -> dict:
+        samples = sorted(self.samples)
+        return dict(
+            fingerprint=self.fingerprint,
+            statement=self.statement,
+            calls=self.calls,
+            total_time=self.total_time,
+            mean_time=self.total_time / self.calls if self.calls else 0.0,
+            p95_time=percentile(samples, 0.95),
+            p99_time=percentile(samples, 0.99),
+            rows=self.rows,
+        )
+
+
+def count_cursor_rows(cursor) -> int:
+    if cursor.rowcount is not None and cursor.rowcount >= 0:
+        return cursor.rowcount
+
+    # Drivers report -1 for `SELECT`; the asyncpg adapter buffers the fetched rows
+    rows = getattr(cursor, "_rows", None)
+    return len(rows) if rows is not None else 0
+
+
+class QueryFingerprints:
+    def __init__(self, engine, max_fingerprints=1000, sample_size=1024):
+        self.engine = engine
+        # Bounds memory when statements are built dynamically
+        self.max_fingerprints = max_fingerprints
+        self.sample_size = sample_size
+        self.stats: Dict[str, FingerprintStats] = dict()
+        # Calls of statements beyond `max_fingerprints`
+        self.untracked_calls = 0
+
+    def listen(self):
+        sync_engine = self.engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self.after_cursor_execute)
+        event.listen(sync_engine, "handle_error", self.handle_error)
+        return self
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(FINGERPRINT_START_TIMES, []).append(perf_counter())
+
+    def handle_error(self, exception_context):
+        if exception_context.connection is None:
+            return
+
+        start_times = exception_context.connection.info.get(FINGERPRINT_START_TIMES)
+        if start_times:
+            start_times.pop()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get(FINGERPRINT_START_TIMES)
+        if not start_times:
+            return
+
+        elapsed_time = (perf_counter() - start_times.pop()) * 1000
+        self.record(statement, elapsed_time, count_cursor_rows(cursor))
+
+    def record(self, statement: str, elapsed_time: float, rows: int):
+        normalized = normalize_sql(statement)
+        fingerprint = md5(normalized.encode("utf-8")).hexdigest()[:16]
+
+        stats = self.stats.get(fingerprint)
+        if stats is None:
+            if len(self.stats) >= self.max_fingerprints:
+                self.untracked_calls += 1
+                return
+            stats = self.stats[fingerprint] = FingerprintStats(
+                fingerprint=fingerprint,
+                statement=normalized,
+                sample_size=self.sample_size,
+            )
+
+        stats.record(elapsed_time, rows)
+
+    def reset(self):
+        self.stats = dict()
+        self.untracked_calls = 0
+
+    def to_dict(self) -> dict:
+        """
+        Encode the statistics, most time consuming statements first.
+
+        """
+        return dict(
+            queries=[
+                stats.to_dict()
+                for stats in sorted(self.stats.values(), key=lambda stats: stats.total_time, reverse=True)
+            ],
+            untracked_calls=self.untracked_calls,
+        )
+
+
+@defaults(
+    # Distinct statements to track
+    max_fingerprints=typed(int, default_value=1000),
+    # Call times kept per statement, for percentiles
+    sample_size=typed(int, default_value=1024),
+)
+def configure_query_fingerprints(graph):
+    """
+    Aggregate statistics of the statements issued through `postgres_async`.
+
+    """
+    config = graph.config.query_fingerprints
+    return QueryFingerprints(
+        graph.postgres_async,
+        max_fingerprints=config.max_fingerprints,
+        sample_size=config.sample_size,
+    ).listen()
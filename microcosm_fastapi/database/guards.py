@@ -0,0 +1,62 @@
+"""
+Query guards for search routes.
+
+A single client can load the shared database with very large pages, or with
+filters that force sequential scans. `configure_crud` may guard a namespace's
+routes: page sizes are clamped to `max_limit`, and with a `max_cost`, stores ask
+the planner (once per query shape) for the estimated cost of their searches and
+counts, rejecting those over budget.
+
+"""
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from microcosm_fastapi.database.counting import CountCache
+from microcosm_fastapi.errors import ClientError
+
+
+DEFAULT_PLAN_COST_TTL = 300.0
+
+
+@dataclass(frozen=True)
+class QueryGuard:
+    # The largest page size
+    max_limit: Optional[int] = None
+    # The largest planner cost estimate (in the planner's arbitrary units)
+    max_cost: Optional[float] = None
+
+    def clamp(self, limit: Optional[int]) -> Optional[int]:
+        if limit is None or self.max_limit is None:
+            return limit
+        return min(limit, self.max_limit)
+
+
+current_query_guard: ContextVar = ContextVar("query_guard", default=None)
+
+
+class QueryTooExpensiveError(ClientError):
+    """
+    The planner estimates a query to cost more than its route's budget.
+
+    """
+
+
+class PlanCostCache(CountCache):
+    """
+    Memoize planner cost estimates per query shape with a time-to-live.
+
+    """
+    def __init__(self, ttl=DEFAULT_PLAN_COST_TTL, **kwargs):
+        super().__init__(ttl=ttl, **kwargs)
+
+
+def clamp_limit(limit: Optional[int]) -> Optional[int]:
+    """
+    Clamp a page size to the current route's maximum, if any.
+
+    """
+    query_guard: Optional[QueryGuard] = current_query_guard.get()
+    if query_guard is None:
+        return limit
+    return query_guard.clamp(limit)
@@ -0,0 +1,50 @@
+"""
+Async Postgres health check.
+
+"""
+from asyncio import TimeoutError, wait_for
+
+from sqlalchemy import text
+
+
+class PostgresHealthError(Exception):
+    def __init__(self, message, details=None):
+        super().__init__(message)
+        # Included in the health check result
+        self.details = details
+
+
+def pool_stats(engine) -> dict:
+    stats = getattr(engine.pool, "stats", None)
+    return stats() if stats is not None else dict(status=engine.pool.status())
+
+
+async def select_one(engine):
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def check_health_async(graph):
+    """
+    Basic database health check, within `health_convention.postgres_timeout` seconds.
+
+    Checking out a connection counts towards the timeout, so an exhausted pool fails
+    the check. Returns the pool statistics, including those of named pools.
+
+    """
+    engine = graph.postgres_async
+    timeout = graph.config.health_convention.postgres_timeout
+
+    try:
+        await wait_for(select_one(engine), timeout)
+    except TimeoutError:
+        raise PostgresHealthError(
+            f"SELECT 1 timed out after {timeout}s",
+            details=pool_stats(engine),
+        )
+
+    stats = pool_stats(engine)
+    pools = graph.get("postgres_async_pools")
+    if pools is not None and pools.engines:
+        stats["pools"] = pools.stats()
+    return stats
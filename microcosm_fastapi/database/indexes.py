@@ -0,0 +1,263 @@
+"""
+Index advisor.
+
+Compares what stores filter and order on (their `auto_filter_fields`, `_order_by`
+and, for stores with `cursor_pagination`, keyset columns) with the indexes of their
+tables (`pg_indexes`), and suggests the missing ones:
+
+ -  filters need a btree index leading with their column; `__prefix` filters need
+    one with a pattern operator class,
+ -  filters on columns with few distinct values (per `pg_stats`) are rarely worth
+    an index of their own, so the suggestion also covers the ordering,
+ -  orderings need an index leading with their columns.
+
+Run it on startup (`index_advisor.enabled`), optionally failing startup in testing,
+or from a command line (see `main`).
+
+"""
+from argparse import ArgumentParser
+from asyncio import run
+from dataclasses import dataclass
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from microcosm.api import defaults, typed
+from microcosm.config.types import boolean
+from microcosm_logging.decorators import logger
+from sqlalchemy import select, text
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+from microcosm_fastapi.database.filters import FilterOperator
+from microcosm_fastapi.database.store import iter_stores
+
+
+INDEXES_QUERY = text("""
+    SELECT indexname, indexdef
+    FROM pg_indexes
+    WHERE schemaname = current_schema() AND tablename = :table_name
+""")
+STATS_QUERY = text("""
+    SELECT attname, n_distinct
+    FROM pg_stats
+    WHERE schemaname = current_schema() AND tablename = :table_name
+""")
+
+# e.g. "CREATE INDEX ix ON public.pizza USING btree (toppings text_pattern_ops, id)"
+INDEX_DEFINITION = re.compile(r"USING (?P<method>\w+) \((?P<columns>.*?)\)(?P<where> WHERE .*)?$")
+PATTERN_OPERATOR_CLASSES = ("text_pattern_ops", "varchar_pattern_ops", "bpchar_pattern_ops", 'COLLATE "C"')
+
+RANGE_OPERATORS = {FilterOperator.GTE, FilterOperator.LTE, FilterOperator.LT, FilterOperator.GT}
+
+# Columns with at most this many distinct values are not selective on their own
+LOW_CARDINALITY = 20
+
+
+class MissingIndexesError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class IndexColumn:
+    name: str
+    # Whether the column supports `LIKE 'prefix%'`
+    pattern: bool = False
+
+
+@dataclass(frozen=True)
+class IndexAdvice:
+    table_name: str
+    columns: Tuple[IndexColumn, ...]
+    reason: str
+
+    @property
+    def definition(self) -> str:
+        name = "_".join([self.table_name] + [column.name for column in self.columns] + ["idx"])
+        columns = ", ".join(
+            f"{column.name} text_pattern_ops" if column.pattern else column.name
+            for column in self.columns
+        )
+        return f"CREATE INDEX CONCURRENTLY {name} ON {self.table_name} ({columns});"
+
+    def to_dict(self) -> dict:
+        return dict(
+            table_name=self.table_name,
+            reason=self.reason,
+            definition=self.definition,
+        )
+
+
+def parse_index_definition(definition: str) -> Optional[Tuple[IndexColumn, ...]]:
+    """
+    Parse the columns of a (full, btree) index definition from `pg_indexes`.
+
+    Other indexes (e.g. partial or GIN indexes) are not considered.
+
+    """
+    match = INDEX_DEFINITION.search(definition)
+    if match is None or match.group("method") != "btree" or match.group("where"):
+        return None
+
+    columns = []
+    for column in match.group("columns").split(","):
+        column = column.strip()
+        name = column.split(" ")[0].strip('"')
+        columns.append(IndexColumn(
+            name=name,
+            pattern=any(operator_class in column for operator_class in PATTERN_OPERATOR_CLASSES),
+        ))
+    return tuple(columns)
+
+
+def covers(index: Tuple[IndexColumn, ...], columns: Sequence[IndexColumn]) -> bool:
+    """
+    Whether an index leads with some columns (and operator classes).
+
+    """
+    return tuple(index[:len(columns)]) == tuple(columns)
+
+
+def is_low_cardinality(n_distinct: Optional[float]) -> bool:
+    # Negative values are a fraction of the rows, i.e. grow with the table
+    return n_distinct is not None and 0 < n_distinct <= LOW_CARDINALITY
+
+
+def column_name(expression) -> Optional[str]:
+    if isinstance(expression, UnaryExpression) and expression.modifier in (operators.desc_op, operators.asc_op):
+        expression = expression.element
+    return getattr(expression, "name", None)
+
+
+def sort_columns(store) -> List[Tuple[IndexColumn, ...]]:
+    """
+    The orderings of a store's searches: its default `_order_by` and, if it pages by
+    cursor, its keyset.
+
+    """
+    orderings = []
+
+    query = store._order_by(select(store.model_class))
+    names = [column_name(clause) for clause in query._order_by_clauses]
+    if names and all(names):
+        orderings.append(tuple(IndexColumn(name) for name in names))
+
+    if store.cursor_pagination:
+        keyset_columns, _ = store._keyset()
+        orderings.append(tuple(IndexColumn(column.name) for column in keyset_columns))
+
+    return orderings
+
+
+def advise_store(
+    store,
+    indexes: Sequence[Tuple[IndexColumn, ...]],
+    n_distinct: Dict[str, float],
+) -> List[IndexAdvice]:
+    table_name = store.model_class.__table__.name
+    advice = dict()
+
+    def require(columns: Tuple[IndexColumn, ...], reason: str):
+        if not any(covers(index, columns) for index in indexes):
+            advice.setdefault(columns, IndexAdvice(table_name=table_name, columns=columns, reason=reason))
+
+    orderings = sort_columns(store)
+    for ordering in orderings:
+        require(ordering, "ordering by {}".format(", ".join(column.name for column in ordering)))
+
+    for auto_filter in store.auto_filters.values():
+        name = auto_filter.name
+        if FilterOperator.PREFIX in auto_filter.operators:
+            # A pattern index also serves equality, but not ranges
+            require((IndexColumn(name, pattern=True),), f"prefix filter on {name}")
+            if not set(auto_filter.operators) & RANGE_OPERATORS:
+                continue
+
+        if orderings and is_low_cardinality(n_distinct.get(name)):
+            # e.g. a status filter: index it along with the ordering
+            require((IndexColumn(name),) + orderings[0], f"filter on {name} (few distinct values), then ordering")
+        else:
+            require((IndexColumn(name),), f"filter on {name}")
+
+    # Skip suggestions that another one covers
+    return [
+        item
+        for columns, item in advice.items()
+        if not any(other != columns and covers(other, columns) for other in advice)
+    ]
+
+
+@logger
+class IndexAdvisor:
+    def __init__(self, graph, fail_in_testing=False):
+        self.graph = graph
+        self.fail_in_testing = fail_in_testing
+
+    async def advise(self) -> List[IndexAdvice]:
+        advice = []
+        for store in iter_stores(self.graph):
+            if store.model_class is None:
+                continue
+
+            table_name = store.model_class.__table__.name
+            async with store.session_maker() as session:
+                index_rows = (await session.execute(INDEXES_QUERY, dict(table_name=table_name))).all()
+                stats_rows = (await session.execute(STATS_QUERY, dict(table_name=table_name))).all()
+
+            indexes = [
+                columns
+                for columns in (parse_index_definition(definition) for _, definition in index_rows)
+                if columns
+            ]
+            n_distinct = {name: value for name, value in stats_rows}
+            advice.extend(advise_store(store, indexes, n_distinct))
+
+        return advice
+
+    async def check(self) -> List[IndexAdvice]:
+        advice = await self.advise()
+        for item in advice:
+            self.logger.warning(dict(message="Missing index", **item.to_dict()))
+
+        if advice and self.fail_in_testing and self.graph.metadata.testing:
+            raise MissingIndexesError(
+                "Missing indexes:\n{}".format("\n".join(item.definition for item in advice)),
+            )
+        return advice
+
+
+@defaults(
+    # Check the indexes on startup
+    enabled=typed(boolean, default_value=False),
+    # Fail startup, in testing, when indexes are missing
+    fail_in_testing=typed(boolean, default_value=False),
+)
+def configure_index_advisor(graph):
+    """
+    Advise on the indexes that the graph's stores need.
+
+    """
+    config = graph.config.index_advisor
+    index_advisor = IndexAdvisor(graph, fail_in_testing=config.fail_in_testing)
+
+    if config.enabled:
+        graph.app.add_event_handler("startup", index_advisor.check)
+
+    return index_advisor
+
+
+def main(graph):
+    """
+    Print the suggested indexes of the graph's stores.
+
+    """
+    parser = ArgumentParser()
+    parser.add_argument("--fail", action="store_true", help="Exit with an error when indexes are missing")
+    args, _ = parser.parse_known_args()
+
+    advice = run(graph.index_advisor.advise())
+    for item in advice:
+        print(f"-- {item.reason}")
+        print(item.definition)
+
+    if advice and args.fail:
+        raise SystemExit(1)
@@ -0,0 +1,164 @@
+"""
+Database instrumentation.
+
+Engine events count the SQL statements a request issues and time them, along with
+the time spent waiting for a pooled connection. Measurements accrue to the
+`QueryStats` of the current request, bound with a contextvar (SQLAlchemy runs
+events in a greenlet that shares the calling task's context).
+
+The pool also keeps process-wide statistics: connections checked out, idle and in
+overflow, checkouts waiting, and a histogram of checkout wait times.
+
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+QUERY_START_TIMES = "query_start_times"
+
+# Milliseconds; upper bounds of the checkout wait histogram buckets
+POOL_WAIT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+@dataclass
+class QueryStats:
+    statement_count: int = 0
+    # Milliseconds spent executing statements
+    db_time: float = 0.0
+    # Milliseconds spent waiting to check out pooled connections
+    pool_wait_time: float = 0.0
+
+    def to_dict(self) -> dict:
+        return dict(
+            sql_statement_count=self.statement_count,
+            sql_elapsed_time=self.db_time,
+            pool_wait_elapsed_time=self.pool_wait_time,
+        )
+
+
+current_query_stats: ContextVar = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries():
+    """
+    Collect the statements issued within a context (e.g. a request).
+
+    """
+    query_stats = QueryStats()
+    token = current_query_stats.set(query_stats)
+    try:
+        yield query_stats
+    finally:
+        current_query_stats.reset(token)
+
+
+class WaitHistogram:
+    """
+    A cumulative histogram of wait times (in milliseconds).
+
+    """
+    def __init__(self, buckets: Sequence[float] = POOL_WAIT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # The last count is of waits beyond the last bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, wait_time: float):
+        self.counts[bisect_left(self.buckets, wait_time)] += 1
+        self.count += 1
+        self.sum += wait_time
+
+    def to_dict(self) -> dict:
+        cumulative_counts, total = dict(), 0
+        for bucket, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            cumulative_counts[str(bucket)] = total
+
+        return dict(
+            buckets=cumulative_counts,
+            count=self.count,
+            sum=self.sum,
+        )
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    An async connection pool that times checkouts.
+
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Checkouts waiting for a connection
+        self.waiters = 0
+        self.wait_histogram = WaitHistogram()
+
+    def _do_get(self):
+        start_time = perf_counter()
+        self.waiters += 1
+        try:
+            return super()._do_get()
+        finally:
+            self.waiters -= 1
+            wait_time = (perf_counter() - start_time) * 1000
+            self.wait_histogram.observe(wait_time)
+
+            query_stats: Optional[QueryStats] = current_query_stats.get()
+            if query_stats is not None:
+                query_stats.pool_wait_time += wait_time
+
+    def stats(self) -> dict:
+        return dict(
+            size=self.size(),
+            checked_out=self.checkedout(),
+            idle=self.checkedin(),
+            # Negative while the pool has yet to open `size` connections
+            overflow=max(self.overflow(), 0),
+            waiters=self.waiters,
+            checkout_wait_time=self.wait_histogram.to_dict(),
+        )
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(QUERY_START_TIMES, []).append(perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record_statement(conn)
+
+
+def handle_error(exception_context):
+    if exception_context.connection is not None:
+        record_statement(exception_context.connection)
+
+
+def record_statement(conn):
+    start_times = conn.info.get(QUERY_START_TIMES)
+    if not start_times:
+        return
+
+    elapsed_time = (perf_counter() - start_times.pop()) * 1000
+    query_stats: Optional[QueryStats] = current_query_stats.get()
+    if query_stats is not None:
+        query_stats.statement_count += 1
+        query_stats.db_time += elapsed_time
+
+
+def instrument_engine(engine):
+    """
+    Register the statement tracking events on an (async) engine.
+
+    """
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(sync_engine, "handle_error", handle_error)
+    return engine
@@ -0,0 +1,26 @@
+"""
+Relationship loading for async stores.
+
+Async sessions cannot lazy load a relationship when it is first accessed, so the
+relationships that responses serialize must be loaded up front with loader options
+such as `selectinload` or `joinedload`. Stores declare these options per operation;
+`configure_crud` may override them per route.
+
+"""
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+from microcosm_fastapi.operations import Operation
+
+
+@dataclass(frozen=True)
+class LoadingContext:
+    # The model class of the route's namespace
+    subject: Any
+    operation: Operation
+    # Loader options declared by `configure_crud`, if any
+    loader_options: Optional[Sequence] = None
+
+
+current_loading_context: ContextVar = ContextVar("loading_context", default=None)
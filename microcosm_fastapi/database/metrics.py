@@ -0,0 +1,161 @@
+"""
+Metrics for async stores.
+
+`microcosm_postgres.metrics.postgres_metric_timing` wraps synchronous functions;
+applied to a coroutine function it times the creation of the coroutine, not the
+query. These decorators time the awaited work instead.
+
+"""
+from contextvars import ContextVar
+from functools import wraps
+from inspect import isasyncgenfunction
+from time import perf_counter
+from typing import Any, Optional
+
+from microcosm_postgres.metrics import SQLExecutionStatus
+
+from microcosm_fastapi.database.pools import current_pool_name
+
+
+# The store action (e.g. "Pizza.search") issuing the current statements
+current_store_action: ContextVar = ContextVar("store_action", default=None)
+
+
+class PostgresStoreMetricsAsync:
+    """
+    Send metrics regarding async stores.
+
+    Latencies feed `graph.postgres_store_metrics`, alongside sync stores; row
+    counts and error classes are sent with the same tags, and the connection pool.
+
+    """
+    def __init__(self, graph):
+        self.store_metrics = graph.postgres_store_metrics
+
+    def __call__(
+        self,
+        model_name: str,
+        action: str,
+        elapsed_time: float,
+        execution_result: str,
+        row_count: Optional[int] = None,
+        error_class: Optional[str] = None,
+        pool_name: Optional[str] = None,
+    ):
+        self.store_metrics(
+            model_name=model_name,
+            action=action,
+            elapsed_time=elapsed_time,
+            execution_result=execution_result,
+        )
+
+        if not self.store_metrics.enabled or not model_name:
+            return
+
+        tags = [
+            "source:microcosm-fastapi",
+            f"result:{execution_result}",
+            f"action:{action}",
+            f"model_name:{model_name}",
+            f"pool:{pool_name or 'default'}",
+        ]
+        if row_count is not None:
+            self.store_metrics.metrics.histogram(
+                "store.rows",
+                row_count,
+                tags=tags,
+            )
+        if error_class is not None:
+            self.store_metrics.metrics.increment(
+                "store.errors",
+                tags=tags + [f"error_class:{error_class}"],
+            )
+
+
+def count_rows(result: Any) -> Optional[int]:
+    """
+    Count the rows returned by a store action, if it returns rows.
+
+    """
+    if isinstance(result, tuple):
+        # `(items, count)` and `(instance, diff)` pairs
+        result = result[0]
+
+    if result is None:
+        return 0
+    if isinstance(result, bool):
+        # Deletes report whether they deleted
+        return int(result)
+    if isinstance(result, int):
+        # Counts are not rows
+        return None
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+
+def store_metric_timing(action: str):
+    """
+    Time a store coroutine (or async generator) method, including the awaited work.
+
+    """
+    def wrap(func):
+        if isasyncgenfunction(func):
+            @wraps(func)
+            async def generator_wrapper(self, *args, **kwargs):
+                row_count, error = 0, None
+                start_time = perf_counter()
+                items = func(self, *args, **kwargs)
+                try:
+                    async for item in items:
+                        row_count += 1
+                        yield item
+                except GeneratorExit:
+                    # The consumer stopped early
+                    raise
+                except BaseException as caught:
+                    error = caught
+                    raise
+                finally:
+                    # Release the generator's session now, rather than once collected
+                    await items.aclose()
+                    send_metrics(self, action, start_time, row_count, error)
+
+            return generator_wrapper
+
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            row_count, error = None, None
+            token = current_store_action.set(f"{self.model_name}.{action}")
+            start_time = perf_counter()
+            try:
+                result = await func(self, *args, **kwargs)
+                row_count = count_rows(result)
+                return result
+            except BaseException as caught:
+                # Includes cancellation
+                error = caught
+                raise
+            finally:
+                send_metrics(self, action, start_time, row_count, error)
+                current_store_action.reset(token)
+
+        return wrapper
+
+    return wrap
+
+
+def send_metrics(store, action: str, start_time: float, row_count: Optional[int], error: Optional[BaseException]):
+    store.postgres_store_metrics(
+        model_name=store.model_name,
+        action=action,
+        elapsed_time=(perf_counter() - start_time) * 1000,
+        execution_result=(
+            SQLExecutionStatus.SUCCESS.name
+            if error is None
+            else SQLExecutionStatus.FAILURE.name
+        ),
+        row_count=row_count,
+        error_class=None if error is None else type(error).__name__,
+        pool_name=current_pool_name.get() or getattr(store, "pool_name", None),
+    )
@@ -0,0 +1,42 @@
+"""
+SQL normalization for logging and aggregation.
+
+Normalized statements have their literals and bind placeholders replaced with `?`
+and lists of placeholders collapsed, so that statements which differ only in their
+values (or in the length of an `IN` list) read, and group, the same.
+
+"""
+import re
+from typing import Any
+
+
+PLACEHOLDER = re.compile(r"%s|%\(\w+\)s|\$\d+|(?<![:\w]):\w+")
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMERIC_LITERAL = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?(?![\w\"])")
+PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    statement = STRING_LITERAL.sub("?", statement)
+    statement = PLACEHOLDER.sub("?", statement)
+    statement = NUMERIC_LITERAL.sub("?", statement)
+    statement = PLACEHOLDER_LIST.sub("(?, ...)", statement)
+    return WHITESPACE.sub(" ", statement).strip()
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> Any:
+    """
+    Replace bound values with their type names.
+
+    """
+    if executemany:
+        return dict(rows=len(parameters))
+    if isinstance(parameters, dict):
+        return {
+            key: type(value).__name__
+            for key, value in parameters.items()
+        }
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
@@ -0,0 +1,66 @@
+"""
+Keyset (cursor) pagination support.
+
+A cursor is an opaque, url-safe token that encodes the keyset values of the
+last (or first) row of a page. Filtering on `(keyset) > (values)` lets Postgres
+seek straight to the next page through an index, so page N costs the same as page 1.
+
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import date, datetime
+from decimal import Decimal
+from json import dumps, loads
+from typing import Any, List
+from uuid import UUID
+
+from microcosm_fastapi.database.errors import InvalidCursorError
+
+
+# Keyset values that are not native to json are tagged with their type
+ENCODERS = [
+    (datetime, "datetime", datetime.isoformat),
+    (date, "date", date.isoformat),
+    (UUID, "uuid", str),
+    (Decimal, "decimal", str),
+]
+
+DECODERS = {
+    "datetime": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "uuid": UUID,
+    "decimal": Decimal,
+}
+
+
+def encode_value(value: Any):
+    for type_, tag, encode in ENCODERS:
+        if isinstance(value, type_):
+            return [tag, encode(value)]
+    return [None, value]
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """
+    Encode keyset values into an opaque cursor.
+
+    """
+    payload = dumps([encode_value(value) for value in values], separators=(",", ":"))
+    return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    Decode an opaque cursor into keyset values.
+
+    :raises `InvalidCursorError` if the cursor is malformed
+
+    """
+    try:
+        payload = loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return [
+            value if tag is None else DECODERS[tag](value)
+            for tag, value in payload
+        ]
+    except (BinasciiError, KeyError, TypeError, ValueError) as error:
+        raise InvalidCursorError("Invalid cursor: {}".format(cursor), error)
@@ -0,0 +1,84 @@
+"""
+Named connection pools (bulkheads).
+
+With a single engine, a slow workload (e.g. reporting searches) can check out every
+connection and starve latency-critical routes. Named pools isolate workloads: each
+has its own engine, sized and timed out independently, and its own session maker.
+
+Stores are assigned a pool with `pool_name`; a `Namespace` may assign one to its
+routes, which takes precedence over the stores they call. With a read replica,
+each pool also has a replica engine of the same size, for the pool's reads.
+
+"""
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from microcosm.api import defaults
+from sqlalchemy.orm import sessionmaker
+
+from microcosm_fastapi.database.postgres import make_engine
+from microcosm_fastapi.database.replica import replica_settings
+from microcosm_fastapi.database.session import make_session_maker
+
+
+# Engine settings a named pool may override
+POOL_SETTINGS = ("pool_size", "max_overflow", "pool_timeout", "statement_timeout")
+
+# The pool assigned to the current route, if any
+current_pool_name: ContextVar = ContextVar("pool_name", default=None)
+
+
+class ConnectionPools:
+    def __init__(self, graph, pools: Dict[str, dict]):
+        self.engines = dict()
+        self.session_makers = dict()
+        self.replica_engines = dict()
+        self.replica_session_makers = dict()
+
+        replica = replica_settings(graph.config)
+        for name, settings in pools.items():
+            unknown = set(settings) - set(POOL_SETTINGS)
+            if unknown:
+                raise ValueError(f"Unknown settings for connection pool {name}: {', '.join(sorted(unknown))}")
+
+            engine = make_engine(graph.metadata, graph.config, **settings)
+            self.engines[name] = engine
+            self.session_makers[name] = make_session_maker(engine)
+
+            if replica is not None:
+                replica_engine = make_engine(graph.metadata, graph.config, **settings, **replica)
+                self.replica_engines[name] = replica_engine
+                self.replica_session_makers[name] = make_session_maker(replica_engine)
+
+    def __contains__(self, name) -> bool:
+        return name in self.engines
+
+    def session_maker(self, name: str):
+        try:
+            return self.session_makers[name]
+        except KeyError:
+            raise ValueError(f"Unknown connection pool: {name}")
+
+    def replica_session_maker(self, name: str) -> Optional[sessionmaker]:
+        """
+        The session maker of a pool's replica engine, if a replica is configured.
+
+        """
+        if name not in self:
+            raise ValueError(f"Unknown connection pool: {name}")
+        return self.replica_session_makers.get(name)
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            name: engine.pool.stats()
+            for name, engine in self.engines.items()
+        }
+
+
+@defaults(
+    # Named pools, e.g. `dict(reporting=dict(pool_size=2, statement_timeout=30000))`;
+    # unset settings follow the `postgres` config
+    pools=dict(),
+)
+def configure_connection_pools(graph):
+    return ConnectionPools(graph, graph.config.postgres_async_pools.pools)
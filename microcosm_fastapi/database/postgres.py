@@ -1,8 +1,11 @@
 import ssl
 
+from microcosm.config.model import Configuration
 from microcosm_postgres.factories.engine import choose_uri
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
+from microcosm_fastapi.database.instrumentation import InstrumentedAsyncAdaptedQueuePool, instrument_engine
+
 
 def choose_connect_args(metadata, config):
     """
@@ -32,8 +35,13 @@ def choose_args(metadata, config):
     """
     Choose database connection arguments.
     """
+    connect_args = choose_connect_args(metadata, config)
+    if config.get("statement_timeout"):
+        # Milliseconds; applies to every statement on the engine's connections
+        connect_args["server_settings"] = dict(statement_timeout=str(int(config.statement_timeout)))
+
     return dict(
-        connect_args=choose_connect_args(metadata, config),
+        connect_args=connect_args,
         echo=config.echo,
         max_overflow=config.max_overflow,
         pool_size=config.pool_size,
@@ -41,17 +49,24 @@ def choose_args(metadata, config):
     )
 
 
-def make_engine(metadata, config):
+def make_engine(metadata, config, **overrides):
+    """
+    Create an async engine from the `postgres` config, with optional overrides
+    (e.g. the `host` of a read replica, or the `pool_size` of a named pool).
+    """
     # TODO - move to microcosm @defaults + deal with postgres / postgres_async bindings
     # Required for async engine - so override user preferences
     config.postgres.driver = "postgresql+asyncpg"
+    postgres_config = Configuration(dict(config.postgres, **overrides))
 
-    uri = choose_uri(metadata, config.postgres)
-    args = choose_args(metadata, config.postgres)
-    return create_async_engine(
+    uri = choose_uri(metadata, postgres_config)
+    args = choose_args(metadata, postgres_config)
+    engine = create_async_engine(
         uri,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
         **args,
     )
+    return instrument_engine(engine)
 
 
 def configure_postgres(graph):
@@ -0,0 +1,120 @@
+"""
+Read replica support.
+
+Stores route reads to the replica while it keeps up with the primary. Replica lag
+is re-checked in the background, so routing decisions never wait on a query.
+
+Requests read their own writes: once a route (see `microcosm_fastapi.route_context`)
+has written, even in a unit of work that has since committed, its reads stay on the
+primary.
+
+"""
+from asyncio import get_running_loop, wait_for
+from contextvars import ContextVar
+from time import monotonic
+from typing import Optional
+
+from microcosm.api import defaults, typed
+from microcosm_logging.decorators import logger
+from sqlalchemy import text
+
+from microcosm_fastapi.database.postgres import make_engine
+
+
+# Seconds the replica is behind the primary; zero when it has replayed everything it received
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class RequestWrites:
+    def __init__(self):
+        # Whether a store has written within the current request
+        self.written = False
+
+
+current_request_writes: ContextVar = ContextVar("request_writes", default=None)
+
+
+@defaults(
+    # replica host; reads stay on the primary when unset
+    host=None,
+    # replica port; defaults to the primary's port
+    port=typed(int, default_value=None),
+    # replicas lagging more than this many seconds are dropped from routing
+    max_lag=typed(float, default_value=5.0),
+    # how often to re-check the replica lag, in seconds
+    check_interval=typed(float, default_value=5.0),
+)
+def configure_postgres_replica(graph):
+    settings = replica_settings(graph.config)
+    if settings is None:
+        return None
+
+    return make_engine(graph.metadata, graph.config, **settings)
+
+
+def replica_settings(config) -> Optional[dict]:
+    """
+    The engine settings that point the `postgres` config at the replica, if one is configured.
+
+    """
+    if not config.postgres_async_replica.host:
+        return None
+
+    return dict(
+        host=config.postgres_async_replica.host,
+        port=config.postgres_async_replica.port or config.postgres.port,
+    )
+
+
+@logger
+class ReplicaMonitor:
+    """
+    Track whether the read replica is healthy enough to serve reads.
+
+    The replica is unavailable until its lag has been checked once.
+
+    """
+    def __init__(self, graph):
+        self.engine = graph.postgres_async_replica
+        self.max_lag = graph.config.postgres_async_replica.max_lag
+        self.check_interval = graph.config.postgres_async_replica.check_interval
+
+        self.lag = None
+        self.checked_at = None
+        self.check_task = None
+
+    @property
+    def available(self) -> bool:
+        if self.engine is None:
+            return False
+
+        self.schedule_check()
+        return self.lag is not None and self.lag <= self.max_lag
+
+    def schedule_check(self) -> None:
+        if self.check_task is not None:
+            return
+        if self.checked_at is not None and monotonic() - self.checked_at < self.check_interval:
+            return
+
+        self.check_task = get_running_loop().create_task(self.check())
+
+    async def check(self) -> None:
+        try:
+            async with self.engine.connect() as connection:
+                self.lag = float(await wait_for(
+                    connection.scalar(REPLICA_LAG_QUERY),
+                    timeout=self.check_interval,
+                ))
+        except Exception as error:
+            self.logger.warning("Dropping read replica from routing: {}".format(error))
+            self.lag = None
+        finally:
+            self.checked_at = monotonic()
+            self.check_task = None
@@ -1,13 +1,34 @@
+from microcosm.api import defaults, typed
+from microcosm.config.types import boolean
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
-def configure_session_maker(graph):
+def make_session_maker(engine):
     # expire_on_commit=False
     # In async settings, we don't want SQLAlchemy to issue new SQL queries
     # to the database when accessing already commited objects.
     return sessionmaker(
-        graph.postgres_async,
+        engine,
         class_=AsyncSession,
         expire_on_commit=False,
     )
+
+
+@defaults(
+    # Debug mode: fail reads that would lazy load a relationship (see `StoreAsync._loader_options`)
+    raise_on_lazy_load=typed(type=boolean, default_value=False),
+)
+def configure_session_maker(graph):
+    return make_session_maker(graph.postgres_async)
+
+
+def configure_session_maker_replica(graph):
+    """
+    Create the session maker for the read replica, if one is configured.
+
+    """
+    if graph.postgres_async_replica is None:
+        return None
+
+    return make_session_maker(graph.postgres_async_replica)
@@ -0,0 +1,166 @@
+"""
+Slow query log for the async engine.
+
+Statements slower than a threshold are logged, normalized and with their bound
+values redacted, along with the store action and the route operation that issued
+them. A sample of slow `SELECT` statements is re-run under `EXPLAIN (ANALYZE, BUFFERS)`
+on a separate connection, in a transaction that is rolled back.
+
+"""
+from asyncio import get_running_loop
+from contextvars import ContextVar
+from random import random
+from time import perf_counter
+
+from microcosm.api import defaults, typed
+from microcosm.config.types import boolean
+from microcosm_logging.decorators import logger
+from sqlalchemy import event, text
+
+from microcosm_fastapi.database.metrics import current_store_action
+from microcosm_fastapi.database.normalization import normalize_sql, redact_parameters
+from microcosm_fastapi.logging_data_map import current_logging_info
+
+
+SLOW_QUERY_START_TIMES = "slow_query_start_times"
+
+# Plan nodes that may quote bound values
+PLAN_CONDITION_SUFFIXES = ("Cond", "Filter")
+
+# Set while explaining, so that explaining is not itself logged
+explaining: ContextVar = ContextVar("explaining", default=False)
+
+
+def redact_plan(plan):
+    """
+    Normalize the conditions of a query plan, which quote the bound values.
+
+    """
+    if isinstance(plan, list):
+        return [redact_plan(item) for item in plan]
+    if not isinstance(plan, dict):
+        return plan
+
+    return {
+        key: (
+            normalize_sql(value)
+            if isinstance(value, str) and key.endswith(PLAN_CONDITION_SUFFIXES)
+            else redact_plan(value)
+        )
+        for key, value in plan.items()
+    }
+
+
+@logger
+class SlowQueryLog:
+    def __init__(self, engine, threshold, explain_sample_rate=0.0, explain_timeout=5000, explain_writes=False):
+        self.engine = engine
+        # Milliseconds
+        self.threshold = threshold
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_timeout = explain_timeout
+        # `ANALYZE` executes the statement; writes are rolled back, but their side
+        # effects (e.g. on sequences) are not
+        self.explain_writes = explain_writes
+        self.explain_tasks = set()
+
+    def listen(self):
+        sync_engine = self.engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self.after_cursor_execute)
+        event.listen(sync_engine, "handle_error", self.handle_error)
+        return self
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(SLOW_QUERY_START_TIMES, []).append(perf_counter())
+
+    def handle_error(self, exception_context):
+        if exception_context.connection is None:
+            return
+
+        start_times = exception_context.connection.info.get(SLOW_QUERY_START_TIMES)
+        if start_times:
+            start_times.pop()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get(SLOW_QUERY_START_TIMES)
+        if not start_times:
+            return
+
+        elapsed_time = (perf_counter() - start_times.pop()) * 1000
+        if elapsed_time < self.threshold or explaining.get():
+            return
+
+        logging_info = current_logging_info.get()
+        self.logger.warning(dict(
+            message="Slow query",
+            elapsed_time=elapsed_time,
+            statement=normalize_sql(statement),
+            parameters=redact_parameters(parameters, executemany),
+            store_action=current_store_action.get(),
+            operation=logging_info.operation_name if logging_info else None,
+        ))
+
+        if not executemany and self.should_explain(statement):
+            # Events run (in a greenlet) within the event loop
+            task = get_running_loop().create_task(self.explain(statement, parameters))
+            self.explain_tasks.add(task)
+            task.add_done_callback(self.explain_tasks.discard)
+
+    def should_explain(self, statement: str) -> bool:
+        if not self.explain_sample_rate or random() >= self.explain_sample_rate:
+            return False
+
+        return self.explain_writes or statement.lstrip().upper().startswith(("SELECT", "WITH"))
+
+    async def explain(self, statement, parameters):
+        # NB: runs in its own task, with its own context
+        explaining.set(True)
+        try:
+            async with self.engine.connect() as connection:
+                transaction = await connection.begin()
+                try:
+                    await connection.execute(text(f"SET LOCAL statement_timeout = {int(self.explain_timeout)}"))
+                    result = await connection.exec_driver_sql(
+                        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}",
+                        parameters,
+                    )
+                    plan = result.scalar()
+                finally:
+                    await transaction.rollback()
+        except Exception as error:
+            self.logger.info("Could not explain slow query: {}".format(error))
+            return
+
+        self.logger.warning(dict(
+            message="Slow query plan",
+            statement=normalize_sql(statement),
+            plan=redact_plan(plan),
+        ))
+
+
+@defaults(
+    # Milliseconds; statements at least this slow are logged
+    threshold=typed(float, default_value=500.0),
+    # Fraction of slow statements to explain
+    explain_sample_rate=typed(float, default_value=0.0),
+    # Milliseconds; `statement_timeout` for explaining a statement
+    explain_timeout=typed(int, default_value=5000),
+    # Whether to explain (and so re-run, then roll back) slow writes
+    explain_writes=typed(boolean, default_value=False),
+)
+def configure_slow_query_log(graph):
+    """
+    Log slow statements issued through `postgres_async`.
+
+    Opt in with `graph.use("slow_query_log")`.
+
+    """
+    config = graph.config.slow_query_log
+    return SlowQueryLog(
+        graph.postgres_async,
+        threshold=config.threshold,
+        explain_sample_rate=config.explain_sample_rate,
+        explain_timeout=config.explain_timeout,
+        explain_writes=config.explain_writes,
+    ).listen()
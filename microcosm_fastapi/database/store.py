@@ -1,5 +1,8 @@
 from contextlib import asynccontextmanager
+from enum import Enum
+from functools import partial
 
+from asyncpg.exceptions import IntegrityConstraintViolationError
 from microcosm_postgres.diff import Version
 from microcosm_postgres.errors import (
     DuplicateModelError,
@@ -9,28 +12,147 @@ from microcosm_postgres.errors import (
     ReferencedModelError,
 )
 from microcosm_postgres.identifiers import new_object_id
-from microcosm_postgres.metrics import postgres_metric_timing
-from sqlalchemy import select, func
+from sqlalchemy import (
+    Column,
+    MetaData,
+    Table,
+    any_,
+    bindparam,
+    delete,
+    func,
+    inspect,
+    literal,
+    literal_column,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only, make_transient_to_detached, object_session, raiseload
 from sqlalchemy.orm.exc import FlushError, NoResultFound
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+from microcosm_fastapi.database.batching import BatchLoader
+from microcosm_fastapi.database.caching import DEFAULT_RETRIEVE_CACHE_SIZE, RetrieveCache
+from microcosm_fastapi.database.context import SessionContextAsync, transaction_async
+from microcosm_fastapi.database.copying import (
+    CopyFormat,
+    bind_processors,
+    compile_query,
+    copied_rows,
+    copy_from_query,
+    driver_connection,
+    iterate,
+    process_row,
+)
+from microcosm_fastapi.database.counting import (
+    DEFAULT_COUNT_CACHE_TTL,
+    CountCache,
+    CountStrategy,
+)
+from microcosm_fastapi.database.errors import InvalidCursorError
+from microcosm_fastapi.database.explain import explain
+from microcosm_fastapi.database.filters import as_auto_filter, parse_filter_key
+from microcosm_fastapi.database.guards import PlanCostCache, QueryTooExpensiveError, current_query_guard
+from microcosm_fastapi.database.loading import current_loading_context
+from microcosm_fastapi.database.metrics import store_metric_timing
+from microcosm_fastapi.database.pagination import decode_cursor, encode_cursor
+from microcosm_fastapi.database.pools import current_pool_name
+from microcosm_fastapi.database.replica import current_request_writes
+from microcosm_fastapi.deadlines import apply_deadline
+
+
+# Rows per multi-row INSERT issued by the bulk write methods
+DEFAULT_CHUNK_SIZE = 1000
+
+# Postgres caps the number of bind parameters in a single statement
+MAX_BIND_PARAMETERS = 32767
+
+
+class UpdateStrategy(Enum):
+    # Load the current row and merge the new instance into it
+    MERGE = "merge"
+    # Issue a single `UPDATE ... RETURNING` for the fields set on the new instance
+    RETURNING = "returning"
 
 
 class StoreAsync:
+    # Relationship loader options (e.g. `selectinload(Model.relation)`) for every read
+    loader_options = ()
+    # Loader options per `Operation` of the model's routes, in place of the above
+    operation_loader_options = dict()
+    # The named connection pool (see `postgres_async_pools`) to use, if any
+    pool_name = None
+    # Whether routes page searches by cursor, so that the keyset needs an index
+    cursor_pagination = False
 
-    def __init__(self, graph, model_class, auto_filter_fields=()):
+    def __init__(
+        self,
+        graph,
+        model_class,
+        auto_filter_fields=(),
+        update_strategy=UpdateStrategy.MERGE,
+        count_strategy=CountStrategy.EXACT,
+        count_cache_ttl=DEFAULT_COUNT_CACHE_TTL,
+        retrieve_cache_ttl=None,
+        retrieve_cache_size=DEFAULT_RETRIEVE_CACHE_SIZE,
+        retrieve_batch_window=None,
+        loader_options=None,
+        operation_loader_options=None,
+        pool_name=None,
+        cursor_pagination=None,
+    ):
         if graph:
             self.graph = graph
             self.session_maker = graph.session_maker_async
-            self.postgres_store_metrics = self.graph.postgres_store_metrics
+            self.raise_on_lazy_load = graph.config.session_maker_async.raise_on_lazy_load
+            self.replica_session_maker = graph.session_maker_async_replica
+            self.replica_monitor = graph.postgres_async_replica_monitor
+            self.pools = graph.postgres_async_pools
+            self.postgres_store_metrics = self.graph.postgres_store_metrics_async
         else:
             # no-op function for metrics if graph isn't passed
             self.postgres_store_metrics = lambda *args, **kwargs: None
+            self.raise_on_lazy_load = False
 
         self.model_class = model_class
         self.auto_filters = {
-            auto_filter_field.name: auto_filter_field
-            for auto_filter_field in auto_filter_fields
+            auto_filter.name: auto_filter
+            for auto_filter in map(as_auto_filter, auto_filter_fields)
         }
+        if loader_options is not None:
+            self.loader_options = loader_options
+        if operation_loader_options is not None:
+            self.operation_loader_options = operation_loader_options
+        if pool_name is not None:
+            self.pool_name = pool_name
+        if cursor_pagination is not None:
+            self.cursor_pagination = cursor_pagination
+        if graph and self.pool_name is not None and self.pool_name not in self.pools:
+            raise ValueError(f"Unknown connection pool: {self.pool_name}")
+        self.update_strategy = UpdateStrategy(update_strategy)
+        self.count_strategy = CountStrategy(count_strategy)
+        self.count_cache = CountCache(ttl=count_cache_ttl)
+        self.plan_cost_cache = PlanCostCache()
+        # Retrieve caching is opt-in: set a time-to-live to enable it
+        self.retrieve_cache = (
+            RetrieveCache(ttl=retrieve_cache_ttl, max_size=retrieve_cache_size)
+            if retrieve_cache_ttl
+            else None
+        )
+        # Retrieve batching is opt-in: set a window (in seconds; zero batches a
+        # single event loop iteration) to enable it
+        self.retrieve_batcher = (
+            BatchLoader(self._load_batch, missing=self._not_found, window=retrieve_batch_window)
+            if retrieve_batch_window is not None
+            else None
+        )
         self.assign_model_class_store()
 
         # Error checking on subclass definitions
@@ -77,81 +199,294 @@ class StoreAsync:
             else:
                 raise ModelIntegrityError(error)
 
+    def choose_pool_name(self):
+        """
+        Choose the named connection pool, if any: the current route's (see
+        `Namespace.pool_name`), else the store's.
+        """
+        return current_pool_name.get() or self.pool_name
+
+    def primary_session_maker(self):
+        pool_name = self.choose_pool_name()
+        if pool_name is None:
+            return self.session_maker
+        return self.pools.session_maker(pool_name)
+
+    def choose_session_maker(self, primary=False):
+        """
+        Route reads to the read replica, if one is configured and keeping up.
+
+        Reads stay on the primary when asked to, or once the current unit of work or
+        request has written, so that they always read their own writes.
+        """
+        if primary or self.replica_session_maker is None:
+            return self.primary_session_maker()
+
+        context = SessionContextAsync.current()
+        if context is not None and context.written:
+            return self.primary_session_maker()
+        request_writes = current_request_writes.get()
+        if request_writes is not None and request_writes.written:
+            return self.primary_session_maker()
+        if not self.replica_monitor.available:
+            return self.primary_session_maker()
+
+        return self.replica_session_maker_for_pool()
+
+    def replica_session_maker_for_pool(self):
+        """
+        The replica's session maker for the named connection pool, if any.
+        """
+        pool_name = self.choose_pool_name()
+        if pool_name is None:
+            return self.replica_session_maker
+        return self.pools.replica_session_maker(pool_name)
+
     @asynccontextmanager
-    async def with_transaction(self, session):
-        try:
-            yield
-            await session.commit()
-        except Exception:
-            await session.rollback()
-            raise
+    async def with_session(self, primary=False, join=True):
+        """
+        Yield the session of the current unit of work, if any.
+
+        Otherwise yield a short-lived session that is closed (not committed) on exit.
+        Sessions are bound by the request's deadline, if any.
+        :param primary: read from the primary even if a replica is available
+        :param join: whether to join the current unit of work; streamed reads, which
+                     may outlive it, do not
+        """
+        session_maker = self.choose_session_maker(primary)
+
+        context = SessionContextAsync.current() if join else None
+        if context is not None:
+            with context.using(context.session_for(session_maker)) as session:
+                await apply_deadline(session)
+                yield session
+            return
+
+        async with session_maker() as session:
+            await apply_deadline(session)
+            yield session
+
+    @asynccontextmanager
+    async def with_transaction(self):
+        """
+        Yield a session that joins the current unit of work, opening one if needed.
+
+        Writes commit once, when the outermost unit of work exits.
+        """
+        async with transaction_async() as context:
+            context.written = True
+            request_writes = current_request_writes.get()
+            if request_writes is not None:
+                request_writes.written = True
+            context.after_commit(self.count_cache.clear)
+            with context.using(context.session_for(self.primary_session_maker())) as session:
+                await apply_deadline(session)
+                yield session
 
-    @postgres_metric_timing(action="create")
+    @store_metric_timing(action="create")
     async def create(self, instance):
         """
         Create a new model instance.
         """
-        async with self.session_maker() as session:
-            async with self.with_transaction(session):
-                async with self.flushing(session):
-                    if instance.id is None:
-                        instance.id = self.new_object_id()
-                    session.add(instance)
+        async with self.with_transaction() as session:
+            async with self.flushing(session):
+                if instance.id is None:
+                    instance.id = self.new_object_id()
+                session.add(instance)
+            self._invalidate(instance.id)
         return instance
 
-    @postgres_metric_timing(action="retrieve")
-    async def retrieve(self, identifier, *criterion):
+    @store_metric_timing(action="retrieve")
+    async def retrieve(self, identifier, *criterion, primary=False, fields=None):
         """
         Retrieve a model by primary key and zero or more other criteria.
+        :param fields: the names of the only columns to load, if any
         :raises `NotFound` if there is no existing model
         """
-        return await self._retrieve(
-            self.model_class.id == identifier,
-            *criterion
+        if (
+            criterion
+            or fields
+            or self.retrieve_batcher is None
+            or not self._shares_reads(primary)
+            or self._relationship_loader_options()
+        ):
+            return await self._retrieve(
+                self.model_class.id == identifier,
+                *criterion,
+                primary=primary,
+                fields=fields,
+            )
+
+        if self.retrieve_cache is None:
+            return self._from_snapshot(await self.retrieve_batcher.load(str(identifier)))
+
+        snapshot = await self.retrieve_cache.get_or_load(
+            self._query_key(self._query(self.model_class.id == identifier)),
+            partial(self._load_batched_snapshot, identifier),
         )
+        return self._from_snapshot(snapshot)
+
+    @store_metric_timing(action="retrieve_many")
+    async def retrieve_many(self, identifiers, primary=False):
+        """
+        Retrieve models by primary key with a single `WHERE id = ANY(:ids)`.
+        Returns the models in the order of the identifiers.
+        :raises `ModelNotFoundError` if any model does not exist
+        """
+        identifiers = list(identifiers)
+        instances = await self._retrieve_by_ids(identifiers, primary=primary)
+
+        missing = [
+            identifier
+            for identifier in identifiers
+            if str(identifier) not in instances
+        ]
+        if missing:
+            raise ModelNotFoundError(
+                "{} not found: {}".format(
+                    self.model_class.__name__,
+                    ", ".join(str(identifier) for identifier in missing),
+                ),
+            )
+        return [instances[str(identifier)] for identifier in identifiers]
 
-    @postgres_metric_timing(action="update")
+    @store_metric_timing(action="update")
     async def update(self, identifier, new_instance):
         """
         Update an existing model with a new one.
         :raises `ModelNotFoundError` if there is no existing model
         """
-        async with self.session_maker() as session:
-            async with self.with_transaction(session):
-                async with self.flushing(session):
-                    instance = await self.retrieve(identifier)
-                    await self.merge(instance, new_instance, session)
-                    instance.updated_at = instance.new_timestamp()
+        if self.update_strategy == UpdateStrategy.RETURNING:
+            return await self._update_returning(identifier, new_instance)
+
+        async with self.with_transaction() as session:
+            async with self.flushing(session):
+                instance = await self.retrieve(identifier)
+                await self.merge(instance, new_instance, session)
+                instance.updated_at = instance.new_timestamp()
+            self._invalidate(identifier)
         return instance
 
-    @postgres_metric_timing(action="update_with_diff")
+    @store_metric_timing(action="update_with_diff")
     async def update_with_diff(self, identifier, new_instance):
         """
         Update an existing model with a new one.
         :raises `ModelNotFoundError` if there is no existing model
         """
-        async with self.session_maker() as session:
-            async with self.with_transaction(session):
-                async with self.flushing(session):
-                    instance = await self.retrieve(identifier)
-                    before = Version(instance)
-                    await self.merge(instance, new_instance, session)
-                    instance.updated_at = instance.new_timestamp()
-                    after = Version(instance)
+        async with self.with_transaction() as session:
+            async with self.flushing(session):
+                instance = await self.retrieve(identifier)
+                before = Version(instance)
+                await self.merge(instance, new_instance, session)
+                instance.updated_at = instance.new_timestamp()
+                after = Version(instance)
+            self._invalidate(identifier)
         return instance, before - after
 
     async def replace(self, identifier, new_instance):
         """
-        Create or update a model.
+        Create or update a model, in a single statement.
+
+        Stores that override `create`, `update` or `merge` (e.g. to encrypt fields)
+        go through them instead.
         """
-        try:
-            # Note that `self.update()` ultimately calls merge, which will not enforce
-            # a strict replacement; absent fields will default to the current values.
-            return await self.update(identifier, new_instance)
-        except ModelNotFoundError:
-            return await self.create(new_instance)
+        if self._overrides("create", "update", "merge"):
+            try:
+                # Note that `self.update()` ultimately calls merge, which will not enforce
+                # a strict replacement; absent fields will default to the current values.
+                return await self.update(identifier, new_instance)
+            except ModelNotFoundError:
+                return await self.create(new_instance)
+
+        # Likewise, `self.upsert()` only updates the fields that are set on the new instance
+        new_instance.id = identifier
+        return await self.upsert(new_instance)
+
+    @store_metric_timing(action="create_many")
+    async def create_many(self, instances, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Create many model instances, issuing one multi-row INSERT per chunk.
+        """
+        return await self._insert_many(instances, chunk_size=chunk_size)
+
+    @store_metric_timing(action="upsert")
+    async def upsert(self, instance, index_elements=None):
+        """
+        Create a model instance or update the conflicting one, in a single statement.
+        :param index_elements: the conflict target; defaults to the primary key
+        """
+        instances = await self._insert_many(
+            [instance],
+            on_conflict_update=True,
+            index_elements=index_elements,
+        )
+        return instances[0]
+
+    @store_metric_timing(action="upsert_many")
+    async def upsert_many(self, instances, index_elements=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Create or update many model instances, issuing one multi-row
+        `INSERT ... ON CONFLICT DO UPDATE` per chunk.
+        :param index_elements: the conflict target; defaults to the primary key
+        """
+        return await self._insert_many(
+            instances,
+            on_conflict_update=True,
+            index_elements=index_elements,
+            chunk_size=chunk_size,
+        )
+
+    @store_metric_timing(action="copy_in")
+    async def copy_in(self, records, upsert=False, index_elements=None):
+        """
+        Create many models with a (binary) COPY, streaming the records to the database.
+
+        Records are model instances or dicts of their fields, from an iterable or an async
+        iterable; ids and Python-side column defaults (e.g. timestamps) are assigned as
+        `create_many` does. Returns the number of rows written.
+
+        Rows are staged in a temporary table, and inserted from there, when the table has
+        columns with only a server default (which applies to the rows that leave them
+        unset), or with `upsert`, which overwrites the columns (but the primary key and
+        `created_at`) of conflicting rows; each conflict target may only appear once.
+        :param index_elements: the conflict target; defaults to the primary key
+        """
+        table = self.model_class.__table__
+        server_defaults = {
+            column.key
+            for column in table.c
+            if column.default is None and column.server_default is not None
+        }
+
+        async def rows(processors):
+            async for record in iterate(records):
+                instance = self.model_class(**record) if isinstance(record, dict) else record
+                values = self._insert_values(instance)
+                for key in server_defaults:
+                    # Left unset (NULL), the server default applies once staged
+                    values[key] = getattr(instance, key, None)
+                yield process_row((values[column.key] for column in table.c), processors)
 
-    @postgres_metric_timing(action="delete")
+        async with self.with_transaction() as session:
+            async with self.flushing(session):
+                connection = await driver_connection(session)
+                dialect = session.get_bind().dialect
+                copied = rows(bind_processors(table.c, dialect))
+                if upsert or server_defaults:
+                    status = await self._copy_staged(session, connection, copied, upsert, index_elements)
+                else:
+                    try:
+                        status = await connection.copy_records_to_table(
+                            table.name,
+                            records=copied,
+                            columns=[column.name for column in table.c],
+                            schema_name=table.schema,
+                        )
+                    except IntegrityConstraintViolationError as error:
+                        raise IntegrityError(f"COPY {table.name}", None, error)
+        return copied_rows(status)
+
+    @store_metric_timing(action="delete")
     async def delete(self, identifier):
         """
         Delete a model by primary key.
@@ -159,65 +494,324 @@ class StoreAsync:
         """
         return await self._delete(self.model_class.id == identifier)
 
-    @postgres_metric_timing(action="count")
-    async def count(self, *criterion, **kwargs):
+    @store_metric_timing(action="count")
+    async def count(self, *criterion, primary=False, **kwargs):
         """
-        Count the number of models matching some criterion.
+        Count the number of models matching some criterion, following the store's
+        count strategy; estimated counts are approximate.
         """
         query = self._query(*criterion)
-        query = self._where(query, **kwargs).subquery()
-        query = select(func.count(query.c.id))
-        return await self.get_first(query)
+        query = self._where(query, **kwargs)
+
+        if self.count_strategy == CountStrategy.ESTIMATE:
+            return await self._estimate_count(query, primary=primary)
+
+        await self._guard_cost(query, primary=primary)
+        if self.count_strategy == CountStrategy.CACHED:
+            return await self._cached_count(query, primary=primary)
+        return await self._exact_count(query, primary=primary)
 
-    @postgres_metric_timing(action="search")
-    async def search(self, *criterion, **kwargs):
+    @store_metric_timing(action="search")
+    async def search(self, *criterion, primary=False, fields=None, **kwargs):
         """
         Return the list of models matching some criterion.
         :param offset: pagination offset, if any
         :param limit: pagination limit, if any
+        :param after: pagination cursor; passing `after` or `before` (even as None)
+                      selects keyset pagination, ordered by `self._keyset_columns()`
+        :param before: pagination cursor, for the page preceding a row
+        :param primary: read from the primary even if a replica is available
+        :param fields: the names of the only columns to load, if any
+        """
+        query = self._query(*criterion)
+        query = self._project(query, fields)
+        query = self._order_by(query, **kwargs)
+        query = self._where(query, **kwargs)
+        # NB: pagination must go last
+        query = self._paginate(query, **kwargs)
+
+        await self._guard_cost(query, primary=primary)
+        items = await self.get_all(query, primary=primary)
+        if kwargs.get("before") is not None:
+            # Pages before a cursor are fetched backwards
+            items.reverse()
+        return items
+
+    @store_metric_timing(action="stream")
+    async def stream(self, *criterion, chunk_size=DEFAULT_CHUNK_SIZE, primary=False, fields=None, **kwargs):
+        """
+        Yield the models matching some criterion, fetched `chunk_size` rows at a time
+        through a server-side cursor, so memory stays flat regardless of the result size.
+        Streams use their own session, as they may outlive the current unit of work.
+        :param offset: pagination offset, if any
+        :param limit: pagination limit, if any
+        :param after: pagination cursor, if any
         """
         query = self._query(*criterion)
+        query = self._project(query, fields)
         query = self._order_by(query, **kwargs)
         query = self._where(query, **kwargs)
         # NB: pagination must go last
         query = self._paginate(query, **kwargs)
 
-        return await self.get_all(query)
+        await self._guard_cost(query, primary=primary)
+        async with self.with_session(primary, join=False) as session:
+            results = await session.stream(query.execution_options(yield_per=chunk_size))
+            async for partition in results.scalars().partitions():
+                for instance in partition:
+                    yield instance
 
-    @postgres_metric_timing(action="search_first")
-    async def search_first(self, *criterion, **kwargs):
+    @store_metric_timing(action="copy_out")
+    async def copy_out(self, *criterion, format=CopyFormat.CSV, primary=False, **kwargs):
+        """
+        Yield the rows matching some criterion, encoded by a `COPY (...) TO STDOUT` as the
+        database sends them; rows are neither loaded as models nor buffered.
+        Exports use their own session, as they may outlive the current unit of work.
+        :param format: a `CopyFormat`; NDJSON objects are keyed by column name
+        """
+        query = self._query(*criterion)
+        query = self._order_by(query, **kwargs)
+        query = self._where(query, **kwargs)
+        # NB: pagination must go last
+        query = self._paginate(query, **kwargs)
+        # Copy the table's columns, not the (eager loaded) relationships
+        query = query.with_only_columns(*self.model_class.__table__.c)
+
+        await self._guard_cost(query, primary=primary)
+        async with self.with_session(primary, join=False) as session:
+            statement, parameters = compile_query(query, session.get_bind().dialect)
+            chunks = copy_from_query(session, statement, parameters, CopyFormat(format))
+            try:
+                async for chunk in chunks:
+                    yield chunk
+            finally:
+                # Stop the COPY before the session closes
+                await chunks.aclose()
+
+    @store_metric_timing(action="search_with_count")
+    async def search_with_count(self, *criterion, primary=False, fields=None, **kwargs):
+        """
+        Return the list of models matching some criterion along with their total count.
+
+        Offset pages fetch the total in the same round trip as the items, using a
+        `count(*) OVER ()` window; keyset pages fall back to a separate count.
+        """
+        if self.count_strategy != CountStrategy.EXACT or "after" in kwargs or "before" in kwargs:
+            items = await self.search(*criterion, primary=primary, fields=fields, **kwargs)
+            return items, await self.count(*criterion, primary=primary, **kwargs)
+        if kwargs.get("limit") is None and kwargs.get("offset") is None:
+            # Every match is returned; NB: only paged queries are nested before joined
+            # eager loads, which the window would otherwise count once per child
+            items = await self.search(*criterion, primary=primary, fields=fields, **kwargs)
+            return items, len(items)
+
+        query = self._query(*criterion).add_columns(func.count().over())
+        query = self._project(query, fields)
+        query = self._order_by(query, **kwargs)
+        query = self._where(query, **kwargs)
+        # NB: pagination must go last
+        query = self._paginate(query, **kwargs)
+
+        await self._guard_cost(query, primary=primary)
+        async with self.with_session(primary) as session:
+            results = (await session.execute(query)).unique().all()
+
+        if results:
+            return [response[0] for response in results], results[0][1]
+        if kwargs.get("offset"):
+            # A page past the end carries no rows, and so no total
+            return [], await self.count(*criterion, primary=primary, **kwargs)
+        return [], 0
+
+    @store_metric_timing(action="search_first")
+    async def search_first(self, *criterion, primary=False, fields=None, **kwargs):
         """
         Returns the first match based on criteria or None.
         """
         query = self._query(*criterion)
+        query = self._project(query, fields)
         query = self._order_by(query, **kwargs)
         query = self._where(query, **kwargs)
         # NB: pagination must go last
         query = self._paginate(query, **kwargs)
 
-        return await self.get_first(query)
+        return await self.get_first(query, primary=primary)
+
+    async def warm_up(self):
+        """
+        Run the store's common queries once, e.g. so that their statements are
+        prepared before the first request.
+
+        Stores override this to warm up their own common queries.
+        """
+        await self.search(limit=1)
+        await self.count()
 
     async def expunge(self, instance):
-        async with self.session_maker() as session:
-            return session.expunge(instance)
+        # NB: the instance may have been loaded from either the primary or the replica
+        session = object_session(instance)
+        if session is not None:
+            session.expunge(instance)
 
     async def merge(self, instance, new_instance, session):
         await session.merge(new_instance)
 
-    async def get_all(self, query):
-        async with self.session_maker() as session:
-            results = await session.execute(query)
+    async def get_all(self, query, primary=False):
+        async with self.with_session(primary) as session:
+            results = self._unique(await session.execute(query), query)
             return [response[0] for response in results.all()]
 
-    async def get_first(self, query):
-        async with self.session_maker() as session:
-            results = await session.execute(query)
+    async def get_first(self, query, primary=False):
+        async with self.with_session(primary) as session:
+            results = self._unique(await session.execute(query), query)
             first_result = results.first()
 
         if not first_result:
             return None
         return first_result[0]
 
+    async def _exact_count(self, query, primary=False):
+        query = query.subquery()
+        query = select(func.count(query.c.id))
+        return await self.get_first(query, primary=primary)
+
+    async def _estimate_count(self, query, primary=False):
+        """
+        Estimate a count from planner statistics, without visiting the matching rows.
+        """
+        async with self.with_session(primary) as session:
+            if query.whereclause is not None:
+                plan = await explain(session, query)
+                return plan["Plan"]["Plan Rows"]
+
+            reltuples = await session.scalar(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table_name AS regclass)"),
+                dict(table_name=self.model_class.__table__.fullname),
+            )
+
+        # Tables that were never analyzed have no statistics
+        if reltuples is None or reltuples < 0:
+            return await self._exact_count(query, primary=primary)
+        return reltuples
+
+    async def _cached_count(self, query, primary=False):
+        """
+        Memoize exact counts per filter set; writes through the store invalidate them.
+        """
+        context = SessionContextAsync.current()
+        if context is not None and context.written:
+            # Counts that include uncommitted writes must not be shared
+            return await self._exact_count(query, primary=primary)
+
+        key = self._query_key(query)
+        count = self.count_cache.get(key)
+        if count is None:
+            count = await self._exact_count(query, primary=primary)
+            self.count_cache.set(key, count)
+        return count
+
+    def _shares_reads(self, primary=False):
+        """
+        Whether reads may be shared across units of work (through caching or batching).
+
+        Reads from the primary, and reads after the unit of work has written, must
+        see the unit of work's own state.
+        """
+        if primary:
+            return False
+
+        context = SessionContextAsync.current()
+        return context is None or not context.written
+
+    async def _guard_cost(self, query, primary=False):
+        """
+        Reject queries the planner estimates to cost more than the route's budget.
+
+        Estimates are memoized per query shape (i.e. regardless of bound values) and
+        page size, which the planner weighs.
+        """
+        query_guard = current_query_guard.get()
+        if query_guard is None or query_guard.max_cost is None:
+            return
+
+        shape = (str(query.compile(dialect=postgresql.dialect())), query._limit)
+        cost = self.plan_cost_cache.get(shape)
+        if cost is None:
+            async with self.with_session(primary) as session:
+                plan = await explain(session, query)
+            cost = plan["Plan"]["Total Cost"]
+            self.plan_cost_cache.set(shape, cost)
+
+        if cost > query_guard.max_cost:
+            raise QueryTooExpensiveError(
+                f"Query is too expensive (estimated cost {cost:.0f}, budget {query_guard.max_cost:.0f}); "
+                "narrow its filters or page size",
+            )
+
+    def _unique(self, results, query):
+        """
+        Unique the rows of a query for models, which joined eager loads of collections
+        (e.g. `joinedload(Model.children)`) repeat once per child.
+
+        Rows of other queries (e.g. of columns) are left as is.
+        """
+        if all(description["expr"] is description["entity"] for description in query.column_descriptions):
+            return results.unique()
+        return results
+
+    def _overrides(self, *names):
+        """
+        Whether the store's class overrides any of some methods.
+        """
+        return any(
+            getattr(type(self), name) is not getattr(StoreAsync, name)
+            for name in names
+        )
+
+    def _query_key(self, query):
+        """
+        Normalize a query into a hashable cache key.
+        """
+        compiled = query.compile(dialect=postgresql.dialect())
+        return (str(compiled), repr(sorted(compiled.params.items())))
+
+    def _invalidate(self, *identifiers):
+        """
+        Drop cached retrieves of rows written by the current unit of work.
+
+        Entries are dropped right away and again once the unit of work commits, so
+        that reads racing the commit cannot leave stale rows behind.
+        """
+        if self.retrieve_cache is None:
+            return
+
+        self.retrieve_cache.invalidate(*identifiers)
+        SessionContextAsync.current().after_commit(
+            partial(self.retrieve_cache.invalidate, *identifiers),
+        )
+
+    def _project(self, query, fields=None):
+        """
+        Load only the columns backing some fields, along with the primary key and
+        keyset columns.
+
+        Every column is loaded if any field is not a mapped column (e.g. a property),
+        as it may read any of them.
+        """
+        if not fields:
+            return query
+
+        column_attrs = inspect(self.model_class).column_attrs
+        if any(field not in column_attrs for field in fields):
+            return query
+
+        keyset_columns, _ = self._keyset()
+        keys = set(fields) | {column.key for column in keyset_columns}
+        return query.options(load_only(*[
+            getattr(self.model_class, key)
+            for key in sorted(keys)
+        ]))
+
     def _order_by(self, query, **kwargs):
         """
         Add an order by clause to a (search) query.
@@ -233,17 +827,59 @@ class StoreAsync:
         return query
 
     def _auto_where(self, query, **kwargs):
+        """
+        Filter a query on the `auto_filter_fields`, with the operators they declare
+        (e.g. `toppings__in=[...]`).
+        """
         for key, value in kwargs.items():
             if value is None:
                 continue
-            field = self.auto_filters.get(key)
-            if field is None:
+            try:
+                name, operator = parse_filter_key(key)
+            except ValueError:
+                continue
+            auto_filter = self.auto_filters.get(name)
+            if auto_filter is None or operator not in auto_filter.operators:
                 continue
-            query = query.filter(field == value)
+            query = query.filter(auto_filter.clause(operator, value))
 
         return query
 
+    def _keyset_columns(self, **kwargs):
+        """
+        The columns that order (search) queries under keyset pagination.
+        Together they must be unique; wrap every column with `desc()` to page newest first.
+        """
+        return (self.model_class.created_at, self.model_class.id)
+
+    def _keyset(self, **kwargs):
+        """
+        Return the keyset columns and whether they are in descending order.
+        """
+        columns, directions = [], set()
+        for column in self._keyset_columns(**kwargs):
+            descending = isinstance(column, UnaryExpression) and column.modifier == operators.desc_op
+            columns.append(column.element if descending else column)
+            directions.add(descending)
+
+        if len(directions) > 1:
+            raise ValueError("Keyset columns must all be ordered in the same direction")
+        return columns, directions.pop()
+
+    def cursor_for(self, instance):
+        """
+        Encode the keyset pagination cursor that points at an instance.
+        """
+        columns, _ = self._keyset()
+        return encode_cursor([
+            getattr(instance, column.key)
+            for column in columns
+        ])
+
     def _paginate(self, query, **kwargs):
+        if "after" in kwargs or "before" in kwargs:
+            return self._paginate_by_cursor(query, **kwargs)
+
         offset, limit = kwargs.get("offset"), kwargs.get("limit")
         if offset is not None:
             query = query.offset(offset)
@@ -252,15 +888,140 @@ class StoreAsync:
 
         return query
 
-    async def _retrieve(self, *criterion):
+    def _paginate_by_cursor(self, query, **kwargs):
+        """
+        Seek past a cursor instead of scanning and discarding `offset` rows.
+        """
+        after, before, limit = kwargs.get("after"), kwargs.get("before"), kwargs.get("limit")
+        if after is not None and before is not None:
+            raise InvalidCursorError("Only one of `after` and `before` may be set")
+
+        columns, descending = self._keyset(**kwargs)
+        # Walking backwards from `before` flips the sort order
+        descending = descending != (before is not None)
+
+        cursor = after if before is None else before
+        if cursor is not None:
+            values = decode_cursor(cursor)
+            if len(values) != len(columns):
+                raise InvalidCursorError("Invalid cursor: {}".format(cursor))
+
+            keys = tuple_(*columns)
+            bound = tuple_(*[
+                literal(value, type_=column.type)
+                for column, value in zip(columns, values)
+            ])
+            query = query.where(keys < bound if descending else keys > bound)
+
+        query = query.order_by(None).order_by(*[
+            column.desc() if descending else column.asc()
+            for column in columns
+        ])
+        if limit is not None:
+            query = query.limit(limit)
+
+        return query
+
+    async def _retrieve(self, *criterion, primary=False, fields=None):
         """
         Retrieve a model by some criteria.
+
+        With retrieve caching enabled, returns a detached copy of the cached row,
+        unless reading from the primary or after the unit of work has written, or
+        loading relationships, which are not cached.
         :raises `ModelNotFoundError` if the row cannot be deleted.
         """
+        query = self._query(*criterion)
+
+        if fields:
+            # Partially loaded rows are not cached
+            return await self._retrieve_one(self._project(query, fields), primary=primary)
+        if self.retrieve_cache is None or not self._shares_reads(primary) or self._relationship_loader_options():
+            return await self._retrieve_one(query, primary=primary)
+
+        snapshot = await self.retrieve_cache.get_or_load(
+            self._query_key(query),
+            partial(self._load_snapshot, query),
+        )
+        return self._from_snapshot(snapshot)
+
+    async def _load_snapshot(self, query):
+        """
+        Load the column values of a row to cache, along with its identifier.
+        """
+        # Load in a short-lived session, outside of the caller's unit of work;
+        # this runs in its own task, so the caller's context is left untouched.
+        SessionContextAsync.current_context.set(None)
+        instance = await self._retrieve_one(query)
+        return instance.id, self._snapshot(instance)
+
+    async def _load_batched_snapshot(self, identifier):
+        snapshot = await self.retrieve_batcher.load(str(identifier))
+        return snapshot["id"], snapshot
+
+    def _snapshot(self, instance):
+        return {
+            attribute.key: getattr(instance, attribute.key)
+            for attribute in inspect(self.model_class).column_attrs
+        }
+
+    def _from_snapshot(self, snapshot):
+        """
+        Build a detached instance from cached column values.
+
+        Relationships are not cached and cannot be lazy loaded from the copy.
+        """
+        instance = inspect(self.model_class).class_manager.new_instance()
+        for key, value in snapshot.items():
+            setattr(instance, key, value)
+        make_transient_to_detached(instance)
+        return instance
+
+    async def _load_batch(self, identifiers):
+        """
+        Load the column values of a batch of rows, shared by every waiter.
+        """
+        # Load in a short-lived session, outside of any caller's unit of work;
+        # this runs in its own task, so the callers' contexts are left untouched.
+        SessionContextAsync.current_context.set(None)
+        instances = await self._retrieve_by_ids(identifiers)
+        return {
+            key: self._snapshot(instance)
+            for key, instance in instances.items()
+        }
+
+    async def _retrieve_by_ids(self, identifiers, primary=False):
+        """
+        Retrieve models by primary key, keyed by their (string) identifiers.
+        """
+        if not identifiers:
+            return dict()
+
+        query = self._query(
+            self.model_class.id == any_(
+                bindparam(
+                    "ids",
+                    list(identifiers),
+                    type_=postgresql.ARRAY(self.model_class.id.type),
+                ),
+            ),
+        )
+        return {
+            str(instance.id): instance
+            for instance in await self.get_all(query, primary=primary)
+        }
+
+    def _not_found(self, identifier):
+        return ModelNotFoundError(
+            "{} not found".format(
+                self.model_class.__name__,
+            ),
+        )
+
+    async def _retrieve_one(self, query, primary=False):
         try:
-            query = self._query(*criterion)
-            async with self.session_maker() as session:
-                results = await session.execute(query)
+            async with self.with_session(primary) as session:
+                results = self._unique(await session.execute(query), query)
                 return results.one()[0]
         except NoResultFound as error:
             raise ModelNotFoundError(
@@ -270,31 +1031,261 @@ class StoreAsync:
                 error,
             )
 
+    async def _update_returning(self, identifier, new_instance):
+        """
+        Update the fields set on the new instance with a single `UPDATE ... RETURNING`.
+        :raises `ModelNotFoundError` if there is no existing model
+        """
+        values = self._set_values(new_instance)
+        values.pop("id", None)
+        values["updated_at"] = new_instance.new_timestamp()
+
+        statement = update(
+            self.model_class.__table__,
+        ).where(
+            self.model_class.id == identifier,
+        ).values(
+            **values,
+        ).returning(
+            *self.model_class.__table__.c,
+        )
+        query = select(self.model_class).from_statement(
+            statement,
+        ).execution_options(populate_existing=True)
+
+        async with self.with_transaction() as session:
+            async with self.flushing(session):
+                instance = (await session.execute(query)).scalar_one_or_none()
+            self._invalidate(identifier)
+
+        if instance is None:
+            raise ModelNotFoundError(
+                "{} not found".format(
+                    self.model_class.__name__,
+                ),
+            )
+        return instance
+
     async def _delete(self, *criterion):
         """
-        Delete a model by some criterion.
+        Delete models by some criterion with a single `DELETE ... RETURNING`.
+        Note that ORM-level cascades are not applied; rely on database foreign keys.
+        :raises `ModelNotFoundError` if no row was deleted.
         """
-        query = self._query(*criterion)
-        async with self.session_maker() as session:
-            async with self.with_transaction(session):
-                async with self.flushing(session):
-                    count = len(
-                        [
-                            await session.delete(row[0])
-                            for row in await session.execute(query)
-                        ]
-                    )
-        if count == 0:
+        statement = delete(
+            self.model_class,
+        ).where(
+            *criterion,
+        ).returning(
+            self.model_class.id,
+        ).execution_options(
+            synchronize_session=False,
+        )
+        async with self.with_transaction() as session:
+            async with self.flushing(session):
+                identifiers = (await session.execute(statement)).scalars().all()
+
+            # Drop deleted rows from the unit of work so they are not flushed again
+            for identifier in identifiers:
+                instance = session.identity_map.get(identity_key(self.model_class, identifier))
+                if instance is not None:
+                    session.expunge(instance)
+            self._invalidate(*identifiers)
+
+        if not identifiers:
             raise ModelNotFoundError
         return True
 
+    async def _insert_many(
+        self,
+        instances,
+        on_conflict_update=False,
+        index_elements=None,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+    ):
+        """
+        Insert instances with `INSERT ... RETURNING`, optionally updating on conflict.
+        Returns the persisted models, in the order returned by the database.
+        """
+        instances = list(instances)
+        if not instances:
+            return []
+
+        table = self.model_class.__table__
+
+        # Only the fields that were explicitly set are updated on conflict, so rows
+        # are grouped by the fields they set; plain inserts form a single group.
+        groups = dict()
+        for instance in instances:
+            update_keys = frozenset(self._set_values(instance) if on_conflict_update else ())
+            groups.setdefault(update_keys, []).append(self._insert_values(instance))
+
+        # Stay below the bind parameter limit for wide tables
+        chunk_size = max(1, min(chunk_size, MAX_BIND_PARAMETERS // len(table.c)))
+
+        results = []
+        async with self.with_transaction() as session:
+            async with self.flushing(session):
+                for update_keys, rows in groups.items():
+                    for offset in range(0, len(rows), chunk_size):
+                        statement = insert(table).values(rows[offset:offset + chunk_size])
+                        if on_conflict_update:
+                            statement = self._on_conflict_update(statement, update_keys, index_elements)
+                        query = select(self.model_class).from_statement(
+                            statement.returning(*table.c),
+                        ).execution_options(populate_existing=True)
+                        results.extend(
+                            response[0]
+                            for response in (await session.execute(query)).all()
+                        )
+            self._invalidate(*(instance.id for instance in results))
+        return results
+
+    async def _copy_staged(self, session, connection, records, upsert=False, index_elements=None):
+        """
+        COPY rows into a temporary table, then insert them from there, filling in server
+        defaults and optionally updating on conflict.
+        Returns the status of the COPY.
+        """
+        table = self.model_class.__table__
+        staging_table = Table(
+            f"{table.name}_copy_{self.new_object_id().hex}",
+            MetaData(),
+            *(Column(column.name, column.type, key=column.key) for column in table.c),
+            prefixes=["TEMPORARY"],
+            postgresql_on_commit="DROP",
+        )
+        await session.execute(CreateTable(staging_table))
+
+        status = await connection.copy_records_to_table(
+            staging_table.name,
+            records=records,
+            columns=[column.name for column in table.c],
+        )
+
+        dialect = session.get_bind().dialect
+        ddl_compiler = dialect.ddl_compiler(dialect, None)
+        values = [
+            func.coalesce(
+                staging_column,
+                literal_column(ddl_compiler.get_column_default_string(column), type_=column.type),
+            ) if column.default is None and column.server_default is not None else staging_column
+            for column, staging_column in zip(table.c, staging_table.c)
+        ]
+
+        keys = [column.key for column in table.c]
+        statement = insert(table).from_select(keys, select(*values))
+        if upsert:
+            statement = self._on_conflict_update(statement, keys, index_elements)
+        if self.retrieve_cache is None:
+            await session.execute(statement)
+        else:
+            # Invalidate the rows written, whose ids are kept on conflict
+            result = await session.execute(statement.returning(table.c.id))
+            self._invalidate(*result.scalars().all())
+        return status
+
+    def _set_values(self, instance):
+        """
+        Return the column values that were explicitly set on an instance.
+        """
+        return {
+            key: value
+            for key, value in instance.__dict__.items()
+            if key in self.model_class.__table__.c
+        }
+
+    def _insert_values(self, instance):
+        """
+        Build the column values to insert for an instance, assigning an id if needed.
+
+        Python-side column defaults are applied here so that every row of a
+        multi-row INSERT binds the same columns.
+        """
+        if instance.id is None:
+            instance.id = self.new_object_id()
+
+        values = dict()
+        for column in self.model_class.__table__.c:
+            value = getattr(instance, column.key, None)
+            if value is None and column.default is not None:
+                value = column.default.arg(None) if column.default.is_callable else column.default.arg
+            elif value is None and column.server_default is not None:
+                value = literal_column("DEFAULT")
+            values[column.key] = value
+        return values
+
+    def _on_conflict_update(self, statement, update_keys, index_elements=None):
+        table = self.model_class.__table__
+        primary_key = [column.key for column in table.primary_key]
+        index_elements = index_elements or primary_key
+
+        # Conflicting rows keep their identity, even for another conflict target
+        set_ = {
+            key: statement.excluded[key]
+            for key in update_keys
+            if key not in index_elements and key not in primary_key and key != "created_at"
+        }
+        if "updated_at" in table.c:
+            set_["updated_at"] = statement.excluded.updated_at
+        if not set_:
+            # DO NOTHING would not return the conflicting row
+            set_ = {key: statement.excluded[key] for key in index_elements}
+
+        return statement.on_conflict_do_update(
+            index_elements=index_elements,
+            set_=set_,
+        )
+
     def _query(self, *criterion):
         """
-        Construct a query for the model.
+        Construct a query for the model, with the loader options of the current operation.
         """
         query = select(self.model_class)
 
         if criterion:
             query = query.where(*criterion)
 
-        return query
+        return query.options(*self._loader_options())
+
+    def _relationship_loader_options(self):
+        """
+        The relationship loader options of the current operation: those declared by
+        `configure_crud`, else by the store for the operation, else for every read.
+        """
+        options = self.loader_options
+
+        loading_context = current_loading_context.get()
+        if loading_context is not None and loading_context.subject is self.model_class:
+            if loading_context.loader_options is not None:
+                options = loading_context.loader_options
+            else:
+                options = self.operation_loader_options.get(loading_context.operation, options)
+
+        return options
+
+    def _loader_options(self):
+        """
+        The loader options of the current operation's queries.
+
+        In debug mode (`session_maker_async.raise_on_lazy_load`), any relationship but
+        those the operation loads raises when accessed instead of being lazy loaded;
+        writes, which may need to load relationships to merge them, are exempt.
+        """
+        options = self._relationship_loader_options()
+
+        context = SessionContextAsync.current()
+        if self.raise_on_lazy_load and (context is None or not context.written):
+            options = (*options, raiseload("*"))
+
+        return options
+
+
+def iter_stores(graph):
+    """
+    Iterate over the (async) stores of an object graph.
+
+    """
+    for _, component in graph.items():
+        if isinstance(component, StoreAsync):
+            yield component
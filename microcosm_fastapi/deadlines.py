@@ -0,0 +1,156 @@
+"""
+Request deadlines.
+
+Clients send their remaining budget (in milliseconds) in the `X-Request-Deadline`
+header; `configure_crud` may also give operations a default budget. Routes are
+cancelled once the (earliest) deadline passes, failing with a retryable 504, and
+the sessions `StoreAsync` opens meanwhile bound their statements with
+`SET LOCAL statement_timeout`, so that abandoned queries release their connections.
+
+"""
+from asyncio import TimeoutError, wait_for
+from contextvars import ContextVar
+from time import monotonic
+from typing import Optional
+
+from asyncpg.exceptions import QueryCanceledError
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from microcosm.api import defaults
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from microcosm_fastapi.errors import ClientError, ParsedException
+
+
+DEADLINE_HEADER = "X-Request-Deadline"
+SESSION_DEADLINE = "deadline"
+# SQLSTATE of cancelled statements
+QUERY_CANCELED = "57014"
+
+# The (monotonic) time by which the current request must complete, if any
+current_deadline: ContextVar = ContextVar("deadline", default=None)
+
+
+class DeadlineExceededError(ClientError):
+    """
+    A request did not complete within its (client's) deadline.
+
+    """
+    @property
+    def status_code(self):
+        # gateway timeout
+        return 504
+
+    @property
+    def retryable(self):
+        return True
+
+
+class InvalidDeadlineError(ClientError):
+    pass
+
+
+def remaining_time(deadline: float) -> float:
+    """
+    Seconds left until a deadline.
+
+    """
+    return deadline - monotonic()
+
+
+def earliest_deadline(timeout: Optional[float]) -> Optional[float]:
+    """
+    The current deadline, brought forward to `timeout` seconds from now.
+
+    """
+    deadline = current_deadline.get()
+    if timeout is None:
+        return deadline
+
+    default_deadline = monotonic() + timeout
+    return default_deadline if deadline is None else min(deadline, default_deadline)
+
+
+async def run_within_deadline(awaitable, deadline: float):
+    """
+    Await a route's coroutine, cancelling it once its deadline passes.
+
+    """
+    remaining = remaining_time(deadline)
+    if remaining <= 0:
+        awaitable.close()
+        raise DeadlineExceededError("Request deadline exceeded")
+
+    try:
+        return await wait_for(awaitable, remaining)
+    except TimeoutError:
+        raise DeadlineExceededError("Request deadline exceeded")
+    except (DBAPIError, QueryCanceledError) as error:
+        # Statements cancelled by the `statement_timeout` of the deadline
+        if is_query_canceled(error) and remaining_time(deadline) <= 0:
+            raise DeadlineExceededError("Request deadline exceeded") from error
+        raise
+
+
+def is_query_canceled(error) -> bool:
+    """
+    Whether an error cancelled a statement, e.g. for its `statement_timeout`.
+
+    """
+    if isinstance(error, DBAPIError):
+        error = error.orig
+    return isinstance(error, QueryCanceledError) or getattr(error, "pgcode", None) == QUERY_CANCELED
+
+
+async def apply_deadline(session):
+    """
+    Bound the statements of a session's transaction by the current deadline.
+
+    """
+    deadline = current_deadline.get()
+    if deadline is None or session.info.get(SESSION_DEADLINE) == deadline:
+        return
+
+    remaining = remaining_time(deadline)
+    if remaining <= 0:
+        raise DeadlineExceededError("Request deadline exceeded")
+
+    # NB: `SET` does not take bind parameters
+    statement_timeout = max(int(remaining * 1000), 1)
+    await session.execute(text(f"SET LOCAL statement_timeout = {statement_timeout}"))
+    session.info[SESSION_DEADLINE] = deadline
+
+
+def create_deadline_middleware(header: str):
+    async def deadline_middleware(request: Request, call_next):
+        value = request.headers.get(header)
+        if value is None:
+            return await call_next(request)
+
+        try:
+            budget = float(value)
+        except ValueError:
+            parsed_exception = ParsedException(InvalidDeadlineError(f"Invalid {header} header: {value}"))
+            return JSONResponse(status_code=parsed_exception.status_code, content=parsed_exception.to_dict())
+
+        # Routes run in a task that copies this context
+        token = current_deadline.set(monotonic() + budget / 1000)
+        try:
+            return await call_next(request)
+        finally:
+            current_deadline.reset(token)
+
+    return deadline_middleware
+
+
+@defaults(
+    # Header carrying the client's remaining budget, in milliseconds
+    header=DEADLINE_HEADER,
+)
+def configure_deadline_middleware(graph):
+    """
+    Configure deadline middleware; `configure_crud` routes enforce the deadlines.
+
+    """
+    graph.app.middleware("http")(create_deadline_middleware(graph.config.deadline_middleware.header))
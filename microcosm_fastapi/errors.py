@@ -18,6 +18,22 @@ class ErrorSchema(BaseSchema):
     context: Optional[ErrorContextSchema]
 
 
+class ClientError(Exception):
+    """
+    An error of the client's request (e.g. an invalid parameter) rather than of the
+    application, so that no stack trace is logged.
+
+    """
+    @property
+    def status_code(self):
+        # bad request
+        return 400
+
+    @property
+    def include_stack_trace(self):
+        return False
+
+
 class ParsedException:
     def __init__(self, error):
         self.error = error
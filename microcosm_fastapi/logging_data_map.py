@@ -2,6 +2,7 @@
 Used to store information that useful for audit logging purposes
 
 """
+from contextvars import ContextVar
 from typing import Optional, Tuple
 from dataclasses import dataclass
 
@@ -15,14 +16,19 @@ class LoggingInfo:
     function_name: Optional[str] = None
 
 
+# The logging info of the route serving the current request
+current_logging_info: ContextVar = ContextVar("logging_info", default=None)
+
+
 class LoggingDataMap:
     def __init__(self):
         self.data_map = {}
 
-    def add_entry(self, namespace: Namespace, operation: OperationInfo, function_name: str):
+    def add_entry(self, namespace: Namespace, operation: OperationInfo, function_name: str) -> LoggingInfo:
         operation_name = namespace.generate_operation_name_for_logging(operation)
         key = self._generate_key_from_namespace(namespace, operation.method)
-        self.data_map[key] = LoggingInfo(operation_name, function_name)
+        logging_info = self.data_map[key] = LoggingInfo(operation_name, function_name)
+        return logging_info
 
     def get_entry(self, url_path: str, operation_method: str) -> LoggingInfo:
         key = self._generate_key_from_path_url(url_path, operation_method)
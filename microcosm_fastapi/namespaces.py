@@ -12,6 +12,8 @@ class Namespace:
     version: Optional[str] = None
     prefix: str = "api"
     object_: Optional[Any] = None
+    # The named connection pool (see `postgres_async_pools`) for the routes' stores
+    pool_name: Optional[str] = None
 
     @property
     def path(self) -> str:
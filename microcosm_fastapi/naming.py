@@ -33,9 +33,10 @@ def to_camel(snake_str):
 def join_url_with_parameters(url, params):
     url_parts = list(urlparse(url))
 
-    # Merge in new params with the previous params
+    # Merge in new params with the previous params; None removes a param
     query = dict(parse_qsl(url_parts[4]))
     query.update(params)
+    query = {key: value for key, value in query.items() if value is not None}
 
     url_parts[4] = urlencode(query)
 
@@ -69,6 +70,14 @@ def instance_path_for(name: Any, identifier_key:str = None) -> str:
         return f"/{name_for(name)}/{{{name_for(name)}_id}}"
 
 
+def export_path_for(name: Any) -> str:
+    """
+    Get a path for an export of things.
+
+    """
+    return f"/{name_for(name)}/export"
+
+
 def alias_path_for(name):
     """
     Get a path for an alias to a thing
@@ -5,6 +5,7 @@ from typing import Callable
 
 from microcosm_fastapi.naming import (
     collection_path_for,
+    export_path_for,
     instance_path_for,
     name_for,
     relation_path_for,
@@ -44,6 +45,7 @@ class Operation(Enum):
     UpdateBatch = OperationInfo("update_batch", "PATCH", OperationType.NODE_PATTERN, 200, collection_path_for)
     CreateCollection = OperationInfo("create_collection", "POST", OperationType.NODE_PATTERN, 200, collection_path_for)
     SavedSearch = OperationInfo("saved_search", "POST", OperationType.NODE_PATTERN, 200, collection_path_for)
+    Export = OperationInfo("export", "GET", OperationType.NODE_PATTERN, 200, export_path_for)
 
     # relation operations
     CreateFor = OperationInfo("create_for", "POST", OperationType.EDGE_PATTERN, 201, relation_path_for)
@@ -0,0 +1,124 @@
+"""
+Route context.
+
+`configure_crud` routes bind, for the code they call, what stores and instrumentation
+need to know about them: the operation they serve (see `microcosm_fastapi.database.loading`),
+their named pool, deadline and query guard, their logging info, and whether they have
+written (see `microcosm_fastapi.database.replica`).
+
+Streamed responses are iterated after their route returns, and so after its context
+is reset; capture it with `RouteContext.current` and iterate the stream with
+`RouteContext.iterate`.
+
+"""
+from asyncio import iscoroutinefunction
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from functools import wraps
+from typing import Any, AsyncIterator, Optional
+
+from microcosm_fastapi.database.guards import QueryGuard, current_query_guard
+from microcosm_fastapi.database.loading import LoadingContext, current_loading_context
+from microcosm_fastapi.database.pools import current_pool_name
+from microcosm_fastapi.database.replica import RequestWrites, current_request_writes
+from microcosm_fastapi.deadlines import current_deadline, earliest_deadline, run_within_deadline
+from microcosm_fastapi.logging_data_map import LoggingInfo, current_logging_info
+
+
+CONTEXT_VARS = dict(
+    loading_context=current_loading_context,
+    pool_name=current_pool_name,
+    query_guard=current_query_guard,
+    logging_info=current_logging_info,
+    deadline=current_deadline,
+    request_writes=current_request_writes,
+)
+
+
+@dataclass(frozen=True)
+class RouteContext:
+    loading_context: Optional[LoadingContext] = None
+    pool_name: Optional[str] = None
+    query_guard: Optional[QueryGuard] = None
+    logging_info: Optional[LoggingInfo] = None
+    # The (monotonic) time by which the request must complete, if any
+    deadline: Optional[float] = None
+    request_writes: Optional[RequestWrites] = None
+
+    @classmethod
+    def current(cls) -> "RouteContext":
+        return cls(**{
+            name: context_var.get()
+            for name, context_var in CONTEXT_VARS.items()
+        })
+
+    @contextmanager
+    def bind(self):
+        tokens = [
+            (context_var, context_var.set(getattr(self, name)))
+            for name, context_var in CONTEXT_VARS.items()
+        ]
+        try:
+            yield self
+        finally:
+            for context_var, token in reversed(tokens):
+                context_var.reset(token)
+
+    async def iterate(self, items: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        """
+        Iterate over an async iterator (e.g. a store's `stream`) within this context.
+
+        The context is bound around each step, as a response may be iterated by another
+        task than the one that closes it.
+
+        """
+        try:
+            while True:
+                with self.bind():
+                    try:
+                        item = await items.__anext__()
+                    except StopAsyncIteration:
+                        return
+                yield item
+        finally:
+            if hasattr(items, "aclose"):
+                with self.bind():
+                    await items.aclose()
+
+
+def with_route_context(func, route_context: RouteContext, timeout: Optional[float] = None):
+    """
+    Decorate a route so that the code it calls runs within its context.
+
+    Their `limit` is clamped by their query guard, and async routes are cancelled once
+    their deadline passes (see `microcosm_fastapi.deadlines`); synchronous routes run
+    in a worker thread, which cannot be cancelled.
+
+    :param timeout: the operation's default budget (in seconds), if any
+
+    """
+    def bind(kwargs):
+        query_guard = route_context.query_guard
+        if query_guard is not None and "limit" in kwargs:
+            kwargs["limit"] = query_guard.clamp(kwargs["limit"])
+
+        return replace(
+            route_context,
+            deadline=earliest_deadline(timeout),
+            request_writes=RequestWrites(),
+        ).bind()
+
+    if not iscoroutinefunction(func):
+        @wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            with bind(kwargs):
+                return func(*args, **kwargs)
+        return sync_wrapper
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        with bind(kwargs) as context:
+            if context.deadline is None:
+                return await func(*args, **kwargs)
+            return await run_within_deadline(func(*args, **kwargs), context.deadline)
+    return wrapper
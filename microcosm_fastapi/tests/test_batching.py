@@ -0,0 +1,56 @@
+"""
+Batch loader tests.
+
+"""
+from asyncio import gather
+
+import pytest
+from hamcrest import assert_that, equal_to, instance_of, is_
+
+from microcosm_fastapi.database.batching import BatchLoader
+
+
+class Loader:
+    def __init__(self, values):
+        self.values = values
+        self.batches = []
+
+    async def __call__(self, keys):
+        self.batches.append(keys)
+        return {
+            key: self.values[key]
+            for key in keys
+            if key in self.values
+        }
+
+
+@pytest.mark.asyncio
+async def test_batch_loader_collects_one_tick():
+    load_many = Loader(dict(a=1, b=2))
+    loader = BatchLoader(load_many)
+
+    results = await gather(loader.load("a"), loader.load("b"), loader.load("a"))
+
+    assert_that(results, is_(equal_to([1, 2, 1])))
+    assert_that(load_many.batches, is_(equal_to([["a", "b"]])))
+
+
+@pytest.mark.asyncio
+async def test_batch_loader_dispatches_full_batches():
+    load_many = Loader(dict(a=1, b=2, c=3))
+    loader = BatchLoader(load_many, window=10, max_batch_size=3)
+
+    results = await gather(loader.load("a"), loader.load("b"), loader.load("c"))
+
+    assert_that(results, is_(equal_to([1, 2, 3])))
+    assert_that(load_many.batches, is_(equal_to([["a", "b", "c"]])))
+
+
+@pytest.mark.asyncio
+async def test_batch_loader_raises_missing():
+    loader = BatchLoader(Loader(dict(a=1)), missing=LookupError)
+
+    results = await gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+
+    assert_that(results[0], is_(equal_to(1)))
+    assert_that(results[1], is_(instance_of(LookupError)))
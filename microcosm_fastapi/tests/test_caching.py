@@ -0,0 +1,105 @@
+"""
+Retrieve cache tests.
+
+"""
+from asyncio import Event, gather, sleep
+from unittest.mock import patch
+
+import pytest
+from hamcrest import assert_that, equal_to, is_
+
+from microcosm_fastapi.database.caching import RetrieveCache
+
+
+def loader_for(identifier, snapshot, calls):
+    async def load():
+        calls.append(identifier)
+        await sleep(0)
+        return identifier, snapshot
+    return load
+
+
+@pytest.mark.asyncio
+async def test_retrieve_cache_hits_after_miss():
+    cache = RetrieveCache(ttl=10)
+    calls = []
+
+    assert_that(await cache.get_or_load("key", loader_for(1, dict(id=1), calls)), is_(equal_to(dict(id=1))))
+    assert_that(await cache.get_or_load("key", loader_for(1, dict(id=1), calls)), is_(equal_to(dict(id=1))))
+
+    assert_that(calls, is_(equal_to([1])))
+    assert_that(cache.stats(), is_(equal_to(dict(hits=1, misses=1, evictions=0, size=1))))
+
+
+@pytest.mark.asyncio
+async def test_retrieve_cache_collapses_concurrent_misses():
+    cache = RetrieveCache(ttl=10)
+    calls = []
+
+    results = await gather(*[
+        cache.get_or_load("key", loader_for(1, dict(id=1), calls))
+        for _ in range(5)
+    ])
+
+    assert_that(results, is_(equal_to([dict(id=1)] * 5)))
+    assert_that(calls, is_(equal_to([1])))
+
+
+@pytest.mark.asyncio
+async def test_retrieve_cache_expires():
+    cache = RetrieveCache(ttl=10)
+    calls = []
+
+    with patch("microcosm_fastapi.database.caching.monotonic", return_value=100):
+        await cache.get_or_load("key", loader_for(1, dict(id=1), calls))
+
+    with patch("microcosm_fastapi.database.caching.monotonic", return_value=110):
+        await cache.get_or_load("key", loader_for(1, dict(id=1), calls))
+
+    assert_that(calls, is_(equal_to([1, 1])))
+
+
+@pytest.mark.asyncio
+async def test_retrieve_cache_evicts_least_recently_used():
+    cache = RetrieveCache(ttl=10, max_size=2)
+    calls = []
+
+    await cache.get_or_load("first", loader_for(1, dict(id=1), calls))
+    await cache.get_or_load("second", loader_for(2, dict(id=2), calls))
+    await cache.get_or_load("first", loader_for(1, dict(id=1), calls))
+    await cache.get_or_load("third", loader_for(3, dict(id=3), calls))
+
+    assert_that(list(cache.entries), is_(equal_to(["first", "third"])))
+    assert_that(cache.evictions, is_(equal_to(1)))
+
+
+@pytest.mark.asyncio
+async def test_retrieve_cache_invalidates_by_identifier():
+    cache = RetrieveCache(ttl=10)
+    calls = []
+
+    await cache.get_or_load("by-id", loader_for(1, dict(id=1), calls))
+    await cache.get_or_load("by-name", loader_for(1, dict(id=1), calls))
+    cache.invalidate(1)
+
+    assert_that(cache.stats()["size"], is_(equal_to(0)))
+
+
+@pytest.mark.asyncio
+async def test_retrieve_cache_skips_loads_racing_a_write():
+    cache = RetrieveCache(ttl=10)
+    started, release = Event(), Event()
+
+    async def load():
+        started.set()
+        await release.wait()
+        return 1, dict(id=1)
+
+    pending = cache.get_or_load("key", load)
+    waiter = gather(pending)
+    await started.wait()
+    cache.invalidate(1)
+    release.set()
+    await waiter
+
+    assert_that(cache.stats()["size"], is_(equal_to(0)))
@@ -0,0 +1,57 @@
+"""
+Test COPY support.
+
+"""
+from datetime import datetime, timezone
+
+from hamcrest import assert_that, equal_to, is_
+from microcosm_postgres.models import UTCDateTime
+from sqlalchemy import Column, Integer, String, literal_column, select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+from sqlalchemy.orm import declarative_base
+
+from microcosm_fastapi.database.copying import CopyFormat, compile_query, copied_rows, copy_statement
+
+
+Base = declarative_base()
+
+
+class Topping(Base):
+    __tablename__ = "topping"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    created_at = Column(UTCDateTime)
+
+
+def test_compile_query():
+    created_at = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    query = select(Topping.id, literal_column("'100%'")).where(
+        Topping.name.in_(["cheese", "ham"]),
+        Topping.created_at >= created_at,
+    )
+
+    statement, parameters = compile_query(query, dialect())
+
+    assert_that(statement, is_(equal_to(
+        "SELECT topping.id, '100%' \n"
+        "FROM topping \n"
+        "WHERE topping.name IN ($1, $2) AND topping.created_at >= $3"
+    )))
+    # Type decorators apply
+    assert_that(parameters, is_(equal_to(["cheese", "ham", datetime(2021, 1, 1)])))
+
+
+def test_copy_statement():
+    assert_that(copy_statement("SELECT 1", CopyFormat.CSV), is_(equal_to(
+        ("SELECT 1", dict(format="csv", header=True)),
+    )))
+
+    statement, options = copy_statement("SELECT 1", CopyFormat.NDJSON)
+    assert_that(statement, is_(equal_to("SELECT row_to_json(export) FROM (SELECT 1) AS export")))
+    assert_that(options["format"], is_(equal_to("csv")))
+
+
+def test_copied_rows():
+    assert_that(copied_rows("COPY 42"), is_(equal_to(42)))
+    assert_that(copied_rows("INSERT 0 3"), is_(equal_to(3)))
@@ -0,0 +1,30 @@
+"""
+Count cache tests.
+
+"""
+from unittest.mock import patch
+
+from hamcrest import assert_that, equal_to, is_, none
+
+from microcosm_fastapi.database.counting import CountCache
+
+
+def test_count_cache_expires():
+    cache = CountCache(ttl=10)
+
+    with patch("microcosm_fastapi.database.counting.monotonic", return_value=100):
+        cache.set("key", 5)
+        assert_that(cache.get("key"), is_(equal_to(5)))
+
+    with patch("microcosm_fastapi.database.counting.monotonic", return_value=110):
+        assert_that(cache.get("key"), is_(none()))
+
+
+def test_count_cache_evicts_oldest():
+    cache = CountCache(max_size=2)
+    cache.set("first", 1)
+    cache.set("second", 2)
+    cache.set("third", 3)
+
+    assert_that(cache.get("first"), is_(none()))
+    assert_that(cache.get("third"), is_(equal_to(3)))
@@ -0,0 +1,85 @@
+"""
+Unit of work tests.
+
+"""
+from asyncio import gather, sleep
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from hamcrest import assert_that, equal_to, is_, none
+
+from microcosm_fastapi.database.context import (
+    SessionContextAsync,
+    transaction_async,
+    transactional_async,
+)
+
+
+def new_session_maker():
+    return Mock(side_effect=lambda: AsyncMock())
+
+
+@pytest.mark.asyncio
+async def test_transaction_shares_one_session():
+    session_maker = new_session_maker()
+
+    async with transaction_async() as context:
+        session = context.session_for(session_maker)
+        async with transaction_async() as nested_context:
+            assert_that(nested_context, is_(context))
+            assert_that(nested_context.session_for(session_maker), is_(session))
+
+    assert_that(session_maker.call_count, is_(equal_to(1)))
+    session.commit.assert_awaited_once()
+    session.close.assert_awaited_once()
+    assert_that(SessionContextAsync.current(), is_(none()))
+
+
+@pytest.mark.asyncio
+async def test_transaction_rolls_back_on_error():
+    session_maker = new_session_maker()
+
+    with pytest.raises(ValueError):
+        async with transaction_async() as context:
+            session = context.session_for(session_maker)
+            raise ValueError()
+
+    session.commit.assert_not_awaited()
+    session.rollback.assert_awaited_once()
+    session.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_transactional_preserves_signature():
+    session_maker = new_session_maker()
+
+    async def create(pizza_id: int) -> int:
+        SessionContextAsync.current().session_for(session_maker)
+        return pizza_id
+
+    wrapped = transactional_async(create)
+
+    assert_that(wrapped.__name__, is_(equal_to("create")))
+    assert_that(wrapped.__annotations__, is_(equal_to(create.__annotations__)))
+    assert_that(await wrapped(pizza_id=1), is_(equal_to(1)))
+    assert_that(session_maker.call_count, is_(equal_to(1)))
+
+
+@pytest.mark.asyncio
+async def test_transaction_rejects_concurrent_use():
+    session_maker = new_session_maker()
+
+    async def execute(context):
+        with context.using(context.session_for(session_maker)):
+            # Nested use by the same task is fine
+            with context.using(context.session_for(session_maker)):
+                await sleep(0)
+
+    async with transaction_async() as context:
+        await execute(context)
+        await gather(execute(context))
+
+        with pytest.raises(RuntimeError):
+            await gather(execute(context), execute(context))
+
+        assert_that(context.users, is_(equal_to(dict())))
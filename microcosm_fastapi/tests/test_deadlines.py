@@ -0,0 +1,83 @@
+"""
+Test request deadlines.
+
+"""
+from asyncio import sleep
+from time import monotonic, sleep as blocking_sleep
+
+import pytest
+from asyncpg.exceptions import QueryCanceledError
+from hamcrest import assert_that, close_to, equal_to, is_
+
+from microcosm_fastapi.deadlines import (
+    DeadlineExceededError,
+    current_deadline,
+    earliest_deadline,
+    run_within_deadline,
+)
+from microcosm_fastapi.errors import ParsedException
+
+
+async def slow(delay):
+    await sleep(delay)
+    return current_deadline.get()
+
+
+def test_earliest_deadline():
+    assert_that(earliest_deadline(None), is_(equal_to(None)))
+    assert_that(earliest_deadline(1.0), is_(close_to(monotonic() + 1.0, 0.01)))
+
+    token = current_deadline.set(monotonic() + 0.5)
+    try:
+        assert_that(earliest_deadline(1.0), is_(equal_to(current_deadline.get())))
+        assert_that(earliest_deadline(0.1), is_(close_to(monotonic() + 0.1, 0.01)))
+    finally:
+        current_deadline.reset(token)
+
+
+@pytest.mark.asyncio
+async def test_run_within_deadline():
+    deadline = monotonic() + 1.0
+    token = current_deadline.set(deadline)
+    try:
+        assert_that(await run_within_deadline(slow(0.0), deadline), is_(equal_to(deadline)))
+    finally:
+        current_deadline.reset(token)
+
+
+@pytest.mark.asyncio
+async def test_run_within_deadline_cancels():
+    with pytest.raises(DeadlineExceededError):
+        await run_within_deadline(slow(1.0), monotonic() + 0.01)
+
+    with pytest.raises(DeadlineExceededError):
+        await run_within_deadline(slow(0.0), monotonic() - 1.0)
+
+
+async def fail(error):
+    # NB: blocks the event loop, so that the error is raised after the deadline passed
+    # but before the route is cancelled
+    blocking_sleep(0.02)
+    raise error
+
+
+@pytest.mark.asyncio
+async def test_run_within_deadline_errors():
+    # Statements cancelled once the deadline passed exceed it...
+    with pytest.raises(DeadlineExceededError):
+        await run_within_deadline(fail(QueryCanceledError("canceling statement")), monotonic() + 0.01)
+
+    # ...but other errors are raised as is
+    with pytest.raises(ValueError):
+        await run_within_deadline(fail(ValueError("invalid")), monotonic() + 0.01)
+
+
+def test_deadline_exceeded_error():
+    parsed_exception = ParsedException(DeadlineExceededError("Request deadline exceeded"))
+
+    assert_that(parsed_exception.to_dict(), is_(equal_to(dict(
+        code=504,
+        context={"errors": []},
+        message="Request deadline exceeded",
+        retryable=True,
+    ))))
@@ -0,0 +1,72 @@
+"""
+Test auto filters.
+
+"""
+import pytest
+from hamcrest import assert_that, equal_to, is_
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import declarative_base
+
+from microcosm_fastapi.conventions.parsers import FiltersParser, InvalidFiltersError
+from microcosm_fastapi.database.filters import AutoFilter, FilterOperator, as_auto_filter, parse_filter_key
+
+
+Base = declarative_base()
+
+
+class Topping(Base):
+    __tablename__ = "topping"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+def compile_clause(clause):
+    return str(clause.compile(dialect=postgresql.dialect(), compile_kwargs=dict(literal_binds=True)))
+
+
+def test_keys():
+    auto_filter = AutoFilter(Topping.name, FilterOperator.IN, "prefix")
+
+    assert_that(auto_filter.keys(), is_(equal_to(dict(
+        name=FilterOperator.EQ,
+        name__in=FilterOperator.IN,
+        name__prefix=FilterOperator.PREFIX,
+    ))))
+    assert_that(as_auto_filter(Topping.id).keys(), is_(equal_to(dict(id=FilterOperator.EQ))))
+
+
+def test_parse_filter_key():
+    assert_that(parse_filter_key("name"), is_(equal_to(("name", FilterOperator.EQ))))
+    assert_that(parse_filter_key("name__gte"), is_(equal_to(("name", FilterOperator.GTE))))
+
+    with pytest.raises(ValueError):
+        parse_filter_key("name__like")
+
+
+@pytest.mark.parametrize("operator, value, expected", [
+    (FilterOperator.EQ, "cheese", "topping.name = 'cheese'"),
+    (FilterOperator.IN, ["cheese", "ham"], "topping.name IN ('cheese', 'ham')"),
+    (FilterOperator.GTE, "b", "topping.name >= 'b'"),
+    (FilterOperator.LT, "c", "topping.name < 'c'"),
+    (FilterOperator.PREFIX, "c_h%", "topping.name LIKE 'c/_h/%%%%' ESCAPE '/'"),
+    (FilterOperator.ISNULL, True, "topping.name IS NULL"),
+    (FilterOperator.ISNULL, False, "topping.name IS NOT NULL"),
+])
+def test_clause(operator, value, expected):
+    clause = AutoFilter(Topping.name, operator).clause(operator, value)
+
+    assert_that(compile_clause(clause), is_(equal_to(expected)))
+
+
+def test_filters_parser():
+    parse_filters = FiltersParser((AutoFilter(Topping.id, FilterOperator.IN, FilterOperator.GTE), Topping.name))
+
+    assert_that(
+        parse_filters(id=None, id__in=["1", " 2"], id__gte=3, name="cheese"),
+        is_(equal_to(dict(id__in=[1, 2], id__gte=3, name="cheese"))),
+    )
+
+    with pytest.raises(InvalidFiltersError, match="Invalid id__in: 1,x"):
+        parse_filters(id__in=["1", "x"])
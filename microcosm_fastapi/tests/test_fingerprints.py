@@ -0,0 +1,56 @@
+"""
+Test query fingerprint statistics.
+
+"""
+from unittest.mock import Mock
+
+from hamcrest import assert_that, contains, equal_to, has_entries, is_
+
+from microcosm_fastapi.database.fingerprints import QueryFingerprints, percentile
+
+
+def test_percentile():
+    samples = [float(value) for value in range(1, 101)]
+
+    assert_that(percentile(samples, 0.95), is_(equal_to(95.0)))
+    assert_that(percentile(samples, 0.99), is_(equal_to(99.0)))
+    assert_that(percentile([], 0.99), is_(equal_to(0.0)))
+
+
+def test_record_groups_by_fingerprint():
+    fingerprints = QueryFingerprints(Mock())
+
+    fingerprints.record("SELECT * FROM pizza WHERE toppings = 'cheese'", 2.0, 1)
+    fingerprints.record("SELECT * FROM pizza WHERE toppings = $1", 4.0, 3)
+    fingerprints.record("SELECT * FROM topping WHERE id IN (1, 2, 3)", 1.0, 0)
+
+    assert_that(fingerprints.to_dict()["queries"], contains(
+        has_entries(
+            statement="SELECT * FROM pizza WHERE toppings = ?",
+            calls=2,
+            total_time=6.0,
+            mean_time=3.0,
+            p95_time=4.0,
+            rows=4,
+        ),
+        has_entries(
+            statement="SELECT * FROM topping WHERE id IN (?, ...)",
+            calls=1,
+        ),
+    ))
+
+
+def test_record_is_bounded():
+    fingerprints = QueryFingerprints(Mock(), max_fingerprints=1, sample_size=2)
+
+    for _ in range(10):
+        fingerprints.record("SELECT 1", 1.0, 1)
+    fingerprints.record("SELECT * FROM pizza", 1.0, 1)
+
+    stats, = fingerprints.stats.values()
+    assert_that(stats.calls, is_(equal_to(10)))
+    assert_that(len(stats.samples), is_(equal_to(2)))
+    assert_that(fingerprints.untracked_calls, is_(equal_to(1)))
+
+    fingerprints.reset()
+    assert_that(fingerprints.to_dict(), is_(equal_to(dict(queries=[], untracked_calls=0))))
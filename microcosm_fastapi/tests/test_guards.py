@@ -0,0 +1,30 @@
+"""
+Test query guards.
+
+"""
+from hamcrest import assert_that, equal_to, is_
+
+from microcosm_fastapi.database.guards import (
+    QueryGuard,
+    QueryTooExpensiveError,
+    clamp_limit,
+)
+from microcosm_fastapi.errors import ParsedException
+
+
+def test_clamp():
+    assert_that(QueryGuard(max_limit=100).clamp(1000), is_(equal_to(100)))
+    assert_that(QueryGuard(max_limit=100).clamp(10), is_(equal_to(10)))
+    assert_that(QueryGuard(max_limit=100).clamp(None), is_(equal_to(None)))
+    assert_that(QueryGuard().clamp(1000), is_(equal_to(1000)))
+
+
+def test_clamp_limit_without_guard():
+    assert_that(clamp_limit(1000), is_(equal_to(1000)))
+
+
+def test_query_too_expensive_error():
+    parsed_exception = ParsedException(QueryTooExpensiveError("Query is too expensive"))
+
+    assert_that(parsed_exception.status_code, is_(equal_to(400)))
+    assert_that(parsed_exception.retryable, is_(equal_to(False)))
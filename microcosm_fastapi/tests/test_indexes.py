@@ -0,0 +1,112 @@
+"""
+Test the index advisor.
+
+"""
+from hamcrest import assert_that, contains_exactly, equal_to, is_, none
+from sqlalchemy import Column, Integer, String, desc
+from sqlalchemy.orm import declarative_base
+
+from microcosm_fastapi.database.filters import AutoFilter, FilterOperator, as_auto_filter
+from microcosm_fastapi.database.indexes import IndexAdvice, IndexColumn, advise_store, parse_index_definition
+from microcosm_fastapi.database.store import StoreAsync
+
+
+Base = declarative_base()
+
+
+class Topping(Base):
+    __tablename__ = "topping"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    kind = Column(String)
+
+
+class ToppingStore:
+    model_class = Topping
+
+    _keyset = StoreAsync._keyset
+
+    def __init__(self, *auto_filter_fields, cursor_pagination=False):
+        self.cursor_pagination = cursor_pagination
+        self.auto_filters = {
+            auto_filter.name: auto_filter
+            for auto_filter in map(as_auto_filter, auto_filter_fields)
+        }
+
+    def _order_by(self, query, **kwargs):
+        return query.order_by(Topping.name, desc(Topping.id))
+
+    def _keyset_columns(self, **kwargs):
+        return (Topping.kind, Topping.id)
+
+
+def test_parse_index_definition():
+    assert_that(
+        parse_index_definition("CREATE UNIQUE INDEX topping_pkey ON public.topping USING btree (id)"),
+        is_(equal_to((IndexColumn("id"),))),
+    )
+    assert_that(
+        parse_index_definition(
+            'CREATE INDEX ix ON public.topping USING btree (name text_pattern_ops, "kind" DESC)',
+        ),
+        is_(equal_to((IndexColumn("name", pattern=True), IndexColumn("kind")))),
+    )
+    # Partial and non-btree indexes are not considered
+    assert_that(
+        parse_index_definition("CREATE INDEX ix ON public.topping USING btree (name) WHERE (kind IS NULL)"),
+        is_(none()),
+    )
+    assert_that(parse_index_definition("CREATE INDEX ix ON public.topping USING gin (name)"), is_(none()))
+
+
+def test_advise_store():
+    store = ToppingStore(AutoFilter(Topping.name, FilterOperator.PREFIX, FilterOperator.GTE), Topping.kind)
+
+    advice = advise_store(store, indexes=[(IndexColumn("id"),)], n_distinct=dict())
+
+    # The ordering index also serves the range filter on `name`
+    assert_that([item.definition for item in advice], contains_exactly(
+        "CREATE INDEX CONCURRENTLY topping_name_id_idx ON topping (name, id);",
+        "CREATE INDEX CONCURRENTLY topping_name_idx ON topping (name text_pattern_ops);",
+        "CREATE INDEX CONCURRENTLY topping_kind_idx ON topping (kind);",
+    ))
+
+
+def test_advise_store_covered():
+    store = ToppingStore(AutoFilter(Topping.name, FilterOperator.PREFIX), Topping.kind)
+    indexes = [
+        (IndexColumn("id"),),
+        (IndexColumn("name"), IndexColumn("id"), IndexColumn("kind")),
+        (IndexColumn("name", pattern=True),),
+        (IndexColumn("kind"), IndexColumn("name")),
+    ]
+
+    assert_that(advise_store(store, indexes, n_distinct=dict()), is_(equal_to([])))
+
+
+def test_advise_store_low_cardinality():
+    store = ToppingStore(Topping.kind)
+
+    advice = advise_store(
+        store,
+        indexes=[(IndexColumn("id"),), (IndexColumn("name"), IndexColumn("id"))],
+        n_distinct=dict(kind=3.0),
+    )
+
+    assert_that(advice, contains_exactly(IndexAdvice(
+        table_name="topping",
+        columns=(IndexColumn("kind"), IndexColumn("name"), IndexColumn("id")),
+        reason="filter on kind (few distinct values), then ordering",
+    )))
+
+
+def test_advise_store_cursor_pagination():
+    indexes = [(IndexColumn("id"),), (IndexColumn("name"), IndexColumn("id"))]
+
+    # The keyset only needs an index when routes page by cursor
+    assert_that(advise_store(ToppingStore(), indexes, n_distinct=dict()), is_(equal_to([])))
+    assert_that(
+        [item.definition for item in advise_store(ToppingStore(cursor_pagination=True), indexes, n_distinct=dict())],
+        contains_exactly("CREATE INDEX CONCURRENTLY topping_kind_id_idx ON topping (kind, id);"),
+    )
@@ -0,0 +1,28 @@
+"""
+Test database instrumentation.
+
+"""
+from hamcrest import assert_that, equal_to, has_entries, is_
+
+from microcosm_fastapi.database.instrumentation import WaitHistogram
+
+
+def test_wait_histogram_is_cumulative():
+    histogram = WaitHistogram(buckets=(1, 10))
+
+    for wait_time in (0.5, 1.0, 5.0, 50.0):
+        histogram.observe(wait_time)
+
+    assert_that(histogram.to_dict(), has_entries(
+        buckets={"1": 2, "10": 3, "+Inf": 4},
+        count=4,
+        sum=56.5,
+    ))
+
+
+def test_wait_histogram_empty():
+    assert_that(WaitHistogram(buckets=(1,)).to_dict(), is_(equal_to(dict(
+        buckets={"1": 0, "+Inf": 0},
+        count=0,
+        sum=0.0,
+    ))))
@@ -0,0 +1,104 @@
+"""
+Store metrics tests.
+
+"""
+from asyncio import sleep
+from types import SimpleNamespace
+from unittest.mock import ANY, Mock
+
+import pytest
+from hamcrest import assert_that, equal_to, greater_than, is_
+
+from microcosm_fastapi.database.metrics import PostgresStoreMetricsAsync, store_metric_timing
+
+
+class Store:
+    model_name = "Pizza"
+
+    def __init__(self):
+        self.postgres_store_metrics = Mock()
+
+    @store_metric_timing(action="search")
+    async def search(self, count):
+        await sleep(0.01)
+        return [object()] * count
+
+    @store_metric_timing(action="retrieve")
+    async def retrieve(self):
+        raise KeyError()
+
+    @store_metric_timing(action="stream")
+    async def stream(self, count):
+        for index in range(count):
+            yield index
+
+
+@pytest.mark.asyncio
+async def test_store_metric_timing_times_awaited_work():
+    store = Store()
+
+    await store.search(3)
+
+    store.postgres_store_metrics.assert_called_once_with(
+        model_name="Pizza",
+        action="search",
+        elapsed_time=ANY,
+        execution_result="SUCCESS",
+        row_count=3,
+        error_class=None,
+        pool_name=None,
+    )
+    assert_that(store.postgres_store_metrics.call_args.kwargs["elapsed_time"], is_(greater_than(10)))
+
+
+@pytest.mark.asyncio
+async def test_store_metric_timing_records_error_class():
+    store = Store()
+
+    with pytest.raises(KeyError):
+        await store.retrieve()
+
+    assert_that(store.postgres_store_metrics.call_args.kwargs["execution_result"], is_(equal_to("FAILURE")))
+    assert_that(store.postgres_store_metrics.call_args.kwargs["error_class"], is_(equal_to("KeyError")))
+
+
+@pytest.mark.asyncio
+async def test_store_metric_timing_counts_streamed_rows():
+    store = Store()
+
+    assert_that([index async for index in store.stream(2)], is_(equal_to([0, 1])))
+    assert_that(store.postgres_store_metrics.call_args.kwargs["row_count"], is_(equal_to(2)))
+
+
+def test_postgres_store_metrics_async():
+    store_metrics = Mock(enabled=True)
+    metrics = PostgresStoreMetricsAsync(SimpleNamespace(postgres_store_metrics=store_metrics))
+
+    metrics(
+        model_name="Pizza",
+        action="retrieve",
+        elapsed_time=1.0,
+        execution_result="FAILURE",
+        row_count=None,
+        error_class="ModelNotFoundError",
+        pool_name="reporting",
+    )
+
+    store_metrics.assert_called_once_with(
+        model_name="Pizza",
+        action="retrieve",
+        elapsed_time=1.0,
+        execution_result="FAILURE",
+    )
+    store_metrics.metrics.histogram.assert_not_called()
+    store_metrics.metrics.increment.assert_called_once_with(
+        "store.errors",
+        tags=[
+            "source:microcosm-fastapi",
+            "result:FAILURE",
+            "action:retrieve",
+            "model_name:Pizza",
+            "pool:reporting",
+            "error_class:ModelNotFoundError",
+        ],
+    )
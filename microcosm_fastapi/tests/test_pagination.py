@@ -0,0 +1,26 @@
+"""
+Pagination cursor tests.
+
+"""
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from hamcrest import assert_that, equal_to, is_
+
+from microcosm_fastapi.database.errors import InvalidCursorError
+from microcosm_fastapi.database.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    values = [datetime(2021, 3, 4, 5, 6, 7, 8, tzinfo=timezone.utc), uuid4(), 10, "cheese", None]
+    cursor = encode_cursor(values)
+
+    assert_that(cursor.isascii() and "=" not in cursor, is_(True))
+    assert_that(decode_cursor(cursor), is_(equal_to(values)))
+
+
+def test_invalid_cursor():
+    for cursor in ["not-a-cursor", encode_cursor([1])[:-2], "W1sidW5rbm93biIsMV1d"]:
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(cursor)
@@ -0,0 +1,64 @@
+"""
+Query parser tests.
+
+"""
+import pytest
+from hamcrest import assert_that, equal_to, has_key, is_, is_not, none, same_instance
+from starlette.requests import Request
+
+from microcosm_fastapi.conventions.parsers import FieldsParser, InvalidFieldsError, LinkProvider
+from microcosm_fastapi.conventions.schemas import BaseSchema
+
+
+class PizzaSchema(BaseSchema):
+    pizza_toppings: str
+    price: float
+
+
+def test_fields_parser_accepts_aliases_and_names():
+    parse_fields = FieldsParser(PizzaSchema)
+
+    fields = parse_fields(["pizzaToppings", " price"])
+
+    assert_that(fields.names, is_(equal_to({"pizza_toppings", "price"})))
+    assert_that(
+        fields.schema(pizza_toppings="cheese", price=5.0).dict(by_alias=True),
+        is_(equal_to(dict(pizzaToppings="cheese", price=5.0))),
+    )
+
+
+def test_fields_parser_trims_schema():
+    fields = FieldsParser(PizzaSchema)(["price"])
+
+    assert_that(list(fields.schema.__fields__), is_(equal_to(["price"])))
+    assert_that(fields.schema, is_(same_instance(FieldsParser(PizzaSchema)(["price"]).schema)))
+
+
+def test_fields_parser_defaults_to_every_field():
+    assert_that(FieldsParser(PizzaSchema)(None), is_(none()))
+
+
+def test_fields_parser_rejects_unknown_fields():
+    with pytest.raises(InvalidFieldsError, match="Unknown fields: crust"):
+        FieldsParser(PizzaSchema)(["crust"])
+
+
+def test_link_provider_next_boundary():
+    request = Request(dict(
+        type="http",
+        method="GET",
+        scheme="http",
+        server=("testserver", 80),
+        path="/api/v1/pizza",
+        query_string=b"",
+        headers=[],
+    ))
+    create_links = LinkProvider(request, offset=2, limit=2)
+
+    assert_that(create_links(5)["next"]["href"], is_(equal_to("http://testserver/api/v1/pizza?offset=4&limit=2")))
+    # The page ends at the last item
+    assert_that(create_links(4), is_not(has_key("next")))
+
+    # Without a count, the route tells whether there is a next page
+    assert_that(create_links(None, has_next=True), has_key("next"))
+    assert_that(create_links(None), is_not(has_key("next")))
@@ -0,0 +1,78 @@
+"""
+Test route contexts.
+
+"""
+from asyncio import sleep
+from time import monotonic
+
+import pytest
+from hamcrest import assert_that, close_to, contains_exactly, equal_to, is_, is_not
+
+from microcosm_fastapi.database.guards import QueryGuard, clamp_limit
+from microcosm_fastapi.database.pools import current_pool_name
+from microcosm_fastapi.deadlines import DeadlineExceededError, current_deadline
+from microcosm_fastapi.route_context import RouteContext, with_route_context
+
+
+async def search(limit: int = 20, delay: float = 0.0):
+    await sleep(delay)
+    return limit, clamp_limit(limit * 2), RouteContext.current()
+
+
+def search_sync(limit: int = 20):
+    return limit, RouteContext.current()
+
+
+async def stream():
+    for _ in range(3):
+        await sleep(0)
+        yield current_pool_name.get()
+
+
+@pytest.mark.asyncio
+async def test_with_route_context():
+    route = with_route_context(search, RouteContext(pool_name="reporting", query_guard=QueryGuard(max_limit=100)))
+
+    limit, clamped, context = await route(limit=1000)
+    assert_that((limit, clamped), is_(equal_to((100, 100))))
+    assert_that(context.pool_name, is_(equal_to("reporting")))
+    assert_that(context.query_guard, is_(equal_to(QueryGuard(max_limit=100))))
+    assert_that(RouteContext.current(), is_(equal_to(RouteContext())))
+
+    # Each request tracks its own writes
+    _, _, other_context = await route()
+    assert_that(context.request_writes.written, is_(equal_to(False)))
+    assert_that(other_context.request_writes, is_not(context.request_writes))
+
+
+@pytest.mark.asyncio
+async def test_with_route_context_binds_deadline():
+    _, _, context = await with_route_context(search, RouteContext(), timeout=1.0)()
+
+    assert_that(context.deadline, is_(close_to(monotonic() + 1.0, 0.05)))
+    assert_that(current_deadline.get(), is_(equal_to(None)))
+
+
+@pytest.mark.asyncio
+async def test_with_route_context_cancels():
+    with pytest.raises(DeadlineExceededError):
+        await with_route_context(search, RouteContext(), timeout=0.01)(delay=1.0)
+
+
+def test_with_route_context_sync():
+    route = with_route_context(search_sync, RouteContext(pool_name="reporting", query_guard=QueryGuard(max_limit=100)))
+
+    limit, context = route(limit=1000)
+    assert_that(limit, is_(equal_to(100)))
+    assert_that(context.pool_name, is_(equal_to("reporting")))
+    assert_that(current_pool_name.get(), is_(equal_to(None)))
+
+
+@pytest.mark.asyncio
+async def test_iterate():
+    items = RouteContext(pool_name="reporting").iterate(stream())
+
+    # The context applies to each step only
+    assert_that(await items.__anext__(), is_(equal_to("reporting")))
+    assert_that(current_pool_name.get(), is_(equal_to(None)))
+    assert_that([item async for item in items], contains_exactly("reporting", "reporting"))
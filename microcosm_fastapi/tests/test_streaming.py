@@ -0,0 +1,47 @@
+"""
+Streaming encoder tests.
+
+"""
+from json import loads
+from types import SimpleNamespace
+
+import pytest
+from hamcrest import assert_that, equal_to, is_
+
+from microcosm_fastapi.conventions.schemas import BaseSchema
+from microcosm_fastapi.conventions.streaming import encode_json_array, encode_ndjson
+
+
+class PizzaSchema(BaseSchema):
+    pizza_toppings: str
+
+
+async def iter_pizzas(count):
+    for index in range(count):
+        yield SimpleNamespace(pizza_toppings=str(index))
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.asyncio
+async def test_encode_ndjson():
+    chunks = await collect(encode_ndjson(iter_pizzas(3), PizzaSchema, chunk_size=2))
+
+    assert_that(len(chunks), is_(equal_to(2)))
+    assert_that(
+        [loads(line) for line in "".join(chunks).splitlines()],
+        is_(equal_to([dict(pizzaToppings=str(index)) for index in range(3)])),
+    )
+
+
+@pytest.mark.asyncio
+async def test_encode_json_array():
+    chunks = await collect(encode_json_array(iter_pizzas(3), PizzaSchema, chunk_size=2))
+
+    assert_that(
+        loads("".join(chunks)),
+        is_(equal_to([dict(pizzaToppings=str(index)) for index in range(3)])),
+    )
+    assert_that(await collect(encode_json_array(iter_pizzas(0), PizzaSchema)), is_(equal_to(["[]"])))
@@ -0,0 +1,159 @@
+"""
+Startup warm-up.
+
+The first requests after a deploy otherwise pay for opening connections (and their
+TLS handshakes), asyncpg's type introspection and statement preparation, and the
+generation of the OpenAPI schema. On startup, the warm-up:
+
+ -  opens the connections of every pool: the default one, the named ones and those
+    of the read replica,
+ -  runs the common queries (`StoreAsync.warm_up`) of the graph's stores on each
+    connection of their pool,
+ -  builds `app.openapi()`.
+
+Startup waits for the warm-up unless `warm_up.background` is set, in which case the
+`warm_up` health check fails until it completes.
+
+"""
+from asyncio import Semaphore, gather, get_running_loop
+
+from microcosm.api import defaults, typed
+from microcosm.config.types import boolean
+from microcosm_logging.decorators import logger
+
+from microcosm_fastapi.database.store import iter_stores
+
+
+class WarmingUpError(Exception):
+    @property
+    def status_code(self):
+        # service unavailable
+        return 503
+
+    @property
+    def retryable(self):
+        return True
+
+    @property
+    def include_stack_trace(self):
+        return False
+
+
+@logger
+class WarmUp:
+    def __init__(self, graph, background=False):
+        self.graph = graph
+        self.background = background
+        self.ready = False
+        self.task = None
+
+    def stores(self):
+        return list(iter_stores(self.graph))
+
+    async def on_startup(self):
+        # Checks are registered now, as components may be used in any order
+        health = self.graph.get("health_convention")
+        if health is not None:
+            health.checks["warm_up"] = self.check_ready
+
+        if self.background:
+            self.task = get_running_loop().create_task(self.warm_up())
+        else:
+            await self.warm_up()
+
+    async def check_ready(self, graph):
+        if not self.ready:
+            raise WarmingUpError("Warming up")
+
+    async def warm_up(self):
+        try:
+            await self.warm_up_pools()
+            await self.warm_up_stores()
+            self.graph.app.openapi()
+        except Exception as error:
+            # Warming up is an optimization; the health checks report actual failures
+            self.logger.warning("Warm-up failed: {}".format(error))
+        finally:
+            self.ready = True
+
+    def engines(self) -> list:
+        """
+        The engines of the graph: the default one, the replica's and those of named pools.
+
+        """
+        engines = [self.graph.get("postgres_async"), self.graph.get("postgres_async_replica")]
+
+        pools = self.graph.get("postgres_async_pools")
+        if pools is not None:
+            engines.extend(pools.engines.values())
+            engines.extend(pools.replica_engines.values())
+
+        return [engine for engine in engines if engine is not None]
+
+    def store_engine(self, store):
+        """
+        The engine of the pool a store uses outside of routes.
+
+        """
+        pool_name = store.choose_pool_name()
+        if pool_name is None:
+            return self.graph.get("postgres_async")
+        return store.pools.engines[pool_name]
+
+    async def warm_up_pools(self):
+        await gather(*(
+            self.warm_up_pool(engine)
+            for engine in self.engines()
+        ))
+
+    async def warm_up_pool(self, engine):
+        """
+        Open (and return to the pool) an engine's pooled connections.
+
+        """
+        # Holding the connections together opens each of them
+        connections = await gather(*(
+            engine.connect().start()
+            for _ in range(engine.pool.size())
+        ))
+        await gather(*(
+            connection.close()
+            for connection in connections
+        ))
+
+    async def warm_up_stores(self):
+        """
+        Run each store's common queries once per connection of its pool.
+
+        Statements are prepared (and types introspected) per connection; concurrent
+        rounds check out distinct connections, as many as the pool holds.
+
+        """
+        semaphores = dict()
+
+        async def warm_up_store(store, semaphore):
+            async with semaphore:
+                await store.warm_up()
+
+        rounds = []
+        for store in self.stores():
+            engine = self.store_engine(store)
+            pool_size = max(engine.pool.size(), 1) if engine is not None else 1
+            semaphore = semaphores.setdefault(engine, Semaphore(pool_size))
+            rounds.extend(warm_up_store(store, semaphore) for _ in range(pool_size))
+
+        await gather(*rounds)
+
+
+@defaults(
+    # Warm up after startup, failing the `warm_up` health check until done
+    background=typed(boolean, default_value=False),
+)
+def configure_warm_up(graph):
+    """
+    Warm up the application on startup.
+
+    """
+    warm_up = WarmUp(graph, background=graph.config.warm_up.background)
+    graph.app.add_event_handler("startup", warm_up.on_startup)
+    return warm_up
@@ -47,14 +47,25 @@ setup(
             "app = microcosm_fastapi.factories.fastapi:configure_fastapi",
             "postgres_async = microcosm_fastapi.database.postgres:configure_postgres",
             "session_maker_async = microcosm_fastapi.database.session:configure_session_maker",
+            "postgres_async_replica = microcosm_fastapi.database.replica:configure_postgres_replica",
+            "postgres_async_replica_monitor = microcosm_fastapi.database.replica:ReplicaMonitor",
+            "session_maker_async_replica = microcosm_fastapi.database.session:configure_session_maker_replica",
+            "postgres_async_pools = microcosm_fastapi.database.pools:configure_connection_pools",
+            "postgres_store_metrics_async = microcosm_fastapi.database.metrics:PostgresStoreMetricsAsync",
+            "slow_query_log = microcosm_fastapi.database.slow_queries:configure_slow_query_log",
+            "query_fingerprints = microcosm_fastapi.database.fingerprints:configure_query_fingerprints",
             "sqs_message_dispatcher_async = microcosm_fastapi.pubsub.dispatcher:SQSMessageDispatcherAsync",
             # Conventions
             "documentation_convention = microcosm_fastapi.factories.docs:configure_docs",
             "build_info_convention = microcosm_fastapi.conventions.build_info.route:configure_build_info",
             "health_convention = microcosm_fastapi.conventions.health.route:configure_health",
             "config_convention = microcosm_fastapi.conventions.config.route:configure_config",
+            "query_stats_convention = microcosm_fastapi.conventions.query_stats.route:configure_query_stats",
             "landing_convention = microcosm_fastapi.conventions.landing.route:configure_landing",
             "audit_middleware = microcosm_fastapi.audit:configure_audit_middleware",
+            "deadline_middleware = microcosm_fastapi.deadlines:configure_deadline_middleware",
+            "warm_up = microcosm_fastapi.warm_up:configure_warm_up",
+            "index_advisor = microcosm_fastapi.database.indexes:configure_index_advisor",
             "request_context = microcosm_fastapi.context:configure_request_context",
             "global_exception_handler = microcosm_fastapi.exception_handler:configure_global_exception_handler",
             "logging_data_map = microcosm_fastapi.logging_data_map:configure_logging_data_map"
@@ -18,6 +18,7 @@ setup(
         "console_scripts": [
             "runserver = test_project.main:runserver",
             "createall = test_project.main:createall",
+            "adviseindexes = test_project.main:adviseindexes",
         ],
     },
 )
@@ -25,13 +25,16 @@ def create_app(debug=False, testing=False, model_only=False):
         "sessionmaker",
         "postgres",
         "pizza_store",
+        "index_advisor",
         "postgres_async",
-        "session_manager",
+        "session_maker_async",
         # Conventions
         "documentation_convention",
         "build_info_convention",
         "health_convention",
         "config_convention",
+        "query_stats_convention",
+        "deadline_middleware",
         "landing_convention",
     )
 
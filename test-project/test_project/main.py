@@ -1,3 +1,4 @@
+from microcosm_fastapi.database.indexes import main as advise_indexes_main
 from microcosm_fastapi.runserver import main as runserver_main
 from microcosm_postgres.createall import main as createall_main
 
@@ -11,3 +12,6 @@ def runserver():
 
 def createall():
     createall_main(graph)
+
+def adviseindexes():
+    advise_indexes_main(graph)
@@ -1,5 +1,7 @@
 from microcosm_postgres.models import EntityMixin, Model
-from sqlalchemy import Column, String
+from sqlalchemy import Column, ForeignKey, String
+from sqlalchemy.orm import relationship
+from sqlalchemy_utils import UUIDType
 
 
 class Pizza(EntityMixin, Model):
@@ -9,4 +11,11 @@ class Pizza(EntityMixin, Model):
 
     @property
     def price(self):
-        return 5.0
\ No newline at end of file
+        return 5.0
+
+
+class Slice(EntityMixin, Model):
+    __tablename__ = "slice"
+
+    pizza_id = Column(UUIDType, ForeignKey("pizza.id"), nullable=False)
+    pizza = relationship(Pizza, backref="slices")
@@ -1,16 +1,21 @@
-from typing import List
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
+from fastapi import Depends
 from microcosm.api import binding
 from microcosm_fastapi.database.context import transactional_async
+from microcosm_fastapi.database.copying import CopyFormat
+from microcosm_fastapi.database.guards import QueryGuard
 from microcosm_fastapi.conventions.crud import configure_crud
 from microcosm_fastapi.conventions.crud_adapter import CRUDStoreAdapter
+from microcosm_fastapi.conventions.parsers import FieldsParser, FiltersParser, SparseFields
 from microcosm_fastapi.conventions.schemas import SearchSchema
 from microcosm_fastapi.namespaces import Namespace
 from microcosm_fastapi.operations import Operation
 
 from test_project.pizza_model import Pizza
 from test_project.pizza_resources import NewPizzaSchema, PizzaSchema
+from test_project.pizza_store import PIZZA_FILTER_FIELDS
 
 
 @binding("pizza_route")
@@ -27,14 +32,39 @@ class PizzaController(CRUDStoreAdapter):
             Operation.Create: transactional_async(self.create),
             Operation.Retrieve: self.retrieve,
             Operation.Search: self.search,
+            Operation.Export: self.export,
         }
-        configure_crud(graph, ns, mappings)
+        configure_crud(graph, ns, mappings, query_guard=QueryGuard(max_limit=100, max_cost=1e6))
 
     async def create(self, pizza: NewPizzaSchema) -> PizzaSchema:
         return await super()._create(pizza)
 
-    async def retrieve(self, pizza_id: UUID) -> PizzaSchema:
-        return await super()._retrieve(pizza_id)
+    async def retrieve(
+        self,
+        pizza_id: UUID,
+        fields: Optional[SparseFields] = Depends(FieldsParser(PizzaSchema)),
+    ) -> PizzaSchema:
+        return await super()._retrieve(pizza_id, fields=fields)
 
-    async def search(self, limit: int = 20, offset: int = 0) -> SearchSchema(PizzaSchema):
-        return await super()._search(limit=limit, offset=offset)
+    async def search(
+        self,
+        limit: int = 20,
+        offset: int = 0,
+        include_count: bool = True,
+        fields: Optional[SparseFields] = Depends(FieldsParser(PizzaSchema)),
+        filters: Dict[str, Any] = Depends(FiltersParser(PIZZA_FILTER_FIELDS)),
+    ) -> SearchSchema(PizzaSchema):
+        return await super()._search(
+            limit=limit,
+            offset=offset,
+            include_count=include_count,
+            fields=fields,
+            **filters,
+        )
+
+    async def export(
+        self,
+        format: CopyFormat = CopyFormat.CSV,
+        filters: Dict[str, Any] = Depends(FiltersParser(PIZZA_FILTER_FIELDS)),
+    ):
+        return await super()._export(format=format, **filters)
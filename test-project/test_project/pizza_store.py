@@ -1,9 +1,16 @@
 from microcosm.api import binding
+from microcosm_fastapi.database.filters import AutoFilter, FilterOperator
 from microcosm_fastapi.database.store import StoreAsync
 
 from test_project.pizza_model import Pizza
 
 
+PIZZA_FILTER_FIELDS = (
+    AutoFilter(Pizza.toppings, FilterOperator.IN, FilterOperator.PREFIX, FilterOperator.ISNULL),
+    AutoFilter(Pizza.created_at, FilterOperator.GTE, FilterOperator.LT),
+)
+
+
 @binding("pizza_store")
 class PizzaStore(StoreAsync):
 
@@ -13,4 +20,5 @@ class PizzaStore(StoreAsync):
         super().__init__(
             graph,
             Pizza,
+            auto_filter_fields=PIZZA_FILTER_FIELDS,
         )
@@ -0,0 +1,39 @@
+import pytest
+from fastapi.testclient import TestClient
+from hamcrest import assert_that, contains_inanyorder
+from microcosm.api import create_object_graph
+from microcosm.loaders import load_from_dict
+from microcosm_postgres.operations import recreate_all
+
+from microcosm_fastapi.database.indexes import MissingIndexesError
+import test_project.pizza_store  # noqa: 401
+
+
+class TestIndexAdvisor:
+    def create_graph(self, **index_advisor):
+        graph = create_object_graph(
+            name="test_project",
+            testing=True,
+            loader=load_from_dict(index_advisor=index_advisor),
+        )
+        graph.use("postgres", "postgres_async", "session_maker_async", "pizza_store", "index_advisor")
+        recreate_all(graph)
+        return graph
+
+    @pytest.mark.asyncio
+    async def test_advise(self):
+        graph = self.create_graph()
+
+        advice = await graph.index_advisor.advise()
+
+        assert_that([item.definition for item in advice], contains_inanyorder(
+            "CREATE INDEX CONCURRENTLY pizza_created_at_idx ON pizza (created_at);",
+            "CREATE INDEX CONCURRENTLY pizza_toppings_idx ON pizza (toppings text_pattern_ops);",
+        ))
+
+    def test_fail_startup_in_testing(self):
+        graph = self.create_graph(enabled=True, fail_in_testing=True)
+
+        with pytest.raises(MissingIndexesError):
+            with TestClient(graph.app):
+                pass
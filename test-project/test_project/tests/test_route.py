@@ -1,14 +1,32 @@
-from asyncio import get_event_loop
-from unittest.mock import ANY, patch
+import json
+from typing import Optional
+from unittest.mock import ANY, Mock, patch
 
 import pytest
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.testclient import TestClient
-from microcosm_postgres.identifiers import new_object_id
+from microcosm_fastapi.conventions.crud import configure_crud
+from microcosm_fastapi.conventions.crud_adapter import CRUDStoreAdapter
+from microcosm_fastapi.conventions.parsers import CursorLinkProvider, LinkProvider
+from microcosm_fastapi.conventions.schemas import SearchSchema
+from microcosm_fastapi.database.errors import InvalidCursorError
+from microcosm_fastapi.database.guards import QueryTooExpensiveError
+from microcosm_fastapi.namespaces import Namespace
+from microcosm_fastapi.operations import Operation
 from microcosm_postgres.operations import recreate_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 
 from test_project.app import create_app
 from test_project.pizza_model import Pizza
+from test_project.pizza_resources import NewPizzaSchema, PizzaSchema
+
+
+def raised_errors(error):
+    # NB: (http) middleware may wrap errors in exception groups
+    for inner in getattr(error, "exceptions", ()):
+        yield from raised_errors(inner)
+    yield error
 
 
 class TestRoute:
@@ -18,13 +36,15 @@ class TestRoute:
 
         self.client = TestClient(self.graph.app)
 
-        self.pizza_id = new_object_id()
+    def teardown(self):
+        # Release the connection of `recreate_all`
+        self.graph.postgres.dispose()
 
     def test_search(self):
-        loop = get_event_loop()
-        loop.run_until_complete(self.create_pizza_object())
+        with self.client:
+            self.client.post("/api/v1/pizza", json=dict(toppings="cheese"))
+            response = self.client.get("/api/v1/pizza")
 
-        response = self.client.get("/api/v1/pizza")
         assert response.status_code == 200
         assert response.json()["count"] == 1
         assert response.json()["items"][0] == dict(
@@ -34,13 +54,13 @@ class TestRoute:
         )
 
     def test_retrieve(self):
-        loop = get_event_loop()
-        loop.run_until_complete(self.create_pizza_object())
+        with self.client:
+            pizza_id = self.client.post("/api/v1/pizza", json=dict(toppings="cheese")).json()["id"]
+            response = self.client.get(f"/api/v1/pizza/{pizza_id}")
 
-        response = self.client.get(f"/api/v1/pizza/{self.pizza_id}")
         assert response.status_code == 200
         assert response.json() == dict(
-            id=ANY,
+            id=pizza_id,
             price=5.0,
             toppings="cheese",
         )
@@ -59,11 +79,249 @@ class TestRoute:
             toppings="pepperoni",
         )
 
-    async def create_pizza_object(self):
-        new_pizza = Pizza(toppings="cheese")
+    def test_search_fields(self):
+        with self.client:
+            self.client.post("/api/v1/pizza", json=dict(toppings="cheese"))
+            response = self.client.get("/api/v1/pizza", params=dict(fields="toppings"))
+
+        assert response.status_code == 200
+        assert response.json()["count"] == 1
+        assert response.json()["items"] == [dict(toppings="cheese")]
+
+    def test_retrieve_fields(self):
+        with self.client:
+            pizza_id = self.client.post("/api/v1/pizza", json=dict(toppings="cheese")).json()["id"]
+            response = self.client.get(f"/api/v1/pizza/{pizza_id}", params=dict(fields="id,price"))
+
+        assert response.status_code == 200
+        assert response.json() == dict(id=pizza_id, price=5.0)
+
+    def test_query_stats(self):
+        with self.client:
+            self.client.delete("/api/debug/queries")
+            self.client.post("/api/v1/pizza", json=dict(toppings="cheese"))
+            self.client.get("/api/v1/pizza", params=dict(limit=10))
+            self.client.get("/api/v1/pizza", params=dict(limit=20))
+            response = self.client.get("/api/debug/queries")
+
+            assert response.status_code == 200
+            queries = {
+                query["statement"]: query
+                for query in response.json()["queries"]
+            }
+            select = next(
+                query
+                for statement, query in queries.items()
+                if statement.startswith("SELECT pizza.id") and "LIMIT ?" in statement
+            )
+            assert select["calls"] == 2
+            assert select["rows"] == 2
+            assert select["p99Time"] >= select["p95Time"] > 0
+            assert "cheese" not in str(queries)
+
+            assert self.client.delete("/api/debug/queries").status_code == 204
+            assert self.client.get("/api/debug/queries").json()["queries"] == []
+
+    def test_search_filters(self):
+        with self.client:
+            for toppings in ("cheese", "chorizo", "ham"):
+                self.client.post("/api/v1/pizza", json=dict(toppings=toppings))
+
+            response = self.client.get("/api/v1/pizza", params=dict(toppings__in="ham,cheese"))
+            assert sorted(item["toppings"] for item in response.json()["items"]) == ["cheese", "ham"]
+
+            response = self.client.get("/api/v1/pizza", params=dict(toppings__prefix="ch", toppings__isnull=False))
+            assert response.json()["count"] == 2
+
+        parameters = {
+            parameter["name"]: parameter
+            for parameter in self.graph.app.openapi()["paths"]["/api/v1/pizza"]["get"]["parameters"]
+        }
+        assert {"toppings", "toppings__in", "toppings__prefix", "toppings__isnull"} <= set(parameters)
+        assert parameters["created_at__gte"]["schema"]["format"] == "date-time"
+        assert parameters["toppings__isnull"]["schema"]["type"] == "boolean"
+
+    def test_export(self):
+        with self.client:
+            for toppings in ("cheese", "chorizo", "ham"):
+                self.client.post("/api/v1/pizza", json=dict(toppings=toppings))
+
+            # NB: the export path also matches the retrieve path, which is mapped after it
+            response = self.client.get("/api/v1/pizza/export", params=dict(toppings__prefix="ch"))
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/csv")
+            header, *rows = response.text.splitlines()
+            assert header == "id,created_at,updated_at,toppings"
+            assert sorted(row.split(",")[-1] for row in rows) == ["cheese", "chorizo"]
+
+            response = self.client.get("/api/v1/pizza/export", params=dict(format="ndjson", toppings="ham"))
+            assert response.headers["content-type"] == "application/x-ndjson"
+            assert [json.loads(line)["toppings"] for line in response.text.splitlines()] == ["ham"]
+
+    def test_export_query_guard(self):
+        with self.client, patch.object(self.graph.pizza_store.plan_cost_cache, "get", return_value=1e9):
+            with pytest.raises(Exception) as raised:
+                self.client.get("/api/v1/pizza/export")
+
+        assert any(isinstance(error, QueryTooExpensiveError) for error in raised_errors(raised.value))
+
+    def test_reads_own_writes(self):
+        store = self.graph.pizza_store
+
+        async def create(pizza: NewPizzaSchema) -> PizzaSchema:
+            # Each write commits its own unit of work
+            pizza = await store.create(Pizza(**pizza.dict()))
+            return await store.retrieve(pizza.id)
+
+        configure_crud(self.graph, Namespace(subject=Pizza, version="v2"), {Operation.Create: create})
+        replica_session_maker = Mock(wraps=sessionmaker(self.graph.postgres_async, class_=AsyncSession))
+
+        with self.client, \
+                patch.object(store, "replica_session_maker", replica_session_maker), \
+                patch.object(store, "replica_monitor", Mock(available=True)):
+            # Reads after a write in the same request stay on the primary...
+            pizza_id = self.client.post("/api/v2/pizza", json=dict(toppings="cheese")).json()["id"]
+            replica_session_maker.assert_not_called()
+
+            # ...while other requests read from the replica
+            assert self.client.get(f"/api/v1/pizza/{pizza_id}").status_code == 200
+            replica_session_maker.assert_called_once()
+
+    def test_search_links(self):
+        adapter = CRUDStoreAdapter(self.graph, self.graph.pizza_store)
+
+        async def search(
+            request: Request,
+            limit: int = 20,
+            offset: int = 0,
+            include_count: bool = True,
+        ) -> SearchSchema(PizzaSchema):
+            return await adapter._search(
+                limit=limit,
+                offset=offset,
+                include_count=include_count,
+                link_provider=LinkProvider(request, offset, limit),
+            )
+
+        configure_crud(self.graph, Namespace(subject=Pizza, version="v2"), {Operation.Search: search})
+
+        with self.client:
+            for toppings in ("cheese", "chorizo", "ham"):
+                self.client.post("/api/v1/pizza", json=dict(toppings=toppings))
+
+            for include_count in (True, False):
+                # The last page ends at the last item...
+                page = self.client.get("/api/v2/pizza", params=dict(limit=3, include_count=include_count)).json()
+                assert len(page["items"]) == 3
+                assert "next" not in page["_links"]
+
+                # ...while other pages link to the next one
+                page = self.client.get("/api/v2/pizza", params=dict(limit=2, include_count=include_count)).json()
+                assert len(page["items"]) == 2
+                assert page["count"] == (3 if include_count else None)
+
+                page = self.client.get(page["_links"]["next"]["href"]).json()
+                assert [item["toppings"] for item in page["items"]] == ["ham"]
+                assert "next" not in page["_links"]
+
+    def configure_cursor_search(self):
+        adapter = CRUDStoreAdapter(self.graph, self.graph.pizza_store)
+
+        async def search(
+            request: Request,
+            limit: int = 20,
+            after: Optional[str] = None,
+            before: Optional[str] = None,
+        ) -> SearchSchema(PizzaSchema, cursor=True):
+            return await adapter._search_by_cursor(
+                limit=limit,
+                after=after,
+                before=before,
+                link_provider=CursorLinkProvider(request, limit),
+            )
+
+        configure_crud(self.graph, Namespace(subject=Pizza, version="v2"), {Operation.Search: search})
+
+    def test_search_by_cursor(self):
+        self.configure_cursor_search()
+
+        def toppings(page):
+            return [item["toppings"] for item in page["items"]]
+
+        with self.client:
+            for toppings_ in ("cheese", "chorizo", "ham", "olives", "pepperoni"):
+                self.client.post("/api/v1/pizza", json=dict(toppings=toppings_))
+
+            first = self.client.get("/api/v2/pizza", params=dict(limit=2)).json()
+            assert toppings(first) == ["cheese", "chorizo"]
+            assert first["count"] == 5
+            assert "prev" not in first["_links"]
+
+            # Following `next` links (i.e. `after` cursors) pages forwards...
+            second = self.client.get(first["_links"]["next"]["href"]).json()
+            assert toppings(second) == ["ham", "olives"]
+            last = self.client.get(second["_links"]["next"]["href"]).json()
+            assert toppings(last) == ["pepperoni"]
+            assert "next" not in last["_links"]
+
+            # ...and `prev` links (i.e. `before` cursors) backwards
+            previous = self.client.get(last["_links"]["prev"]["href"]).json()
+            assert toppings(previous) == ["ham", "olives"]
+            previous = self.client.get(previous["_links"]["prev"]["href"]).json()
+            assert toppings(previous) == ["cheese", "chorizo"]
+            assert "prev" not in previous["_links"]
+            assert toppings(self.client.get(previous["_links"]["next"]["href"]).json()) == ["ham", "olives"]
+
+    def test_search_by_invalid_cursor(self):
+        self.configure_cursor_search()
+
+        with self.client:
+            with pytest.raises(Exception) as raised:
+                self.client.get("/api/v2/pizza", params=dict(after="not-a-cursor"))
+
+        error = next(error for error in raised_errors(raised.value) if isinstance(error, InvalidCursorError))
+        assert error.status_code == 400
+
+    def test_search_limit_is_clamped(self):
+        with self.client:
+            response = self.client.get("/api/v1/pizza", params=dict(limit=1000))
+
+        assert response.status_code == 200
+        assert response.json()["limit"] == 100
+
+    def test_deadline(self):
+        with self.client:
+            response = self.client.get("/api/v1/pizza", headers={"X-Request-Deadline": "1000"})
+            assert response.status_code == 200
+
+            response = self.client.get("/api/v1/pizza", headers={"X-Request-Deadline": "soon"})
+            assert response.status_code == 400
+            assert response.json()["message"] == "Invalid X-Request-Deadline header: soon"
+
+    def test_health(self):
+        with self.client:
+            response = self.client.get("/api/health")
+
+        assert response.status_code == 200
+        assert response.json()["checks"]["postgres"] == dict(
+            ok=True,
+            message="ok",
+            details=dict(
+                size=ANY,
+                checked_out=ANY,
+                idle=ANY,
+                overflow=0,
+                waiters=0,
+                checkout_wait_time=ANY,
+            ),
+        )
+
+    def test_health_timeout(self):
+        self.graph.config.health_convention.postgres_timeout = 0.0
 
-        with patch.object(self.graph.pizza_store, "new_object_id") as mocked:
-            mocked.return_value = self.pizza_id
+        with self.client:
+            response = self.client.get("/api/health")
 
-            async with transaction_async():
-                pizza_obj = await self.graph.pizza_store.create(new_pizza)
+        assert response.status_code == 503
+        assert response.json()["ok"] is False
+        assert response.json()["checks"]["postgres"]["message"] == "SELECT 1 timed out after 0.0s"
@@ -0,0 +1,41 @@
+from asyncio import gather
+from unittest.mock import patch
+
+import pytest
+from microcosm.api import create_object_graph
+from microcosm.loaders import load_from_dict
+from microcosm_postgres.operations import recreate_all
+
+import test_project.pizza_store  # noqa: 401
+from test_project.pizza_model import Pizza
+
+
+class TestSlowQueryLog:
+    def setup(self):
+        self.graph = create_object_graph(
+            name="test_project",
+            testing=True,
+            loader=load_from_dict(slow_query_log=dict(threshold=0.0, explain_sample_rate=1.0)),
+        )
+        self.graph.use("postgres", "pizza_store", "slow_query_log")
+        recreate_all(self.graph)
+
+    @pytest.mark.asyncio
+    async def test_slow_query_is_logged_and_explained(self):
+        slow_query_log = self.graph.slow_query_log
+        await self.graph.pizza_store.create(Pizza(toppings="cheese"))
+
+        with patch.object(slow_query_log, "logger") as logger:
+            await self.graph.pizza_store.search(Pizza.toppings == "cheese", limit=10)
+            await gather(*slow_query_log.explain_tasks)
+
+        slow_query, plan = [call.args[0] for call in logger.warning.call_args_list]
+        assert slow_query["statement"] == (
+            "SELECT pizza.id, pizza.created_at, pizza.updated_at, pizza.toppings "
+            "FROM pizza WHERE pizza.toppings = ? LIMIT ?"
+        )
+        assert slow_query["parameters"] == ["str", "int"]
+        assert slow_query["store_action"] == "Pizza.search"
+        assert plan["plan"][0]["Plan"]["Actual Rows"] == 1
+        assert "Shared Hit Blocks" in plan["plan"][0]["Plan"]
+        assert "cheese" not in str(plan)
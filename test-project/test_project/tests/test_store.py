@@ -1,12 +1,49 @@
-from unittest.mock import patch
+from asyncio import ensure_future, gather, sleep, wait_for
+import json
+from time import monotonic
+from unittest.mock import ANY, Mock, patch
 
 import pytest
-from microcosm_postgres.errors import ModelNotFoundError
+from microcosm.api import create_object_graph
+from microcosm.loaders import load_from_dict
+from microcosm_fastapi.conventions.crud_adapter import CRUDStoreAdapter
+from microcosm_fastapi.conventions.schemas import BaseSchema
+from microcosm_fastapi.conventions.streaming import started
+from microcosm_fastapi.database.batching import BatchLoader
+from microcosm_fastapi.database.caching import RetrieveCache
+from microcosm_fastapi.database.context import transaction_async
+from microcosm_fastapi.database.copying import CopyFormat
+from microcosm_fastapi.database.counting import CountStrategy
+from microcosm_fastapi.database.instrumentation import track_queries
+from microcosm_fastapi.database.guards import QueryGuard, QueryTooExpensiveError, current_query_guard
+from microcosm_fastapi.database.loading import LoadingContext, current_loading_context
+from microcosm_fastapi.database.store import StoreAsync, UpdateStrategy
+from microcosm_fastapi.deadlines import current_deadline
+from microcosm_fastapi.operations import Operation
+from microcosm_fastapi.route_context import RouteContext, with_route_context
+from microcosm_postgres.errors import DuplicateModelError, ModelNotFoundError
 from microcosm_postgres.identifiers import new_object_id
+from microcosm_postgres.models import EntityMixin, Model
 from microcosm_postgres.operations import recreate_all
+from sqlalchemy import Column, String, inspect, text
+from sqlalchemy.exc import DBAPIError, InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload, sessionmaker, subqueryload
 
 from test_project.app import create_app
-from test_project.pizza_model import Pizza
+from test_project.pizza_model import Pizza, Slice
+from test_project.pizza_resources import PizzaSchema
+
+
+class Topping(EntityMixin, Model):
+    __tablename__ = "topping"
+
+    name = Column(String(), nullable=False)
+    kind = Column(String(), nullable=False, server_default="herb")
+
+
+class SliceSchema(BaseSchema):
+    pizza: PizzaSchema
 
 
 class TestStore:
@@ -16,6 +53,10 @@ class TestStore:
 
         self.pizza_id = new_object_id()
 
+    def teardown(self):
+        # Release the connection of `recreate_all`
+        self.graph.postgres.dispose()
+
     @pytest.mark.asyncio
     async def test_create(self):
         new_pizza = Pizza(toppings="cheese")
@@ -80,3 +121,718 @@ class TestStore:
 
         with pytest.raises(ModelNotFoundError):
             await self.graph.pizza_store.retrieve(self.pizza_id)
+
+    @pytest.mark.asyncio
+    async def test_transaction_rollback(self):
+        with pytest.raises(ValueError):
+            async with transaction_async():
+                await self.graph.pizza_store.create(Pizza(toppings="cheese"))
+                await self.graph.pizza_store.create(Pizza(toppings="pepperoni"))
+                # Writes within the unit of work are visible before the single commit
+                assert await self.graph.pizza_store.count() == 2
+                raise ValueError()
+
+        assert await self.graph.pizza_store.count() == 0
+
+    @pytest.mark.asyncio
+    async def test_transaction_rejects_concurrent_use(self):
+        async with transaction_async():
+            await self.graph.pizza_store.create(Pizza(toppings="cheese"))
+            # One session serves the unit of work; the second call is rejected
+            pizzas, error = await gather(
+                self.graph.pizza_store.search(),
+                self.graph.pizza_store.count(),
+                return_exceptions=True,
+            )
+
+        assert len(pizzas) == 1
+        assert isinstance(error, RuntimeError)
+
+    @pytest.mark.asyncio
+    async def test_create_many(self):
+        pizzas = await self.graph.pizza_store.create_many(
+            [Pizza(toppings="cheese"), Pizza(toppings="pepperoni")],
+            chunk_size=1,
+        )
+
+        assert [pizza.toppings for pizza in pizzas] == ["cheese", "pepperoni"]
+        assert all(pizza.id is not None for pizza in pizzas)
+        assert await self.graph.pizza_store.count() == 2
+
+    @pytest.mark.asyncio
+    async def test_create_many_duplicate(self):
+        await self.graph.pizza_store.create(Pizza(id=self.pizza_id, toppings="cheese"))
+
+        with pytest.raises(DuplicateModelError):
+            await self.graph.pizza_store.create_many([Pizza(id=self.pizza_id, toppings="pepperoni")])
+
+    @pytest.mark.asyncio
+    async def test_copy_in(self):
+        async def records():
+            yield dict(toppings="pepperoni")
+
+        assert await self.graph.pizza_store.copy_in([Pizza(toppings="cheese")]) == 1
+        assert await self.graph.pizza_store.copy_in(records()) == 1
+
+        pizzas = await self.graph.pizza_store.search()
+        assert sorted(pizza.toppings for pizza in pizzas) == ["cheese", "pepperoni"]
+        assert all(pizza.id is not None and pizza.created_at is not None for pizza in pizzas)
+
+    @pytest.mark.asyncio
+    async def test_copy_out(self):
+        await self.graph.pizza_store.create_many([Pizza(toppings="cheese"), Pizza(toppings="ham")])
+
+        chunks = [
+            chunk
+            async for chunk in self.graph.pizza_store.copy_out(format=CopyFormat.NDJSON, toppings__in=["ham"])
+        ]
+
+        rows = [json.loads(line) for line in b"".join(chunks).splitlines()]
+        assert [row["toppings"] for row in rows] == ["ham"]
+        assert set(rows[0]) == {"id", "created_at", "updated_at", "toppings"}
+
+    @pytest.mark.asyncio
+    async def test_copy_out_stopped_early(self):
+        # Enough rows to fill the buffer between the COPY and its consumer
+        await self.graph.pizza_store.copy_in(dict(toppings="cheese" * 50) for _ in range(20000))
+        pool = self.graph.postgres_async.pool
+
+        chunks = self.graph.pizza_store.copy_out()
+        await chunks.__anext__()
+        await sleep(0.1)
+        await wait_for(chunks.aclose(), timeout=5)
+
+        # The interrupted connection is discarded
+        assert pool.checkedout() == 0
+        assert await self.graph.pizza_store.count() == 20000
+
+    @pytest.mark.asyncio
+    async def test_copy_in_server_defaults(self):
+        store = StoreAsync(self.graph, Topping)
+
+        assert await store.copy_in([dict(name="basil"), dict(name="garlic", kind="oil")]) == 2
+
+        toppings = await store.search()
+        assert sorted((topping.name, topping.kind) for topping in toppings) == [("basil", "herb"), ("garlic", "oil")]
+
+    @pytest.mark.asyncio
+    async def test_copy_in_duplicate(self):
+        await self.graph.pizza_store.create(Pizza(id=self.pizza_id, toppings="cheese"))
+
+        with pytest.raises(DuplicateModelError):
+            await self.graph.pizza_store.copy_in([dict(id=self.pizza_id, toppings="pepperoni")])
+
+    @pytest.mark.asyncio
+    async def test_copy_in_upsert(self):
+        pizza = await self.graph.pizza_store.create(Pizza(id=self.pizza_id, toppings="cheese"))
+
+        async with transaction_async():
+            copied = await self.graph.pizza_store.copy_in(
+                [dict(id=self.pizza_id, toppings="pepperoni"), dict(toppings="olives")],
+                upsert=True,
+            )
+
+        assert copied == 2
+        updated_pizza = await self.graph.pizza_store.retrieve(self.pizza_id)
+        assert updated_pizza.toppings == "pepperoni"
+        assert updated_pizza.created_at == pizza.created_at
+        assert await self.graph.pizza_store.count() == 2
+
+    @pytest.mark.asyncio
+    async def test_upsert_on_unique_column(self):
+        store = self.graph.pizza_store
+        async with store.with_transaction() as session:
+            await session.execute(text("CREATE UNIQUE INDEX pizza_toppings_key ON pizza (toppings)"))
+        pizza = await store.create(Pizza(id=self.pizza_id, toppings="cheese"))
+
+        with patch.object(store, "retrieve_cache", RetrieveCache(ttl=60)):
+            await store.retrieve(self.pizza_id)
+            await store.copy_in([dict(toppings="cheese")], upsert=True, index_elements=["toppings"])
+
+            # Conflicting rows keep their ids, and are no longer cached
+            updated_pizza = await store.retrieve(self.pizza_id)
+            assert updated_pizza.updated_at > pizza.updated_at
+
+        pizzas = await store.upsert_many([Pizza(toppings="cheese")], index_elements=["toppings"])
+        assert [pizza.id for pizza in pizzas] == [self.pizza_id]
+        assert [pizza.id for pizza in await store.search()] == [self.pizza_id]
+
+    @pytest.mark.asyncio
+    async def test_upsert(self):
+        pizza = await self.graph.pizza_store.upsert(Pizza(id=self.pizza_id, toppings="cheese"))
+        assert pizza.toppings == "cheese"
+
+        updated_pizza = await self.graph.pizza_store.upsert(Pizza(id=self.pizza_id, toppings="pepperoni"))
+        assert updated_pizza.toppings == "pepperoni"
+        assert updated_pizza.created_at == pizza.created_at
+        assert await self.graph.pizza_store.count() == 1
+
+    @pytest.mark.asyncio
+    async def test_replace(self):
+        pizza = await self.graph.pizza_store.replace(self.pizza_id, Pizza(toppings="cheese"))
+        assert pizza.id == self.pizza_id
+
+        pizza = await self.graph.pizza_store.replace(self.pizza_id, Pizza(toppings="ham"))
+        assert (await self.graph.pizza_store.retrieve(self.pizza_id)).toppings == "ham"
+
+    @pytest.mark.asyncio
+    async def test_replace_through_hooks(self):
+        class ShoutingStore(StoreAsync):
+            async def create(self, instance):
+                instance.toppings = instance.toppings.upper()
+                return await super().create(instance)
+
+            async def update(self, identifier, new_instance):
+                new_instance.toppings = new_instance.toppings.upper()
+                return await super().update(identifier, new_instance)
+
+        store = ShoutingStore(self.graph, Pizza)
+
+        pizza = await store.replace(self.pizza_id, Pizza(id=self.pizza_id, toppings="cheese"))
+        assert pizza.toppings == "CHEESE"
+
+        await store.replace(self.pizza_id, Pizza(id=self.pizza_id, toppings="ham"))
+        assert (await store.retrieve(self.pizza_id)).toppings == "HAM"
+
+    @pytest.mark.asyncio
+    async def test_upsert_many_keeps_unset_fields(self):
+        await self.graph.pizza_store.create(Pizza(id=self.pizza_id, toppings="cheese"))
+
+        await self.graph.pizza_store.upsert_many([
+            Pizza(toppings="pepperoni"),
+            Pizza(id=self.pizza_id),
+        ])
+
+        pizza = await self.graph.pizza_store.retrieve(self.pizza_id)
+        assert pizza.toppings == "cheese"
+        assert await self.graph.pizza_store.count() == 2
+
+    @pytest.mark.asyncio
+    async def test_update_returning(self):
+        pizza = await self.graph.pizza_store.create(Pizza(id=self.pizza_id, toppings="cheese"))
+
+        with patch.object(self.graph.pizza_store, "update_strategy", UpdateStrategy.RETURNING):
+            updated_pizza = await self.graph.pizza_store.update(self.pizza_id, Pizza(toppings="pepperoni"))
+
+            with pytest.raises(ModelNotFoundError):
+                await self.graph.pizza_store.update(new_object_id(), Pizza(toppings="pepperoni"))
+
+        assert updated_pizza.id == self.pizza_id
+        assert updated_pizza.toppings == "pepperoni"
+        assert updated_pizza.updated_at > pizza.updated_at
+
+    @pytest.mark.asyncio
+    async def test_delete_within_transaction(self):
+        async with transaction_async():
+            await self.graph.pizza_store.create(Pizza(id=self.pizza_id, toppings="cheese"))
+            await self.graph.pizza_store.delete(self.pizza_id)
+
+            with pytest.raises(ModelNotFoundError):
+                await self.graph.pizza_store.delete(self.pizza_id)
+
+        assert await self.graph.pizza_store.count() == 0
+
+    @pytest.mark.asyncio
+    async def test_search_by_cursor(self):
+        await self.graph.pizza_store.create_many([
+            Pizza(toppings=toppings)
+            for toppings in ["cheese", "pepperoni", "mushroom", "olive", "onion"]
+        ])
+        pizzas = await self.graph.pizza_store.search(after=None)
+
+        first_page = await self.graph.pizza_store.search(limit=2, after=None)
+        assert first_page == pizzas[:2]
+
+        second_page = await self.graph.pizza_store.search(
+            limit=2,
+            after=self.graph.pizza_store.cursor_for(first_page[-1]),
+        )
+        assert second_page == pizzas[2:4]
+
+        previous_page = await self.graph.pizza_store.search(
+            limit=2,
+            before=self.graph.pizza_store.cursor_for(second_page[0]),
+        )
+        assert previous_page == first_page
+
+    @pytest.mark.asyncio
+    async def test_search_with_count(self):
+        await self.graph.pizza_store.create_many([
+            Pizza(toppings=toppings)
+            for toppings in ["cheese", "pepperoni", "mushroom"]
+        ])
+
+        items, count = await self.graph.pizza_store.search_with_count(offset=1, limit=1)
+        assert len(items) == 1
+        assert count == 3
+
+        items, count = await self.graph.pizza_store.search_with_count(offset=5, limit=1)
+        assert items == []
+        assert count == 3
+
+    @pytest.mark.asyncio
+    async def test_count_estimate(self):
+        await self.graph.pizza_store.create_many([
+            Pizza(toppings=toppings)
+            for toppings in ["cheese", "pepperoni", "mushroom"]
+        ])
+
+        with patch.object(self.graph.pizza_store, "count_strategy", CountStrategy.ESTIMATE):
+            # Falls back to an exact count until the table is analyzed
+            assert await self.graph.pizza_store.count() == 3
+            assert await self.graph.pizza_store.count(Pizza.toppings == "cheese") >= 0
+
+    @pytest.mark.asyncio
+    async def test_count_cached(self):
+        await self.graph.pizza_store.create(Pizza(toppings="cheese"))
+
+        with patch.object(self.graph.pizza_store, "count_strategy", CountStrategy.CACHED):
+            assert await self.graph.pizza_store.count() == 1
+
+            with patch.object(self.graph.pizza_store, "_exact_count") as mocked:
+                assert await self.graph.pizza_store.count() == 1
+                mocked.assert_not_called()
+
+            # Writes through the store invalidate cached counts
+            await self.graph.pizza_store.create(Pizza(toppings="pepperoni"))
+            assert await self.graph.pizza_store.count() == 2
+
+    @pytest.mark.asyncio
+    async def test_stream(self):
+        await self.graph.pizza_store.create_many([
+            Pizza(toppings=toppings)
+            for toppings in ["cheese", "pepperoni", "mushroom"]
+        ])
+
+        pizzas = [
+            pizza
+            async for pizza in self.graph.pizza_store.stream(chunk_size=2, after=None)
+        ]
+        assert pizzas == await self.graph.pizza_store.search(after=None)
+
+    @pytest.mark.asyncio
+    async def test_stream_outlives_unit_of_work(self):
+        await self.graph.pizza_store.create_many([Pizza(toppings="cheese"), Pizza(toppings="ham")])
+
+        async with transaction_async():
+            # e.g. a transactional route that starts a streamed response
+            pizzas = await started(self.graph.pizza_store.stream(chunk_size=1))
+            chunks = await started(self.graph.pizza_store.copy_out())
+
+        assert len([pizza async for pizza in pizzas]) == 2
+        assert b"".join([chunk async for chunk in chunks]).count(b"\n") == 3
+
+    @pytest.mark.asyncio
+    async def test_search_with_custom_link_provider(self):
+        await self.graph.pizza_store.create(Pizza(toppings="cheese"))
+        adapter = CRUDStoreAdapter(self.graph, self.graph.pizza_store)
+
+        # Link providers that only take the count are still supported
+        response = await adapter._search(offset=0, limit=20, link_provider=lambda total_count: dict(count=total_count))
+        assert response["_links"] == dict(count=1)
+
+    @pytest.mark.asyncio
+    async def test_search_stream_route_context(self):
+        pizza = await self.graph.pizza_store.create(Pizza(toppings="cheese"))
+        store = StoreAsync(self.graph, Slice)
+        await store.create(Slice(pizza_id=pizza.id))
+
+        route_context = RouteContext(
+            loading_context=LoadingContext(Slice, Operation.Search, (selectinload(Slice.pizza),)),
+        )
+        search = with_route_context(CRUDStoreAdapter(self.graph, store)._search_stream, route_context)
+
+        with patch.object(store, "raise_on_lazy_load", True):
+            response = await search(SliceSchema)
+            # The body is iterated once the route returns
+            body = "".join([chunk async for chunk in response.body_iterator])
+
+        assert json.loads(body)["pizza"]["toppings"] == "cheese"
+
+    @pytest.mark.asyncio
+    async def test_read_replica_routing(self):
+        store = self.graph.pizza_store
+        replica_session_maker = sessionmaker(self.graph.postgres_async, class_=AsyncSession)
+
+        with patch.object(store, "replica_session_maker", replica_session_maker), \
+                patch.object(store, "replica_monitor", Mock(available=True)):
+            assert store.choose_session_maker() is replica_session_maker
+            assert store.choose_session_maker(primary=True) is store.session_maker
+
+            async with transaction_async():
+                assert store.choose_session_maker() is replica_session_maker
+                pizza = await store.create(Pizza(toppings="cheese"))
+                # Once written, the unit of work reads its own writes from the primary
+                assert store.choose_session_maker() is store.session_maker
+                assert await store.retrieve(pizza.id) is pizza
+
+            assert await store.search() == [pizza]
+
+            store.replica_monitor.available = False
+            assert store.choose_session_maker() is store.session_maker
+
+    @pytest.mark.asyncio
+    async def test_retrieve_cache(self):
+        store = self.graph.pizza_store
+        pizza = await store.create(Pizza(toppings="cheese"))
+
+        with patch.object(store, "retrieve_cache", RetrieveCache(ttl=60)):
+            first = await store.retrieve(pizza.id)
+            second = await store.retrieve(pizza.id)
+
+            # Each hit is its own detached copy
+            assert first == second
+            assert first is not second
+            assert inspect(second).detached
+            assert store.retrieve_cache.stats()["hits"] == 1
+
+            await store.update(pizza.id, Pizza(id=pizza.id, toppings="pepperoni"))
+            assert (await store.retrieve(pizza.id)).toppings == "pepperoni"
+
+            await store.delete(pizza.id)
+            with pytest.raises(ModelNotFoundError):
+                await store.retrieve(pizza.id)
+
+    @pytest.mark.asyncio
+    async def test_retrieve_many(self):
+        store = self.graph.pizza_store
+        pizzas = await store.create_many([
+            Pizza(toppings=toppings)
+            for toppings in ["cheese", "pepperoni"]
+        ])
+
+        assert await store.retrieve_many([pizzas[1].id, pizzas[0].id]) == [pizzas[1], pizzas[0]]
+        with pytest.raises(ModelNotFoundError):
+            await store.retrieve_many([pizzas[0].id, new_object_id()])
+
+    @pytest.mark.asyncio
+    async def test_retrieve_batched(self):
+        store = self.graph.pizza_store
+        pizzas = await store.create_many([
+            Pizza(toppings=toppings)
+            for toppings in ["cheese", "pepperoni"]
+        ])
+        missing_id = new_object_id()
+
+        batcher = BatchLoader(store._load_batch, missing=store._not_found)
+        with patch.object(store, "retrieve_batcher", batcher), \
+                patch.object(store, "_retrieve_by_ids", wraps=store._retrieve_by_ids) as mocked:
+            results = await gather(
+                store.retrieve(pizzas[0].id),
+                store.retrieve(pizzas[1].id),
+                store.retrieve(missing_id),
+                return_exceptions=True,
+            )
+
+        assert results[:2] == pizzas
+        assert isinstance(results[2], ModelNotFoundError)
+        mocked.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_search_fields(self):
+        pizza = await self.graph.pizza_store.create(Pizza(toppings="cheese"))
+
+        pizzas = await self.graph.pizza_store.search(fields=["toppings"])
+        assert [pizza.toppings for pizza in pizzas] == ["cheese"]
+        columns = set(Pizza.__table__.c.keys())
+        assert inspect(pizzas[0]).unloaded & columns == {"updated_at"}
+
+        # Fields that are not columns load every column
+        pizza = await self.graph.pizza_store.retrieve(pizza.id, fields=["price"])
+        assert not inspect(pizza).unloaded & columns
+
+    def test_loader_options(self):
+        store = self.graph.pizza_store
+        default, search, route = selectinload("*"), joinedload("*"), subqueryload("*")
+
+        with patch.object(store, "loader_options", (default,)), \
+                patch.object(store, "operation_loader_options", {Operation.Search: (search,)}):
+            assert store._loader_options() == (default,)
+
+            token = current_loading_context.set(LoadingContext(Pizza, Operation.Search))
+            assert store._loader_options() == (search,)
+            current_loading_context.reset(token)
+
+            token = current_loading_context.set(LoadingContext(Pizza, Operation.Search, (route,)))
+            assert store._loader_options() == (route,)
+            current_loading_context.reset(token)
+
+            # Routes of other models do not apply
+            token = current_loading_context.set(LoadingContext(object, Operation.Search, (route,)))
+            assert store._loader_options() == (default,)
+            current_loading_context.reset(token)
+
+            with patch.object(store, "raise_on_lazy_load", True):
+                assert len(store._loader_options()) == 2
+
+    @pytest.mark.asyncio
+    async def test_raise_on_lazy_load(self):
+        pizza = await self.graph.pizza_store.create(Pizza(toppings="cheese"))
+        store = StoreAsync(self.graph, Slice)
+        slice_ = await store.create(Slice(pizza_id=pizza.id))
+
+        with patch.object(store, "raise_on_lazy_load", True):
+            with pytest.raises(InvalidRequestError, match="lazy='raise'"):
+                (await store.retrieve(slice_.id)).pizza
+
+            # Relationships loaded by the route's loader options are available
+            route_context = RouteContext(
+                loading_context=LoadingContext(Slice, Operation.Retrieve, (selectinload(Slice.pizza),)),
+            )
+            retrieve = with_route_context(store.retrieve, route_context)
+            assert (await retrieve(slice_.id)).pizza.id == pizza.id
+
+    @pytest.mark.asyncio
+    async def test_joined_collections(self):
+        cheese, ham = await self.graph.pizza_store.create_many([Pizza(toppings="cheese"), Pizza(toppings="ham")])
+        await StoreAsync(self.graph, Slice).create_many([
+            Slice(pizza_id=pizza.id)
+            for pizza in (cheese, cheese, ham)
+        ])
+        store = StoreAsync(self.graph, Pizza, loader_options=(joinedload(Pizza.slices),))
+
+        # Pizzas are returned once, with all their slices
+        assert sorted(len(pizza.slices) for pizza in await store.search()) == [1, 2]
+        assert len((await store.retrieve(cheese.id)).slices) == 2
+        # ...and counted once
+        for page in (dict(), dict(limit=1), dict(offset=1)):
+            _, count = await store.search_with_count(**page)
+            assert count == 2
+
+    @pytest.mark.asyncio
+    async def test_retrieve_relationships_are_not_shared(self):
+        pizza = await self.graph.pizza_store.create(Pizza(toppings="cheese"))
+        slice_ = await StoreAsync(self.graph, Slice).create(Slice(pizza_id=pizza.id))
+        store = StoreAsync(
+            self.graph,
+            Slice,
+            retrieve_cache_ttl=60,
+            retrieve_batch_window=0,
+            loader_options=(selectinload(Slice.pizza),),
+        )
+
+        # Cached and batched rows carry no relationships, so reads loading them bypass both
+        retrieved = await gather(store.retrieve(slice_.id), store.retrieve(slice_.id))
+        assert [item.pizza.toppings for item in retrieved] == ["cheese", "cheese"]
+
+    @pytest.mark.asyncio
+    async def test_search_auto_filters(self):
+        store = self.graph.pizza_store
+        cheese = await store.create(Pizza(toppings="cheese"))
+        chorizo = await store.create(Pizza(toppings="chorizo"))
+        await store.create(Pizza(toppings="ham"))
+        plain = await store.create(Pizza())
+
+        def toppings(items):
+            return sorted(item.toppings for item in items)
+
+        assert toppings(await store.search(toppings__in=["cheese", "ham"])) == ["cheese", "ham"]
+        assert toppings(await store.search(toppings__prefix="ch")) == ["cheese", "chorizo"]
+        assert toppings(await store.search(toppings__prefix="%")) == []
+        assert [item.id for item in await store.search(toppings__isnull=True)] == [plain.id]
+        assert await store.count(toppings__isnull=False) == 3
+        assert toppings(await store.search(
+            created_at__gte=cheese.created_at,
+            created_at__lt=plain.created_at,
+        )) == ["cheese", "chorizo", "ham"]
+        assert [item.id for item in await store.search(toppings="chorizo")] == [chorizo.id]
+        # Undeclared operators are ignored
+        assert await store.count(toppings__gt="a") == 4
+
+    @pytest.mark.asyncio
+    async def test_query_guard(self):
+        store = self.graph.pizza_store
+        await store.create(Pizza(toppings="cheese"))
+
+        token = current_query_guard.set(QueryGuard(max_cost=1.0))
+        try:
+            with pytest.raises(QueryTooExpensiveError, match="Query is too expensive"):
+                await store.search(Pizza.toppings == "cheese")
+            with pytest.raises(QueryTooExpensiveError):
+                await store.count()
+
+            current_query_guard.set(QueryGuard(max_cost=1e6))
+            with patch("microcosm_fastapi.database.store.explain") as explain:
+                # Estimates are memoized per query shape, regardless of values
+                assert len(await store.search(Pizza.toppings == "pepperoni")) == 0
+            explain.assert_not_called()
+
+            # ...but per page size, which the planner weighs
+            await store.search(limit=1)
+            await store.search(limit=100)
+            assert {(None, 1), (None, 100)} <= {(None, limit) for _, limit in store.plan_cost_cache.entries}
+        finally:
+            current_query_guard.reset(token)
+
+    @pytest.mark.asyncio
+    async def test_deadline_statement_timeout(self):
+        token = current_deadline.set(monotonic() + 5.0)
+        try:
+            async with transaction_async():
+                await self.graph.pizza_store.search()
+                async with self.graph.pizza_store.with_session() as session:
+                    statement_timeout = (await session.execute(text("SHOW statement_timeout"))).scalar()
+
+            current_deadline.set(monotonic() + 0.1)
+            async with self.graph.pizza_store.with_session() as session:
+                with pytest.raises(DBAPIError, match="statement timeout"):
+                    await session.execute(text("SELECT pg_sleep(1)"))
+        finally:
+            current_deadline.reset(token)
+
+        assert 4000 < int(statement_timeout.rstrip("ms")) <= 5000
+
+    @pytest.mark.asyncio
+    async def test_track_queries(self):
+        await self.graph.pizza_store.create(Pizza(toppings="cheese"))
+
+        with track_queries() as query_stats:
+            await self.graph.pizza_store.search()
+            await self.graph.pizza_store.count()
+
+        assert query_stats.statement_count == 2
+        assert query_stats.db_time > 0
+        assert query_stats.pool_wait_time > 0
+
+
+class TestPoolStats:
+    def setup(self):
+        self.graph = create_object_graph(
+            name="test_project",
+            testing=True,
+            loader=load_from_dict(postgres=dict(pool_size=1, max_overflow=0)),
+        )
+        self.graph.use("postgres_async")
+
+    @pytest.mark.asyncio
+    async def test_pool_stats(self):
+        pool = self.graph.postgres_async.pool
+
+        async with self.graph.postgres_async.connect():
+            waiting = ensure_future(self.graph.postgres_async.connect().start())
+            await sleep(0.01)
+            assert pool.stats() == dict(
+                size=1,
+                checked_out=1,
+                idle=0,
+                overflow=0,
+                waiters=1,
+                checkout_wait_time=dict(buckets=ANY, count=1, sum=ANY),
+            )
+
+        await (await waiting).close()
+        stats = pool.stats()
+        assert stats["waiters"] == 0
+        assert stats["idle"] == 1
+        assert stats["checkout_wait_time"]["count"] == 2
+        assert stats["checkout_wait_time"]["buckets"]["+Inf"] == 2
+
+
+class TestConnectionPools:
+    def setup(self):
+        self.graph = create_object_graph(
+            name="test_project",
+            testing=True,
+            loader=load_from_dict(
+                postgres_async_pools=dict(
+                    pools=dict(reporting=dict(pool_size=1, statement_timeout=1500)),
+                ),
+            ),
+        )
+        self.graph.use("postgres", "pizza_store")
+        recreate_all(self.graph)
+
+    @pytest.mark.asyncio
+    async def test_store_pool(self):
+        default_pool = self.graph.postgres_async.pool
+        reporting_engine = self.graph.postgres_async_pools.engines["reporting"]
+        store = StoreAsync(self.graph, Pizza, pool_name="reporting")
+
+        try:
+            await store.search()
+        finally:
+            # Restore the model's store
+            self.graph.pizza_store.assign_model_class_store()
+
+        assert reporting_engine.pool.wait_histogram.count == 1
+        assert default_pool.wait_histogram.count == 0
+
+        async with reporting_engine.connect() as connection:
+            assert (await connection.execute(text("SHOW statement_timeout"))).scalar() == "1500ms"
+
+    @pytest.mark.asyncio
+    async def test_route_pool(self):
+        reporting_pool = self.graph.postgres_async_pools.engines["reporting"].pool
+        search = with_route_context(self.graph.pizza_store.search, RouteContext(pool_name="reporting"))
+
+        await search()
+        await self.graph.pizza_store.count()
+
+        assert reporting_pool.wait_histogram.count == 1
+        assert self.graph.postgres_async.pool.wait_histogram.count == 1
+
+    def test_unknown_pool(self):
+        with pytest.raises(ValueError, match="Unknown connection pool: batch"):
+            StoreAsync(self.graph, Pizza, pool_name="batch")
+
+    def test_replica_pool(self):
+        assert self.graph.postgres_async_pools.replica_session_maker("reporting") is None
+
+        graph = create_object_graph(
+            name="test_project",
+            testing=True,
+            loader=load_from_dict(
+                postgres_async_replica=dict(host="localhost"),
+                postgres_async_pools=dict(
+                    pools=dict(reporting=dict(pool_size=1)),
+                ),
+            ),
+        )
+        pools = graph.postgres_async_pools
+        store = StoreAsync(graph, Pizza)
+
+        try:
+            with patch.object(store, "replica_monitor", Mock(available=True)):
+                assert store.choose_session_maker() is graph.session_maker_async_replica
+                with RouteContext(pool_name="reporting").bind():
+                    # Reads of a named pool go to its own replica engine
+                    assert store.choose_session_maker() is pools.replica_session_maker("reporting")
+                    assert store.choose_session_maker(primary=True) is pools.session_maker("reporting")
+        finally:
+            self.graph.pizza_store.assign_model_class_store()
+
+        assert pools.replica_engines["reporting"].pool.size() == 1
+
+
+class TestReplicaMonitor:
+    def setup(self):
+        self.graph = create_object_graph(
+            name="test_project",
+            testing=True,
+            loader=load_from_dict(postgres_async_replica=dict(host="localhost")),
+        )
+
+    @pytest.mark.asyncio
+    async def test_replica_available_once_checked(self):
+        monitor = self.graph.postgres_async_replica_monitor
+
+        # Unknown lag keeps reads on the primary until the first check completes
+        assert not monitor.available
+        await monitor.check_task
+        assert monitor.lag == 0
+        assert monitor.available
+
+    @pytest.mark.asyncio
+    async def test_lagging_replica_is_dropped(self):
+        monitor = self.graph.postgres_async_replica_monitor
+        monitor.max_lag = -1
+
+        await monitor.check()
+        assert not monitor.available
+
+    def test_no_replica_configured(self):
+        graph = create_object_graph(name="test_project", testing=True)
+
+        assert graph.postgres_async_replica is None
+        assert graph.session_maker_async_replica is None
+        assert not graph.postgres_async_replica_monitor.available
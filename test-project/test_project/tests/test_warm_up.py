@@ -0,0 +1,75 @@
+from asyncio import sleep
+from collections import Counter
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from microcosm.api import create_object_graph
+from microcosm.loaders import load_from_dict
+from microcosm_postgres.operations import recreate_all
+
+import test_project.pizza_store  # noqa: 401
+
+
+class TestWarmUp:
+    def create_graph(self, pools=None, **warm_up):
+        graph = create_object_graph(
+            name="test_project",
+            testing=True,
+            loader=load_from_dict(
+                postgres=dict(pool_size=2),
+                postgres_async_pools=dict(pools=pools or dict()),
+                warm_up=warm_up,
+            ),
+        )
+        graph.use("postgres", "postgres_async", "pizza_store", "warm_up", "health_convention")
+        recreate_all(graph)
+        return graph
+
+    def test_warm_up(self):
+        graph = self.create_graph()
+        pool = graph.postgres_async.pool
+
+        with patch.object(graph.app, "openapi", wraps=graph.app.openapi) as openapi:
+            with TestClient(graph.app) as client:
+                assert graph.warm_up.ready
+                assert pool.checkedin() == 2
+                # Search and count, per pooled connection
+                assert pool.wait_histogram.count == 2 + 2 * 2
+                openapi.assert_called_once_with()
+
+                response = client.get("/api/health")
+
+        assert response.status_code == 200
+        assert response.json()["checks"]["warm_up"]["ok"] is True
+
+    def test_warm_up_named_pools(self):
+        graph = self.create_graph(pools=dict(reporting=dict(pool_size=3)))
+        pool = graph.postgres_async.pool
+        reporting_pool = graph.postgres_async_pools.engines["reporting"].pool
+        rounds = Counter()
+
+        async def warm_up():
+            rounds["current"] += 1
+            rounds["max"] = max(rounds["max"], rounds["current"])
+            await sleep(0.01)
+            rounds["current"] -= 1
+
+        stores = [graph.pizza_store, graph.pizza_store]
+        with patch.object(graph.pizza_store, "warm_up", warm_up), \
+                patch.object(graph.warm_up, "stores", return_value=stores):
+            with TestClient(graph.app):
+                assert reporting_pool.checkedin() == 3
+                assert pool.checkedin() == 2
+                # Rounds of stores sharing a pool hold at most its connections
+                assert rounds["max"] == 2
+
+    def test_warm_up_in_background(self):
+        graph = self.create_graph(background=True)
+
+        # The warm-up has yet to complete
+        with patch.object(graph.warm_up, "warm_up", AsyncMock()):
+            with TestClient(graph.app) as client:
+                response = client.get("/api/health")
+
+        assert response.status_code == 503
+        assert response.json()["checks"]["warm_up"] == dict(ok=False, message="Warming up", details=None)